@@ -2,20 +2,27 @@
 Base agent module.
 """
 
+import contextvars
 import json
+import threading
 import uuid
 from collections import defaultdict
-from typing import Any, Dict, List, Optional, Tuple, TypeVar, Union
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, TypeVar, Union
 
-from litellm.utils import token_counter
 
-from marble.environments import BaseEnvironment, CodingEnvironment, WebEnvironment
+from marble.environments.base_env import BaseEnvironment
 from marble.llms.model_prompting import model_prompting
+from marble.llms.token_ledger import token_scope
 from marble.memory import BaseMemory, SharedMemory
 from marble.utils.logger import get_logger
+from marble.utils.tracing import traced
 from marble.feedback.feedback_support import generate_agent_task_planning_prompt, generate_agent_task_execution_prompt
 
-EnvType = Union[BaseEnvironment, WebEnvironment, CodingEnvironment]
+if TYPE_CHECKING:
+    from marble.environments import CodingEnvironment, WebEnvironment
+
+EnvType = Union[BaseEnvironment, "WebEnvironment", "CodingEnvironment"]
 AgentType = TypeVar("AgentType", bound="BaseAgent")
 
 
@@ -87,7 +94,15 @@ class BaseAgent:
         self.FORWARD_TO = 0
         self.RECV_FROM = 1
         self.session_id: str = ""
+        # Guards msg_box: peers deliver messages from their own worker threads
+        self._msg_lock = threading.Lock()
         self.strategy = config.get("strategy", "default")
+        # Cap on environment actions of one response run at the same time
+        self.max_parallel_tool_calls: int = config.get("max_parallel_tool_calls", 4)
+        # (cache key, act prompt parts), see _get_prompt_scaffolding
+        self._prompt_scaffolding: Optional[Tuple[Tuple[Any, ...], Dict[str, Any]]] = None
+        # Approximate prompt tokens the agent's memory may take; None (default) renders all of it
+        self.memory_token_budget: Optional[int] = config.get("memory_token_budget")
         self.reasoning_prompts = {
             "default": "",
             "cot": (
@@ -128,41 +143,36 @@ class BaseAgent:
         """
         return state.get("task_description", "")
 
-    def act(self, task: str, feedback_package: Dict[str, Any]=None) -> Any:
+    def _get_prompt_scaffolding(self) -> Dict[str, Any]:
         """
-        Agent decides on an action to take.
+        Get the parts of the act prompt that only depend on the environment's actions,
+        the agent graph and the agent's strategy.
 
-        Args:
-            feedback_package: feedback
-            task (str): The task to perform.
+        They are built once and rebuilt only when the environment's action registry or
+        the agent graph changes.
 
         Returns:
-            Any: The action decided by the agent.
+            Dict[str, Any]: The tool schemas (including new_communication_session), the
+            available agents, their descriptions and the reasoning prompt.
         """
-        self.task_history.append(task)
+        assert (
+            self.agent_graph is not None
+        ), "Agent graph is not set. Please set the agent graph using the set_agent_graph method first."
+        key = (
+            id(self.env),
+            getattr(self.env, "actions_version", None),
+            id(self.agent_graph),
+            self.agent_graph.version,
+            self.strategy,
+            tuple(self.relationships),
+        )
+        if self._prompt_scaffolding is not None and self._prompt_scaffolding[0] == key:
+            return self._prompt_scaffolding[1]
         tools = [
             self.env.action_handler_descriptions[name]
             for name in self.env.action_handler_descriptions
         ]
-        available_agents: Dict[str, Any] = {}
-        assert (
-            self.agent_graph is not None
-        ), "Agent graph is not set. Please set the agent graph using the set_agent_graph method first."
-        for agent_id_1, agent_id_2, relationship in self.agent_graph.relationships:
-            if agent_id_1 != self.agent_id and agent_id_2 != self.agent_id:
-                continue
-            else:
-                if agent_id_1 == self.agent_id:
-                    profile = self.agent_graph.agents[agent_id_2].get_profile()
-                    agent_id = agent_id_2
-                elif agent_id_2 == self.agent_id:
-                    profile = self.agent_graph.agents[agent_id_1].get_profile()
-                    agent_id = agent_id_1
-                available_agents[agent_id] = {
-                    "profile": profile,
-                    "role": f"{agent_id_1} {relationship} {agent_id_2}",
-                }
-        self.available_agents = available_agents
+        available_agents: Dict[str, Any] = self.agent_graph.get_neighbors(self.agent_id)
         # Create the enum description with detailed information about each agent
         agent_descriptions = [
             f"{agent_id} ({info['role']} - {info['profile']})"
@@ -200,8 +210,105 @@ class BaseAgent:
         self.logger.info(
             f"Agent {self.agent_id} using {self.strategy} strategy with prompt:\n{reasoning_prompt}"
         )
+        scaffolding = {
+            "tools": tools,
+            "available_agents": available_agents,
+            "agent_descriptions": agent_descriptions,
+            "reasoning_prompt": reasoning_prompt,
+        }
+        self._prompt_scaffolding = (key, scaffolding)
+        return scaffolding
+
+    def _execute_tool_calls(
+        self, tool_calls: List[Any], task: str
+    ) -> List[Tuple[str, Dict[str, Any], Any, Optional[str]]]:
+        """
+        Execute every tool call of a model response.
+
+        Environment actions run concurrently if the environment allows it
+        (concurrent_actions) and sequentially otherwise; communication sessions run
+        one after another on the calling thread, since they drive this agent's session.
+
+        Args:
+            tool_calls (List[Any]): Tool calls of the model response.
+            task (str): The task being acted on.
+
+        Returns:
+            List[Tuple[str, Dict[str, Any], Any, Optional[str]]]: For each tool call, in
+            order, its function name, arguments, result and the chat history of a
+            communication session (None for environment actions).
+        """
+        calls = []
+        for function_call in tool_calls:
+            function_name = function_call.function.name
+            assert function_name is not None
+            calls.append((function_name, json.loads(function_call.function.arguments)))
+
+        def apply(function_name: str, function_args: Dict[str, Any]) -> Any:
+            return self.env.apply_action(
+                agent_id=self.agent_id,
+                action_name=function_name,
+                arguments=function_args,
+            )
+
+        action_indices = [
+            index for index, (name, _) in enumerate(calls) if name != "new_communication_session"
+        ]
+        futures: Dict[int, Future] = {}
+        pool: Optional[ThreadPoolExecutor] = None
+        if len(action_indices) > 1 and getattr(self.env, "concurrent_actions", False):
+            pool = ThreadPoolExecutor(
+                max_workers=min(len(action_indices), self.max_parallel_tool_calls),
+                thread_name_prefix=f"{self.agent_id}-tool",
+            )
+            for index in action_indices:
+                futures[index] = pool.submit(
+                    contextvars.copy_context().run, apply, *calls[index]
+                )
+        try:
+            results: List[Tuple[str, Dict[str, Any], Any, Optional[str]]] = []
+            for index, (function_name, function_args) in enumerate(calls):
+                chat_history = None
+                if index in futures:
+                    result_from_function = futures[index].result()
+                elif function_name != "new_communication_session":
+                    result_from_function = apply(function_name, function_args)
+                else:
+                    self.session_id = str(uuid.uuid4())  # new session id
+                    result_from_function = self._handle_new_communication_session(
+                        target_agent_id=function_args["target_agent_id"],
+                        message=function_args["message"],
+                        session_id=self.session_id,
+                        task=task,
+                        turns=5,
+                    )
+                    chat_history = result_from_function.get("full_chat_history", None)
+                results.append((function_name, function_args, result_from_function, chat_history))
+            return results
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True)
+
+    @traced("agent.act", category="agent", attributes=lambda self, *args, **kwargs: {"agent": self.agent_id})
+    def act(self, task: str, feedback_package: Dict[str, Any]=None) -> Any:
+        """
+        Agent decides on an action to take.
+
+        Args:
+            feedback_package: feedback
+            task (str): The task to perform.
+
+        Returns:
+            Any: The action decided by the agent.
+        """
+        self.task_history.append(task)
+        scaffolding = self._get_prompt_scaffolding()
+        tools = list(scaffolding["tools"])
+        self.available_agents = dict(scaffolding["available_agents"])
+        agent_descriptions = scaffolding["agent_descriptions"]
+        reasoning_prompt = scaffolding["reasoning_prompt"]
         if self.is_feedback:
-            act_task = generate_agent_task_execution_prompt(self.agent_id, self.profile, self.memory, reasoning_prompt, task, agent_descriptions, feedback_package)
+            act_task = generate_agent_task_execution_prompt(self.agent_id, self.profile, self.memory, reasoning_prompt, task, agent_descriptions, feedback_package, self.memory_token_budget)
         else:
             act_task = (
                 f"You are {self.agent_id}: {self.profile}\n"
@@ -211,79 +318,56 @@ class BaseAgent:
                 f"{agent_descriptions}"
                 f"But you do not have to communcate with other agents.\n"
                 f"You can also solve the task by calling other functions to solve it by yourself.\n"
-                f"These are your memory: {self.memory.get_memory_str()}\n"
+                f"These are your memory: {self.memory.render(self.memory_token_budget)}\n"
             )
 
         if len(tools) == 0:
-            result = model_prompting(
-                llm_model=self.llm,
-                messages=[{"role": "user", "content": act_task}],
-                return_num=1,
-                max_token_num=512,
-                temperature=0.0,
-                top_p=None,
-                stream=None,
-            )[0]
+            with token_scope(agent=self.agent_id, component="agent") as usage:
+                result = model_prompting(
+                    llm_model=self.llm,
+                    messages=[{"role": "user", "content": act_task}],
+                    return_num=1,
+                    max_token_num=512,
+                    temperature=0.0,
+                    top_p=None,
+                    stream=None,
+                )[0]
         else:
-            result = model_prompting(
-                llm_model=self.llm,
-                messages=[{"role": "user", "content": act_task}],
-                return_num=1,
-                max_token_num=512,
-                temperature=0.0,
-                top_p=None,
-                stream=None,
-                tools=tools,
-                tool_choice="auto",
-            )[0]
-        messages = [
-            {"role": "usr", "content": act_task},
-            {"role": "sys", "content": result.content},
-        ]
-        self.token_usage += token_counter(model=self.llm, messages=messages)
+            with token_scope(agent=self.agent_id, component="agent") as usage:
+                result = model_prompting(
+                    llm_model=self.llm,
+                    messages=[{"role": "user", "content": act_task}],
+                    return_num=1,
+                    max_token_num=512,
+                    temperature=0.0,
+                    top_p=None,
+                    stream=None,
+                    tools=tools,
+                    tool_choice="auto",
+                )[0]
+        self.token_usage += usage.total_tokens
         communication = None
         result_from_function_str = None
         if result.tool_calls:
-            function_call = result.tool_calls[0]
-            function_name = function_call.function.name
-            assert function_name is not None
-            function_args = json.loads(function_call.function.arguments)
-            if function_name != "new_communication_session":
-                result_from_function = self.env.apply_action(
-                    agent_id=self.agent_id,
-                    action_name=function_name,
-                    arguments=function_args,
-                )
-                result_from_function_str = convert_to_str(result_from_function)
-            else:  # function_name == "new_communication_session"
-                self.session_id = uuid.uuid4()  # new session id
-                target_agent_id = function_args["target_agent_id"]
-                message = function_args["message"]
-                result_from_function = self._handle_new_communication_session(
-                    target_agent_id=target_agent_id,
-                    message=message,
-                    session_id=self.session_id,
-                    task=task,
-                    turns=5,
+            function_results = self._execute_tool_calls(result.tool_calls, task)
+            communications = []
+            for function_name, function_args, result_from_function, chat_history in function_results:
+                self.memory.update(
+                    self.agent_id,
+                    {
+                        "type": "action_function_call",
+                        "action_name": function_name,
+                        "args": function_args,
+                        "result": result_from_function,
+                    },
                 )
-                result_from_function_str = convert_to_str(result_from_function)
-                communication = result_from_function.get("full_chat_history", None)
-            self.memory.update(
-                self.agent_id,
-                {
-                    "type": "action_function_call",
-                    "action_name": function_name,
-                    "args": function_args,
-                    "result": result_from_function,
-                },
+                if chat_history:
+                    communications.append(chat_history)
+            result_from_function_str = "\n".join(
+                convert_to_str(result_from_function)
+                for _, _, result_from_function, _ in function_results
             )
-
-            # self.logger.info(
-            #     f"Agent '{self.agent_id}' called '{function_name}' with args '{function_args}'."
-            # )
-            # self.logger.info(
-            #     f"Agent '{self.agent_id}' obtained result '{result_from_function}'."
-            # )
+            communication = "\n".join(communications) if communications else None
 
         else:
             self.memory.update(
@@ -291,7 +375,6 @@ class BaseAgent:
             )
             self.logger.info(f"Agent '{self.agent_id}' acted with result '{result}'.")
         result_content = result.content if result.content else ""
-        self.token_usage += self._calculate_token_usage(task, result_content)
         output = "Result from the model:" + result_content + "\n"
         if result_from_function_str:
             output += "Result from the function:" + result_from_function_str
@@ -331,9 +414,10 @@ class BaseAgent:
             target_agent (BaseAgent): The agent to whom the message is being sent.
             message (str): The message content to be sent.
         """
-        self.msg_box[session_id][target_agent.agent_id].append(
-            (self.FORWARD_TO, message)
-        )
+        with self._msg_lock:
+            self.msg_box[session_id][target_agent.agent_id].append(
+                (self.FORWARD_TO, message)
+            )
 
         self.logger.info(
             f"Agent {self.agent_id} sent message to {target_agent.agent_id}: {message}"
@@ -351,31 +435,48 @@ class BaseAgent:
             from_agent (BaseAgent): The agent sending the message.
             message (str): The content of the received message.
         """
-        self.session_id = session_id
-
         # Store the received message in the message box for the sending agent.
-        self.msg_box[session_id][from_agent.agent_id].append((self.RECV_FROM, message))
+        # The session belongs to the sender, so our own session_id is left alone.
+        with self._msg_lock:
+            self.msg_box[session_id][from_agent.agent_id].append((self.RECV_FROM, message))
         self.logger.info(
             f"Agent {self.agent_id} received message from {from_agent.agent_id}: {message[:10]}..."
         )
 
+    def last_message_from(self, session_id: str, agent_id: str) -> str:
+        """Get the last message exchanged with an agent within a session.
+
+        Args:
+            session_id (str): The identifier of the session.
+            agent_id (str): The ID of the other agent.
+
+        Returns:
+            str: The content of the last message.
+        """
+        with self._msg_lock:
+            return self.msg_box[session_id][agent_id][-1][1]
+
     def seralize_message(self, session_id: str = "") -> str:
         seralized_msg = ""
 
-        # Check if session_id is provided
-        if session_id:
-            # Serialize messages for a specific session
-            session_ids = [session_id] if session_id in self.msg_box else []
-        else:
-            # Serialize messages for all sessions
-            session_ids = list(self.msg_box.keys())
+        with self._msg_lock:
+            # Check if session_id is provided
+            if session_id:
+                # Serialize messages for a specific session
+                session_ids = [session_id] if session_id in self.msg_box else []
+            else:
+                # Serialize messages for all sessions
+                session_ids = list(self.msg_box.keys())
+            # Copy the messages so that peers can keep delivering while we format
+            sessions = [
+                (sid, [(other_id, list(msgs)) for other_id, msgs in self.msg_box[sid].items()])
+                for sid in session_ids
+            ]
 
-        for sid in session_ids:
+        for sid, session_msg in sessions:
             seralized_msg += f"In Session {sid} \n"
-            session_msg = self.msg_box[sid]
 
-            for target_agent_id in session_msg:
-                msg_list = session_msg[target_agent_id]
+            for target_agent_id, msg_list in session_msg:
                 for direction, msg_content in msg_list:
                     if direction == self.FORWARD_TO:
                         seralized_msg += f"From {self.agent_id} to {target_agent_id}: "
@@ -459,33 +560,29 @@ class BaseAgent:
                 f"These are your memory: {session_current_agent.memory}\n"
                 f"The task is: {task}. \n"
                 f"Please respond to {session_other_agent_id}({session_other_agent.profile}). \n"
-                f"Your previous chat history: {session_current_agent.seralize_message(session_id=self.session_id)}.\n"
-                f"You should answer to this question {session_current_agent.msg_box[self.session_id][session_other_agent_id][-1][1]} using your memory, and other relevant context. \n"
+                f"Your previous chat history: {session_current_agent.seralize_message(session_id=session_id)}.\n"
+                f"You should answer to this question {session_current_agent.last_message_from(session_id, session_other_agent_id)} using your memory, and other relevant context. \n"
                 f"Return <end-of-session> if you cannot answer using information you have right now. \n"
                 f"You are talking to {session_other_agent_id}. You cannot talk with anyone else.\n"
                 f"From {session_current_agent_id} to {session_other_agent_id}:"
             )
             self.logger.info(f"New communication: {session_current_agent_id} to {session_other_agent_id}")
-            result = model_prompting(
-                llm_model=self.llm,
-                messages=[
-                    {"role": "system", "content": session_current_agent.system_message},
-                    {"role": "user", "content": communicate_task},
-                ],
-                return_num=1,
-                max_token_num=512,
-                temperature=0.0,
-                top_p=None,
-                stream=None,
-                tools=[communicate_to_description],
-                tool_choice="required",
-            )[0]
-            messages = [
-                {"role": "system", "content": session_current_agent.system_message},
-                {"role": "user", "content": communicate_task},
-                {"role": "system", "content": result.content},
-            ]
-            self.token_usage += token_counter(model=self.llm, messages=messages)
+            with token_scope(agent=session_current_agent_id, component="agent") as usage:
+                result = model_prompting(
+                    llm_model=self.llm,
+                    messages=[
+                        {"role": "system", "content": session_current_agent.system_message},
+                        {"role": "user", "content": communicate_task},
+                    ],
+                    return_num=1,
+                    max_token_num=512,
+                    temperature=0.0,
+                    top_p=None,
+                    stream=None,
+                    tools=[communicate_to_description],
+                    tool_choice="required",
+                )[0]
+            self.token_usage += usage.total_tokens
             if result.tool_calls:
                 function_call = result.tool_calls[0]
                 function_name = function_call.function.name
@@ -497,7 +594,7 @@ class BaseAgent:
                     session_current_agent._handle_communicate_to(
                         target_agent_id=session_other_agent_id,
                         message=message,
-                        session_id=session_current_agent.session_id,
+                        session_id=session_id,
                     )
                     if "<end-of-session>" in message:
                         break
@@ -515,28 +612,24 @@ class BaseAgent:
             "When composing the summary, maintain clarity, coherence, and logical organization. Your goal is to provide a comprehensive yet succinct overview that enables users to understand the essence of the multi-agent dialogue at a glance."
         )
         summary_task = (
-            f"These are an chat history: {session_current_agent.seralize_message(session_id=self.session_id)}\n"
+            f"These are an chat history: {session_current_agent.seralize_message(session_id=session_id)}\n"
             f"Please summarize information in the chat history relevant to the task: {task}."
         )
         self.logger.info(f"Summary communication start")
-        result = model_prompting(
-            llm_model=self.llm,
-            messages=[
-                {"role": "system", "content": system_message_summary},
-                {"role": "user", "content": summary_task},
-            ],
-            return_num=1,
-            max_token_num=512,
-            temperature=0.0,
-            top_p=None,
-            stream=None,
-        )[0]
-        messages = [
-            {"role": "system", "content": system_message_summary},
-            {"role": "user", "content": summary_task},
-            {"role": "system", "content": result.content},
-        ]
-        self.token_usage += token_counter(model=self.llm, messages=messages)
+        with token_scope(agent=self.agent_id, component="agent") as usage:
+            result = model_prompting(
+                llm_model=self.llm,
+                messages=[
+                    {"role": "system", "content": system_message_summary},
+                    {"role": "user", "content": summary_task},
+                ],
+                return_num=1,
+                max_token_num=512,
+                temperature=0.0,
+                top_p=None,
+                stream=None,
+            )[0]
+        self.token_usage += usage.total_tokens
         self.memory.update(
             self.agent_id,
             {
@@ -550,7 +643,7 @@ class BaseAgent:
             "success": True,
             "message": f"Successfully completed session {session_id}",
             "full_chat_history": session_current_agent.seralize_message(
-                session_id=self.session_id
+                session_id=session_id
             ),
             "session_id": result.content if result.content else "",
         }
@@ -569,18 +662,12 @@ class BaseAgent:
         Returns:
             Dict[str, Any]: Result of the communication attempt
         """
-        old_session_id = self.session_id
         self.logger.info(f"{self.agent_id} to {target_agent_id} communication started")
         try:
-            self.session_id = session_id
-            linked_by_graph = False
             assert (
                 self.agent_graph is not None
             ), "Agent graph is not set. Please set the agent graph using the set_agent_graph method first."
-            for a1_id, a2_id, rel in self.agent_graph.relationships:
-                if a1_id == self.agent_id or a2_id == self.agent_id:
-                    linked_by_graph = True
-                    break
+            linked_by_graph = bool(self.agent_graph.get_neighbors(self.agent_id))
 
             if not self.agent_graph or not linked_by_graph:
                 return {
@@ -596,7 +683,7 @@ class BaseAgent:
                 }
 
             # Send the message using the existing send_message method
-            self.send_message(self.session_id, target_agent, message)
+            self.send_message(session_id, target_agent, message)
 
             return {
                 "success": True,
@@ -605,9 +692,9 @@ class BaseAgent:
             }
 
         except Exception as e:
-            self.session_id = old_session_id
             return {"success": False, "error": f"Error sending message: {str(e)}"}
 
+    @traced("agent.plan_task", category="agent", attributes=lambda self, *args, **kwargs: {"agent": self.agent_id})
     def plan_task(self, feedback_package: dict[str, Any] = None) -> Optional[str]:
         """
         Plan the next task based on the original tasks input, the agent's memory, task history, and its profile/persona.
@@ -618,7 +705,7 @@ class BaseAgent:
         self.logger.info(f"Agent '{self.agent_id}' is planning the next task.")
 
         # Retrieve all memory entries for this agent
-        memory_str = self.memory.get_memory_str()
+        memory_str = self.memory.render(self.memory_token_budget)
         task_history_str = ", ".join(self.task_history)
 
         # Incorporate agent's profile/persona in decision making
@@ -630,28 +717,22 @@ class BaseAgent:
             self.logger.info(f"Agent '{self.agent_id}' is planning the next task with feedback: {prompt}")
         else:
             prompt =  f"Agent '{self.agent_id}' should prioritize tasks that align with their role: {persona}. Based on the task history: {task_history_str}, and memory: {memory_str}, what should be the next task?"
-        next_task = model_prompting(
-            llm_model=self.llm,
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            return_num=1,
-            max_token_num=512,
-            temperature=0.0,
-            top_p=None,
-            stream=None,
-        )[0].content
-        messages = [
-            {
-                "role": "user",
-                "content": prompt
-            },
-            {"role": "system", "content": next_task},
-        ]
-        self.token_usage += token_counter(model=self.llm, messages=messages)
+        with token_scope(agent=self.agent_id, component="agent") as usage:
+            next_task = model_prompting(
+                llm_model=self.llm,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                return_num=1,
+                max_token_num=512,
+                temperature=0.0,
+                top_p=None,
+                stream=None,
+            )[0].content
+        self.token_usage += usage.total_tokens
         self.logger.info(
             f"Agent '{self.agent_id}' plans next task based on persona: {next_task}"
         )
@@ -743,19 +824,16 @@ class BaseAgent:
         '  "child_agent_id": "Task description",\n'
         '  "another_child_agent_id": "Task description"\n'
         "}\n"
-        response = model_prompting(
-            llm_model=self.llm,
-            messages=[{"role": "system", "content": prompt}],
-            return_num=1,
-            max_token_num=512,
-            temperature=0.7,
-            top_p=1.0,
-        )[0]
-        messages = [
-            {"role": "system", "content": prompt},
-            {"role": "system", "content": response.content},
-        ]
-        self.token_usage += token_counter(model=self.llm, messages=messages)
+        with token_scope(agent=self.agent_id, component="agent") as usage:
+            response = model_prompting(
+                llm_model=self.llm,
+                messages=[{"role": "system", "content": prompt}],
+                return_num=1,
+                max_token_num=512,
+                temperature=0.7,
+                top_p=1.0,
+            )[0]
+        self.token_usage += usage.total_tokens
         try:
             tasks_for_children: Dict[str, Any] = json.loads(
                 response.content if response.content else "{}"
@@ -786,20 +864,17 @@ class BaseAgent:
         prompt = "Summarize the results from children agents:\n"
         for agent_id, result in children_results.items():
             prompt += f"- Agent '{agent_id}': {result}\n"
-        response = model_prompting(
-            llm_model=self.llm,
-            messages=[{"role": "system", "content": prompt}],
-            return_num=1,
-            max_token_num=512,
-            temperature=0.7,
-            top_p=1.0,
-        )[0]
+        with token_scope(agent=self.agent_id, component="agent") as usage:
+            response = model_prompting(
+                llm_model=self.llm,
+                messages=[{"role": "system", "content": prompt}],
+                return_num=1,
+                max_token_num=512,
+                temperature=0.7,
+                top_p=1.0,
+            )[0]
         summary = response.content if response.content else ""
-        messages = [
-            {"role": "system", "content": prompt},
-            {"role": "system", "content": summary},
-        ]
-        self.token_usage += token_counter(model=self.llm, messages=messages)
+        self.token_usage += usage.total_tokens
         return summary
 
     def plan_next_agent(
@@ -835,21 +910,16 @@ class BaseAgent:
         )
 
         # Use the LLM to select the next agent and create a planning task
-        response = model_prompting(
-            llm_model=self.llm,
-            messages=[{"role": "system", "content": prompt}],
-            return_num=1,
-            max_token_num=256,
-            temperature=0.7,
-            top_p=1.0,
-        )[0].content
-        self.token_usage += token_counter(
-            model=self.llm,
-            messages=[
-                {"role": "system", "content": prompt},
-                {"role": "system", "content": response},
-            ],
-        )
+        with token_scope(agent=self.agent_id, component="agent") as usage:
+            response = model_prompting(
+                llm_model=self.llm,
+                messages=[{"role": "system", "content": prompt}],
+                return_num=1,
+                max_token_num=256,
+                temperature=0.7,
+                top_p=1.0,
+            )[0].content
+        self.token_usage += usage.total_tokens
         # Parse the response to extract the agent ID and planning task
         next_agent_id: Optional[str] = None
         planning_task: Optional[str] = None
@@ -34,6 +34,13 @@ class Config:
         self.coordination_mode = data.get("coordinate_mode", "centralized")
         self.relationships = data.get("relationships", [])
         self.output = data.get("output", {})
+        self.llm_cache = data.get("llm_cache", {})
+        self.llm_rate_limits = data.get("llm_rate_limits", {})
+        self.llm_stub = data.get("llm_stub", {})
+        self.tracing = data.get("tracing", {})
+        self.http_cache = data.get("http_cache", {})
+        self.embedding_cache = data.get("embedding_cache", {})
+        self.paper_store = data.get("paper_store", {})
 
     @staticmethod
     def load(file_path: str) -> "Config":
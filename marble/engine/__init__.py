@@ -1,4 +1,17 @@
-from .engine import Engine
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .engine import Engine
+
+
+def __getattr__(name: str) -> Any:
+    # Imported on first use so submodules such as batch_runner load without the engine
+    if name == "Engine":
+        from .engine import Engine
+
+        return Engine
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "Engine",
@@ -0,0 +1,340 @@
+"""
+Batch runner that executes many task configurations from one process.
+
+Tasks come from a directory of YAML files, a glob pattern or a JSONL file and
+run concurrently on a thread or process pool. Each task gets its own log file,
+all tasks share one cap on in-flight LLM calls, and finished tasks are recorded
+in a progress file so an interrupted sweep can be resumed.
+
+Tasks on the thread pool share the process-wide services of their configs (the
+PROCESS_WIDE_SECTIONS of the engine and the LLM call cap). These are set up once
+for the batch, so the tasks must agree on them; tasks that differ need the
+process pool.
+"""
+
+import contextvars
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Set
+
+from marble.configs.config import Config
+from marble.engine.engine import PROCESS_WIDE_SECTIONS, Engine, configure_process
+from marble.llms.concurrency import configure_llm_concurrency
+from marble.llms.rate_limiter import rate_limiter_stats
+from marble.utils.logger import get_logger
+
+logger = get_logger("BatchRunner")
+
+# ID of the task whose records the current thread of execution emits
+_current_task: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "current_task", default=None
+)
+
+
+class _TaskLogFilter(logging.Filter):
+    """Keep only the records emitted while running a given task."""
+
+    def __init__(self, task_id: str):
+        super().__init__()
+        self.task_id = task_id
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return _current_task.get() == self.task_id
+
+
+def load_tasks(source: str) -> List[Dict[str, Any]]:
+    """
+    Collect the tasks of a batch.
+
+    Args:
+        source (str): A directory of YAML configs, a glob pattern matching YAML configs, or a
+            JSONL file whose lines are either {"config_path": ...} or full configurations
+            (optionally with a "task_id").
+
+    Returns:
+        List[Dict[str, Any]]: Tasks with a "task_id" and either a "config_path" or a "config".
+    """
+    if os.path.isdir(source):
+        paths = sorted(
+            glob.glob(os.path.join(source, "*.yaml"))
+            + glob.glob(os.path.join(source, "*.yml"))
+        )
+        return [{"task_id": path, "config_path": path} for path in paths]
+    if source.endswith(".jsonl") and os.path.isfile(source):
+        tasks = []
+        with open(source, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if "config_path" in entry:
+                    tasks.append(
+                        {
+                            "task_id": entry.get("task_id", entry["config_path"]),
+                            "config_path": entry["config_path"],
+                        }
+                    )
+                else:
+                    task_id = entry.pop("task_id", f"{source}:{line_number}")
+                    tasks.append({"task_id": task_id, "config": entry})
+        return tasks
+    return [{"task_id": path, "config_path": path} for path in sorted(glob.glob(source))]
+
+
+def load_progress(progress_file: str) -> Set[str]:
+    """
+    Read the IDs of the tasks that already finished successfully.
+
+    Args:
+        progress_file (str): Path of the progress file.
+
+    Returns:
+        Set[str]: IDs of the finished tasks.
+    """
+    done: Set[str] = set()
+    if not os.path.isfile(progress_file):
+        return done
+    with open(progress_file, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A partially written last line from an interrupted run
+                continue
+            if record.get("status") == "done":
+                done.add(record["task_id"])
+    return done
+
+
+def _task_file_name(task_id: str) -> str:
+    name = re.sub(r"[^A-Za-z0-9._-]+", "_", task_id).strip("_")
+    return name or "task"
+
+
+def _load_config(task: Dict[str, Any], drop_llm_concurrency: bool) -> Config:
+    if "config" in task:
+        config = Config(task["config"])
+    else:
+        config = Config.load(task["config_path"])
+    if drop_llm_concurrency:
+        config.engine_planner.pop("max_concurrent_llm_calls", None)
+    return config
+
+
+def _process_settings(config: Config) -> Dict[str, Any]:
+    settings = {section: getattr(config, section) for section in PROCESS_WIDE_SECTIONS}
+    settings["max_concurrent_llm_calls"] = config.engine_planner.get("max_concurrent_llm_calls")
+    return settings
+
+
+def _shared_process_config(
+    tasks: List[Dict[str, Any]], drop_llm_concurrency: bool
+) -> Optional[Config]:
+    """
+    Get a config carrying the process-wide settings all tasks agree on.
+
+    Tasks whose config cannot be loaded are skipped here; they fail when run.
+
+    Raises:
+        ValueError: If two tasks configure different process-wide settings.
+    """
+    shared: Optional[Config] = None
+    shared_settings: Dict[str, Any] = {}
+    shared_task_id = ""
+    for task in tasks:
+        try:
+            config = _load_config(task, drop_llm_concurrency)
+        except Exception:
+            continue
+        if shared is None:
+            shared, shared_settings, shared_task_id = config, _process_settings(config), task["task_id"]
+            continue
+        differing = [
+            key
+            for key, value in _process_settings(config).items()
+            if value != shared_settings[key]
+        ]
+        if differing:
+            raise ValueError(
+                f"Tasks {shared_task_id} and {task['task_id']} configure different process-wide "
+                f"settings ({', '.join(differing)}), which tasks on the thread pool share; "
+                f"run the batch with executor='process'."
+            )
+    return shared
+
+
+def run_task(
+    task: Dict[str, Any],
+    log_dir: str,
+    feedback_mode: bool = False,
+    drop_llm_concurrency: bool = False,
+    resume: bool = True,
+    configure_process_services: bool = True,
+) -> Dict[str, Any]:
+    """
+    Run a single task of a batch.
+
+    Args:
+        task (Dict[str, Any]): Task as returned by load_tasks.
+        log_dir (str): Directory of the per-task log files.
+        feedback_mode (bool): Whether to run the engine in feedback mode.
+        drop_llm_concurrency (bool): Ignore the per-task engine_planner.max_concurrent_llm_calls
+            because the batch enforces a global cap.
+        resume (bool): Continue from the task's checkpoint if an earlier run left one.
+        configure_process_services (bool): Let the engine install the process-wide
+            services of the task's config; off when the batch installed them already.
+
+    Returns:
+        Dict[str, Any]: Progress record with the task ID, status, duration, log file and error.
+    """
+    task_id = task["task_id"]
+    log_file = os.path.join(log_dir, f"{_task_file_name(task_id)}.log")
+    handler = logging.FileHandler(log_file, encoding="utf-8")
+    handler.setLevel(logging.INFO)
+    handler.setFormatter(
+        logging.Formatter("[%(asctime)s] [%(levelname)s] [%(name)s]: %(message)s")
+    )
+    handler.addFilter(_TaskLogFilter(task_id))
+    root_logger = logging.getLogger()
+    root_logger.addHandler(handler)
+    token = _current_task.set(task_id)
+    start = time.time()
+    record: Dict[str, Any] = {"task_id": task_id, "log_file": log_file}
+    try:
+        config = _load_config(task, drop_llm_concurrency)
+        if not config.output.get("checkpoint_path"):
+            config.output = {
+                **config.output,
+                "checkpoint_path": os.path.join(log_dir, f"{_task_file_name(task_id)}.ckpt"),
+            }
+        engine = Engine(
+            config,
+            feedback_mode,
+            resume=resume,
+            configure_process_services=configure_process_services,
+        )
+        engine.start()
+        record["status"] = "done"
+    except Exception as e:
+        logging.getLogger().exception(f"Task {task_id} failed")
+        record["status"] = "failed"
+        record["error"] = str(e)
+    finally:
+        _current_task.reset(token)
+        root_logger.removeHandler(handler)
+        handler.close()
+    record["duration"] = round(time.time() - start, 3)
+    return record
+
+
+def _init_process_worker(
+    max_concurrent_llm_calls: Optional[int], semaphore: Optional[Any]
+) -> None:
+    logging.basicConfig(level=logging.INFO)
+    configure_llm_concurrency(max_concurrent_llm_calls, semaphore=semaphore)
+
+
+def run_batch(
+    source: str,
+    workers: int = 4,
+    executor: str = "thread",
+    log_dir: str = "logs/batch",
+    progress_file: Optional[str] = None,
+    max_concurrent_llm_calls: Optional[int] = None,
+    feedback_mode: bool = False,
+    resume: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Run a batch of tasks concurrently.
+
+    Args:
+        source (str): Task source, see load_tasks.
+        workers (int): Number of tasks run at the same time.
+        executor (str): "thread" to run tasks on threads of this process, "process" to run
+            them on a process pool (isolates global state such as the working directory).
+            Thread pool tasks must configure the same process-wide services.
+        log_dir (str): Directory of the per-task log files.
+        progress_file (Optional[str]): Progress file; defaults to progress.jsonl in log_dir.
+        max_concurrent_llm_calls (Optional[int]): Cap on LLM calls in flight across all tasks.
+        feedback_mode (bool): Whether to run the engines in feedback mode.
+        resume (bool): Skip the tasks the progress file records as done and continue
+            interrupted tasks from their checkpoints.
+
+    Returns:
+        List[Dict[str, Any]]: Progress records of the tasks run by this call.
+
+    Raises:
+        ValueError: If the executor is unknown, or if tasks on the thread pool configure
+            different process-wide services.
+    """
+    if executor not in ("thread", "process"):
+        raise ValueError(f"Unsupported executor: {executor}")
+    os.makedirs(log_dir, exist_ok=True)
+    progress_file = progress_file or os.path.join(log_dir, "progress.jsonl")
+    tasks = load_tasks(source)
+    done = load_progress(progress_file) if resume else set()
+    pending = [task for task in tasks if task["task_id"] not in done]
+    logger.info(
+        f"Batch of {len(tasks)} tasks from {source}: {len(tasks) - len(pending)} already done, "
+        f"running {len(pending)} with {workers} {executor} workers."
+    )
+    drop_llm_concurrency = max_concurrent_llm_calls is not None
+    # Process workers run one task at a time, so each engine sets up its own services
+    configure_process_services = executor == "process"
+    pool: Executor
+    if executor == "process":
+        semaphore = (
+            multiprocessing.get_context().BoundedSemaphore(max_concurrent_llm_calls)
+            if max_concurrent_llm_calls
+            else None
+        )
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_process_worker,
+            initargs=(max_concurrent_llm_calls, semaphore),
+        )
+    else:
+        shared_config = _shared_process_config(pending, drop_llm_concurrency)
+        configure_llm_concurrency(max_concurrent_llm_calls)
+        if shared_config is not None:
+            configure_process(shared_config)
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="task")
+
+    records: List[Dict[str, Any]] = []
+    with pool:
+        futures = {
+            pool.submit(
+                run_task,
+                task,
+                log_dir,
+                feedback_mode,
+                drop_llm_concurrency,
+                resume,
+                configure_process_services,
+            ): task
+            for task in pending
+        }
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                # The worker itself died, e.g. a crashed process
+                record = {"task_id": task["task_id"], "status": "failed", "error": str(e)}
+            records.append(record)
+            with open(progress_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            logger.info(
+                f"[{len(records)}/{len(pending)}] Task {record['task_id']} {record['status']}"
+            )
+    failed = sum(1 for record in records if record["status"] != "done")
+    logger.info(f"Batch finished: {len(records) - failed} done, {failed} failed.")
+    if executor == "thread" and rate_limiter_stats():
+        logger.info(f"LLM rate limiter stats: {rate_limiter_stats()}")
+    return records
@@ -0,0 +1,52 @@
+"""
+Iteration-level checkpoints of an engine run.
+"""
+
+import os
+import pickle
+from typing import Any, Dict, Optional
+
+CHECKPOINT_VERSION = 1
+
+
+def save_checkpoint(file_path: str, state: Dict[str, Any]) -> None:
+    """
+    Atomically write a checkpoint, so a crash mid-write keeps the previous one intact.
+
+    Args:
+        file_path (str): Path of the checkpoint file.
+        state (Dict[str, Any]): Picklable engine state.
+    """
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump({"version": CHECKPOINT_VERSION, **state}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, file_path)
+
+
+def load_checkpoint(file_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Read a checkpoint.
+
+    Args:
+        file_path (str): Path of the checkpoint file.
+
+    Returns:
+        Optional[Dict[str, Any]]: The saved engine state, or None if there is no checkpoint.
+
+    Raises:
+        ValueError: If the checkpoint was written by an incompatible version.
+    """
+    if not os.path.isfile(file_path):
+        return None
+    with open(file_path, "rb") as f:
+        state: Dict[str, Any] = pickle.load(f)
+    if state.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(
+            f"Unsupported checkpoint version {state.get('version')} in {file_path}."
+        )
+    return state
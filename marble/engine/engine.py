@@ -3,41 +3,105 @@
 """
 The core engine module that coordinates agents within the environment.
 """
+import contextvars
 import copy
 import json
-from typing import Any, Dict, List, Optional, Union
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Union
 
 from marble.agent import BaseAgent
 from marble.configs.config import Config
+from marble.engine.checkpoint import load_checkpoint, save_checkpoint
 from marble.engine.engine_planner import EnginePlanner
 from marble.environments import (
+    ENVIRONMENT_TYPES,
     BaseEnvironment,
-    CodingEnvironment,
-    DBEnvironment,
-    MinecraftEnvironment,
-    ResearchEnvironment,
-    WebEnvironment,
-    WorldSimulationEnvironment,
-    TrainingEnvironment,
+    get_environment_class,
+    is_environment,
 )
+from marble.environments.research_utils.paper_store import configure_paper_store
+from marble.evaluator.evaluation_pipeline import EvaluationPipeline
 from marble.evaluator.evaluator import Evaluator
 from marble.feedback.feedback_provider import FeedbackProvider
 from marble.graph.agent_graph import AgentGraph
+from marble.llms.concurrency import configure_llm_concurrency
+from marble.llms.rate_limiter import configure_rate_limits, rate_limiter_stats
+from marble.llms.response_cache import configure_response_cache, get_response_cache
+from marble.llms.stub_backend import configure_stub_backend
+from marble.llms.text_embedding import configure_embedding_cache
+from marble.llms.token_ledger import TokenLedger, set_token_labels, token_scope
 from marble.memory.base_memory import BaseMemory
 from marble.memory.shared_memory import SharedMemory
+from marble.memory.short_term_memory import ShortTermMemory
+from marble.utils.http_client import configure_http_client
 from marble.utils.logger import get_logger
+from marble.utils.tracing import configure_tracing, get_tracer, span, traced
+
+if TYPE_CHECKING:
+    from marble.environments import (
+        CodingEnvironment,
+        DBEnvironment,
+        MinecraftEnvironment,
+        ResearchEnvironment,
+        WebEnvironment,
+        WorldSimulationEnvironment,
+    )
 
 EnvType = Union[
     BaseEnvironment,
-    WebEnvironment,
-    ResearchEnvironment,
-    WorldSimulationEnvironment,
-    MinecraftEnvironment,
-    DBEnvironment,
-    CodingEnvironment,
+    "WebEnvironment",
+    "ResearchEnvironment",
+    "WorldSimulationEnvironment",
+    "MinecraftEnvironment",
+    "DBEnvironment",
+    "CodingEnvironment",
 ]
 AgentType = Union[BaseAgent]
 
+# Config sections that set up process-wide services rather than a single run
+PROCESS_WIDE_SECTIONS = (
+    "llm_cache",
+    "llm_rate_limits",
+    "llm_stub",
+    "tracing",
+    "http_cache",
+    "embedding_cache",
+    "paper_store",
+)
+
+
+def configure_process(config: Config) -> None:
+    """
+    Install the process-wide services a configuration asks for.
+
+    These are singletons shared by every engine of the process, so engines
+    running side by side on threads must agree on them.
+
+    Args:
+        config (Config): Configuration with the PROCESS_WIDE_SECTIONS and
+            engine_planner.max_concurrent_llm_calls.
+    """
+    if config.llm_cache:
+        configure_response_cache(**config.llm_cache)
+    if config.llm_rate_limits:
+        configure_rate_limits(**config.llm_rate_limits)
+    if config.llm_stub:
+        configure_stub_backend(**config.llm_stub)
+    if config.tracing:
+        configure_tracing(**config.tracing)
+    if config.http_cache:
+        configure_http_client(**config.http_cache)
+    if config.embedding_cache:
+        configure_embedding_cache(**config.embedding_cache)
+    if config.paper_store:
+        configure_paper_store(**config.paper_store)
+    # Global cap on in-flight LLM calls shared by all concurrently running agents
+    max_concurrent_llm_calls = config.engine_planner.get("max_concurrent_llm_calls")
+    if max_concurrent_llm_calls is not None:
+        configure_llm_concurrency(int(max_concurrent_llm_calls))
+
 
 class Engine:
     """
@@ -61,15 +125,28 @@ class Engine:
             self.logger.error(f"Failed to read code from {file_path}: {e}")
             return ""
 
-    def __init__(self, config: Config, is_feedback: bool = True):
+    def __init__(
+        self,
+        config: Config,
+        is_feedback: bool = True,
+        resume: bool = False,
+        configure_process_services: bool = True,
+    ):
         """
         Initialize the Engine with the given configuration.
 
         Args:
             config (Config): Configuration parameters.
+            is_feedback (bool): Whether agents receive feedback between iterations.
+            resume (bool): Continue from the checkpoint at output.checkpoint_path, if any.
+            configure_process_services (bool): Install the process-wide services of the
+                config, see configure_process. Callers that run several engines on
+                threads of one process configure them once instead.
         """
         self.logger = get_logger(self.__class__.__name__)
         self.config = config
+        if configure_process_services:
+            configure_process(config)
         self.planning_method = config.engine_planner.get("planning_method", "naive")
         # Initialize Environment
         self.environment = self._initialize_environment(config.environment)
@@ -83,6 +160,10 @@ class Engine:
         self.memory = self._initialize_memory(config.memory)
         # Initialize Evaluator
         self.evaluator = Evaluator(metrics_config=config.metrics)
+        # Per-iteration judgments run in the background, off the critical path
+        self.evaluation_pipeline = EvaluationPipeline(
+            num_workers=int(config.metrics.get("evaluation_workers", 3))
+        )
         self.task = config.task.get("content", "")
         self.output_format = config.task.get(
             "output_format",
@@ -105,7 +186,16 @@ class Engine:
             is_feedback=is_feedback
         )
         self.max_iterations = config.environment.get("max_iterations", 10)
+        # Number of agents whose plan+act steps may run at the same time
+        self.max_parallel_agents = max(
+            1, int(config.engine_planner.get("max_parallel_agents", 1))
+        )
         self.current_iteration = 0
+        # Provider-reported token usage of this run, per agent, component and iteration
+        self.token_ledger = TokenLedger()
+        # A checkpoint is written after every iteration when a path is configured
+        self.checkpoint_path: Optional[str] = config.output.get("checkpoint_path")
+        self.resume = resume
 
         self.logger.info("Engine initialized.")
 
@@ -123,35 +213,10 @@ class Engine:
             ValueError: If the environment type is not supported.
         """
         env_type = env_config.get("type")
-
-        if env_type == "Web":
-            env1 = WebEnvironment(name="Web Environment", config=env_config)
-            return env1
-        elif env_type == "Base":
-            env2 = BaseEnvironment(name="Base Environment", config=env_config)
-            return env2
-        elif env_type == "Research":
-            env3 = ResearchEnvironment(name="Research Environment", config=env_config)
-            return env3
-        elif env_type == "Coding":
-            env4 = CodingEnvironment(name="Coding Environment", config=env_config)
-            return env4
-        elif env_type == "WorldSimulation":
-            env4 = WorldSimulationEnvironment(
-                name="World Simulation Environment", config=env_config
-            )
-            return env4
-        elif env_type == "Minecraft":
-            env5 = MinecraftEnvironment(name="Minecraft Environment", config=env_config)
-            return env5
-        elif env_type == "DB":
-            env6 = DBEnvironment(name="DB Environment", config=env_config)
-            return env6
-        elif env_type == "Training":
-            env7 = TrainingEnvironment(name="Training Environment", config=env_config)
-            return env7
-        else:
-            raise ValueError(f"Unsupported environment type: {env_type}")
+        # Only the configured environment (and its dependencies) is imported
+        env_class = get_environment_class(env_type)
+        _, env_name = ENVIRONMENT_TYPES[env_type]
+        return env_class(name=env_name, config=env_config)
 
     def _initialize_agents(
         self, agent_configs: List[Dict[str, Any]], is_feedback: bool = True
@@ -179,7 +244,7 @@ class Engine:
             self.logger.debug(
                 f"Agent '{agent.agent_id}' of type '{agent_type}' using LLM '{agent_llm}' initialized."
             )
-            if isinstance(self.environment, MinecraftEnvironment):
+            if is_environment(self.environment, "MinecraftEnvironment"):
                 assert "agent_id" in agent_config and "agent_port" in agent_config
                 self.environment.register_agent(
                     agent_config.get("agent_id"), agent_config.get("agent_port")
@@ -205,11 +270,18 @@ class Engine:
         memory: Union[BaseMemory, SharedMemory, None] = None
         if memory_type == "SharedMemory":
             memory = SharedMemory()
+        elif memory_type == "ShortTermMemory":
+            memory = ShortTermMemory(
+                memory_limit=memory_config.get("memory_limit", 10),
+                summarizer_model=memory_config.get("summarizer_model", "gpt-3.5-turbo"),
+                summarize_batch_size=memory_config.get("summarize_batch_size", 2),
+            )
         else:
             memory = BaseMemory()
         self.logger.debug(f"Memory of type '{memory_type}' initialized.")
         return memory
 
+    @traced("engine.graph_coordinate", category="engine")
     def graph_coordinate(self) -> None:
         """
         Graph-based coordination mode.
@@ -220,44 +292,69 @@ class Engine:
             "iterations": [],
         }
         try:
-            # Initial assignment: Distribute the overall task to each agent
-            self.logger.info("Initial task distribution to all agents.")
-            initial_tasks = {
-                agent.agent_id: self.task for agent in self.graph.get_all_agents()
-            }
-            agents_results = []
-            # Initialize iteration_data for the initial assignment to match iterative structure
-            iteration_data = {
-                "iteration": self.current_iteration + 1,
-                "task_assignments": {},
-                "task_results": [],
-                "summary": "",
-                "continue_simulation": True,
-                "communications": [],
-                "total_milestones": 0,
-                "agent_kpis": {},
-            }
-            self.logger.info(f"Starting iteration {self.current_iteration + 1}")
-            communications = []
-            for agent_id, task in initial_tasks.items():
-                try:
-                    agent = self.graph.get_agent(agent_id)
-                    self.logger.info(f"Assigning initial task to {agent_id}")
-                    # Assign the task to the agent
+            state = self._load_checkpoint()
+            if state is not None:
+                summary_data = state["summary_data"]
+                continue_simulation = state["continue_simulation"]
+                feedback_package = state["feedback_package"]
+                iteration_data = summary_data["iterations"][-1]
+            else:
+                # Initial assignment: Distribute the overall task to each agent
+                self.logger.info("Initial task distribution to all agents.")
+                initial_tasks = {
+                    agent.agent_id: self.task for agent in self.graph.get_all_agents()
+                }
+                agents_results = []
+                # Initialize iteration_data for the initial assignment to match iterative structure
+                iteration_data = {
+                    "iteration": self.current_iteration + 1,
+                    "task_assignments": {},
+                    "task_results": [],
+                    "summary": "",
+                    "continue_simulation": True,
+                    "communications": [],
+                    "total_milestones": 0,
+                    "agent_kpis": {},
+                }
+                self.logger.info(f"Starting iteration {self.current_iteration + 1}")
+                set_token_labels(iteration=iteration_data["iteration"])
+                communications = []
+
+                def run_initial_task(agent: BaseAgent, outcome: Dict[str, Any]) -> None:
+                    task = initial_tasks[agent.agent_id]
+                    self.logger.info(f"Assigning initial task to {agent.agent_id}")
+                    outcome["task"] = task
+                    # !!! Agent start to do task !!!
+                    self.logger.info(f"agent {agent.agent_id} start act task")
+                    outcome["result"], outcome["communication"] = agent.act(task)
+                    self.logger.debug(
+                        f"Agent '{agent.agent_id}' completed initial task with result: {outcome['result']}"
+                    )
+
+                initial_agents = []
+                for agent_id in initial_tasks:
+                    try:
+                        initial_agents.append(self.graph.get_agent(agent_id))
+                    except KeyError:
+                        self.logger.error(f"Agent '{agent_id}' not found in the graph.")
+                outcomes = self._run_agent_steps(
+                    initial_agents, run_initial_task, "while executing initial task"
+                )
+                for agent, outcome in zip(initial_agents, outcomes):
+                    agent_id = agent.agent_id
                     iteration_data_task_assignments = iteration_data.get(
                         "task_assignments"
                     )
                     assert isinstance(iteration_data_task_assignments, dict)
-                    iteration_data_task_assignments[agent_id] = task
-                    # !!! Agent start to do task !!!
-                    self.logger.info(f"agent {agent_id} start act task")
-                    result, communication = agent.act(task)
-                    self.logger.info(f"Processing result for agent '{agent.agent_id}'")
+                    if "task" in outcome:
+                        iteration_data_task_assignments[agent_id] = outcome["task"]
+                    if "result" not in outcome:
+                        continue
+                    result, communication = outcome["result"], outcome["communication"]
+                    self.logger.info(f"Processing result for agent '{agent_id}'")
                     self.logger.info(f"Communication received: {communication}")
                     if communication:
-                        self.logger.info(
-                            f"Adding communication to list: {communication}"
-                        )
+                        self.logger.info(f"Adding communication to list: {communication}")
                         communications.append(communication)
                     agents_results.append({agent_id: result})
                     # Record the result
@@ -265,80 +362,89 @@ class Engine:
                     iteration_data_task_results = iteration_data.get("task_results")
                     assert isinstance(iteration_data_task_results, list)
                     iteration_data_task_results.append(task_result)
-                    self.logger.debug(
-                        f"Agent '{agent_id}' completed initial task with result: {result}"
-                    )
-                except KeyError:
-                    self.logger.error(f"Agent '{agent_id}' not found in the graph.")
-                except Exception as e:
-                    self.logger.error(
-                        f"Error while executing initial task for agent '{agent_id}': {e}"
-                    )
-            # Record communications
-            iteration_data["communications"] = communications
-            # Summarize outputs and update planner for the initial assignment
-            summary = self._summarize_results(agents_results)
-            self.logger.info(f"Iteration {self.current_iteration + 1} Summary:\n{summary}")
-            summary_from_planner = self.planner.summarize_output(
-                summary, self.task, self.output_format
-            )
-            iteration_data["summary"] = summary_from_planner.content
-            self.planner.update_progress(summary_from_planner.content)
-
-            # Evaluate communication
-            if iteration_data["communications"]:
-                iteration_data_communications = iteration_data.get("communications")
-                assert isinstance(iteration_data_communications, list)
-                communications_str = self._format_communications(iteration_data_communications)
-                self.evaluator.evaluate_communication(self.task, communications_str)
-                # self.evaluator.metrics["communication_score"].append(-1)
-            else:
-                self.logger.info("No communications to evaluate")
-                # Store -1 if communications are empty
-                self.evaluator.metrics["communication_score"].append(-1)
-
-            # Evaluate planning
-            agent_profiles = self._get_agent_profiles()
-            iteration_data_task_assignments = iteration_data.get("task_assignments")
-            assert isinstance(iteration_data_task_assignments, dict)
-            agent_tasks_str = self._format_agent_tasks(iteration_data_task_assignments)
-            iteration_data_task_results = iteration_data.get("task_results")
-            assert isinstance(iteration_data_task_results, list)
-            results_str = self._format_results(iteration_data_task_results)
-            iteration_data_summary = iteration_data.get("summary")
-            assert isinstance(iteration_data_summary, str)
-            self.evaluator.evaluate_planning(iteration_data_summary, agent_profiles, agent_tasks_str, results_str)
-
-            # Evaluate KPIS
-            self.evaluator.evaluate_kpi(self.task, results_str)
-            # self.evaluator.metrics["planning_score"].append(-1)
-            iteration_data["total_milestones"] = self.evaluator.metrics["total_milestones"]
-            iteration_data["agent_kpis"] = copy.deepcopy(self.evaluator.metrics["agent_kpis"])
-            # Decide whether to continue or terminate after initial assignment
-            if isinstance(self.environment, MinecraftEnvironment):
-                try:
-                    with open("../data/score.json", "r",  encoding="utf-8") as f:
-                        block_hit_rate = json.load(f)[-1]["block_hit_rate"]
-                except:
-                    block_hit_rate = 0.0
-                self.logger.info(
-                    f"Using a rule-based EnginePlanner. block_hit_rate is {block_hit_rate}"
+                # Record communications
+                iteration_data["communications"] = communications
+                # Summarize outputs and update planner for the initial assignment
+                summary = self._summarize_results(agents_results)
+                self.logger.info(f"Iteration {self.current_iteration + 1} Summary:\n{summary}")
+                summary_from_planner = self.planner.summarize_output(
+                    summary, self.task, self.output_format
                 )
-                continue_simulation = int(block_hit_rate) != 1
-            else:
-                continue_simulation = self.planner.decide_next_step(agents_results)
-            iteration_data["continue_simulation"] = continue_simulation
-            # Record iteration data
-            summary_data["iterations"].append(iteration_data)
-            self.logger.info(f"iteration {self.current_iteration + 1} Evaluator results: {self.evaluator.metrics}")
-            # decide the next step
-            if not continue_simulation:
-                self.logger.info(
-                    "EnginePlanner decided to terminate the simulation after initial assignment."
+                iteration_data["summary"] = summary_from_planner.content
+                self.planner.update_progress(summary_from_planner.content)
+
+                # Evaluate communication
+                if iteration_data["communications"]:
+                    iteration_data_communications = iteration_data.get("communications")
+                    assert isinstance(iteration_data_communications, list)
+                    communications_str = self._format_communications(iteration_data_communications)
+                    self.evaluation_pipeline.submit(
+                        self.evaluator.evaluate_communication, self.task, communications_str
+                    )
+                    # self.evaluator.metrics["communication_score"].append(-1)
+                else:
+                    self.logger.info("No communications to evaluate")
+                    # Store -1 if communications are empty
+                    self.evaluator.metrics["communication_score"].append(-1)
+
+                # Evaluate planning
+                agent_profiles = self._get_agent_profiles()
+                iteration_data_task_assignments = iteration_data.get("task_assignments")
+                assert isinstance(iteration_data_task_assignments, dict)
+                agent_tasks_str = self._format_agent_tasks(iteration_data_task_assignments)
+                iteration_data_task_results = iteration_data.get("task_results")
+                assert isinstance(iteration_data_task_results, list)
+                results_str = self._format_results(iteration_data_task_results)
+                iteration_data_summary = iteration_data.get("summary")
+                assert isinstance(iteration_data_summary, str)
+                self.evaluation_pipeline.submit(
+                    self.evaluator.evaluate_planning,
+                    iteration_data_summary,
+                    agent_profiles,
+                    agent_tasks_str,
+                    results_str,
                 )
-            else:
-                self.current_iteration += 1
-                feedback_package: Dict[str, Any] = self.feedback_provider.get_full_feedback_package(iteration_data)
+
+                # Evaluate KPIS
+                self.evaluation_pipeline.submit(self.evaluator.evaluate_kpi, self.task, results_str)
+                # self.evaluator.metrics["planning_score"].append(-1)
+                # Decide whether to continue or terminate after initial assignment
+                if is_environment(self.environment, "MinecraftEnvironment"):
+                    try:
+                        with open("../data/score.json", "r",  encoding="utf-8") as f:
+                            block_hit_rate = json.load(f)[-1]["block_hit_rate"]
+                    except:
+                        block_hit_rate = 0.0
+                    self.logger.info(
+                        f"Using a rule-based EnginePlanner. block_hit_rate is {block_hit_rate}"
+                    )
+                    continue_simulation = int(block_hit_rate) != 1
+                else:
+                    continue_simulation = self.planner.decide_next_step(agents_results)
+                iteration_data["continue_simulation"] = continue_simulation
+                # The feedback package and the iteration record read the evaluator metrics
+                self.evaluation_pipeline.join()
+                iteration_data["total_milestones"] = self.evaluator.metrics["total_milestones"]
+                iteration_data["agent_kpis"] = copy.deepcopy(self.evaluator.metrics["agent_kpis"])
+                # Record iteration data
+                summary_data["iterations"].append(iteration_data)
+                self.logger.info(f"iteration {self.current_iteration + 1} Evaluator results: {self.evaluator.metrics}")
+                # decide the next step
+                if not continue_simulation:
+                    self.logger.info(
+                        "EnginePlanner decided to terminate the simulation after initial assignment."
+                    )
+                    self._save_checkpoint(
+                        summary_data, continue_simulation=continue_simulation, feedback_package=None
+                    )
+                else:
+                    self.current_iteration += 1
+                    feedback_package: Dict[str, Any] = self.feedback_provider.get_full_feedback_package(iteration_data)
+                    self._save_checkpoint(
+                        summary_data,
+                        continue_simulation=continue_simulation,
+                        feedback_package=feedback_package,
+                    )
 
             # !!! Iterate start !!!
             while self.current_iteration < self.max_iterations and continue_simulation:
@@ -353,47 +459,52 @@ class Engine:
                     "agent_kpis": {},
                 }
                 self.logger.info(f"Starting iteration {self.current_iteration + 1}")
+                set_token_labels(iteration=iteration_data["iteration"])
 
                 current_agents = self.graph.get_all_agents()
                 current_tasks = {}
                 agents_results = []
                 communications = []
 
-                for agent in current_agents:
-                    try:
-                        self.logger.info(f"Assigning initial task to {agent.agent_id}")
-                        # !!! Each agent plans its own task !!!
-                        self.logger.info(f"agent { agent.agent_id} start plan task")
-                        task = agent.plan_task(feedback_package)
-                        current_tasks[agent.agent_id] = task
+                def run_planned_task(agent: BaseAgent, outcome: Dict[str, Any]) -> None:
+                    self.logger.info(f"Assigning initial task to {agent.agent_id}")
+                    # !!! Each agent plans its own task !!!
+                    self.logger.info(f"agent { agent.agent_id} start plan task")
+                    outcome["task"] = agent.plan_task(feedback_package)
+                    # !!! Agent acts on the planned task !!!
+                    self.logger.info(f"agent {agent.agent_id} start act task")
+                    outcome["result"], outcome["communication"] = agent.act(
+                        outcome["task"], feedback_package
+                    )
+                    self.logger.debug(
+                        f"Agent '{agent.agent_id}' executed task with result: {outcome['result']}"
+                    )
+
+                outcomes = self._run_agent_steps(
+                    current_agents, run_planned_task, "during planning or action"
+                )
+                for agent, outcome in zip(current_agents, outcomes):
+                    if "task" in outcome:
+                        current_tasks[agent.agent_id] = outcome["task"]
                         iteration_data_task_assignments = iteration_data.get(
                             "task_assignments"
                         )
                         assert isinstance(iteration_data_task_assignments, dict)
-                        iteration_data_task_assignments[agent.agent_id] = task
-                        # !!! Agent acts on the planned task !!!
-                        self.logger.info(f"agent {agent.agent_id} start act task")
-                        result, communication = agent.act(task, feedback_package)
+                        iteration_data_task_assignments[agent.agent_id] = outcome["task"]
+                    if "result" not in outcome:
+                        continue
+                    result, communication = outcome["result"], outcome["communication"]
+                    self.logger.info(f"Processing result for agent '{agent.agent_id}'")
+                    self.logger.info(f"Communication received: {communication}")
+                    if communication:
                         self.logger.info(
-                            f"Processing result for agent '{agent.agent_id}'"
-                        )
-                        self.logger.info(f"Communication received: {communication}")
-                        if communication:
-                            self.logger.info(
-                                f"Adding communication to list: {communication}"
-                            )
-                            communications.append(communication)
-                        agents_results.append({agent.agent_id: result})
-                        iteration_data_task_results = iteration_data.get("task_results")
-                        assert isinstance(iteration_data_task_results, list)
-                        iteration_data_task_results.append({agent.agent_id: result})
-                        self.logger.debug(
-                            f"Agent '{agent.agent_id}' executed task with result: {result}"
-                        )
-                    except Exception as e:
-                        self.logger.error(
-                            f"Error in agent '{agent.agent_id}' during planning or action: {e}"
+                            f"Adding communication to list: {communication}"
                         )
+                        communications.append(communication)
+                    agents_results.append({agent.agent_id: result})
+                    iteration_data_task_results = iteration_data.get("task_results")
+                    assert isinstance(iteration_data_task_results, list)
+                    iteration_data_task_results.append({agent.agent_id: result})
                 # Record communications
                 iteration_data["communications"] = communications
                 # Summarize outputs and update planner
@@ -410,7 +521,9 @@ class Engine:
                     iteration_data_communications = iteration_data.get("communications")
                     assert isinstance(iteration_data_communications, list)
                     communications_str = self._format_communications(iteration_data_communications)
-                    self.evaluator.evaluate_communication(self.task, communications_str)
+                    self.evaluation_pipeline.submit(
+                        self.evaluator.evaluate_communication, self.task, communications_str
+                    )
                     # self.evaluator.metrics["communication_score"].append(-1)
                 else:
                     self.logger.info("No communications to evaluate")
@@ -427,16 +540,20 @@ class Engine:
                 results_str = self._format_results(iteration_data_task_results)
                 iteration_data_summary = iteration_data.get("summary")
                 assert isinstance(iteration_data_summary, str)
-                self.evaluator.evaluate_planning(iteration_data_summary, agent_profiles, agent_tasks_str, results_str)
+                self.evaluation_pipeline.submit(
+                    self.evaluator.evaluate_planning,
+                    iteration_data_summary,
+                    agent_profiles,
+                    agent_tasks_str,
+                    results_str,
+                )
 
                 # Evaluate KPI
-                self.evaluator.evaluate_kpi(self.task, results_str)
+                self.evaluation_pipeline.submit(self.evaluator.evaluate_kpi, self.task, results_str)
                 # self.evaluator.metrics["planning_score"].append(-1)
-                iteration_data["total_milestones"] = self.evaluator.metrics["total_milestones"]
-                iteration_data["agent_kpis"] = copy.deepcopy(self.evaluator.metrics["agent_kpis"])
 
                 # Decide whether to continue or terminate
-                if isinstance(self.environment, MinecraftEnvironment):
+                if is_environment(self.environment, "MinecraftEnvironment"):
                     try:
                         with open("../data/score.json", "r",  encoding="utf-8") as f:
                             block_hit_rate = json.load(f)[-1]["block_hit_rate"]
@@ -449,6 +566,10 @@ class Engine:
                 else:
                     continue_simulation = self.planner.decide_next_step(agents_results)
                 iteration_data["continue_simulation"] = continue_simulation
+                # The feedback package and the iteration record read the evaluator metrics
+                self.evaluation_pipeline.join()
+                iteration_data["total_milestones"] = self.evaluator.metrics["total_milestones"]
+                iteration_data["agent_kpis"] = copy.deepcopy(self.evaluator.metrics["agent_kpis"])
                 # Record iteration data
                 summary_data["iterations"].append(iteration_data)
                 self.logger.info(f"iteration {self.current_iteration + 1} Evaluator results: {self.evaluator.metrics}")
@@ -456,11 +577,19 @@ class Engine:
                     self.logger.info(
                         "EnginePlanner decided to terminate the simulation."
                     )
+                    self._save_checkpoint(
+                        summary_data, continue_simulation=continue_simulation, feedback_package=None
+                    )
                     break
                 else:
                     self.current_iteration += 1
                     # 根据评估结果进行反馈
                     feedback_package: Dict[str, Any] = self.feedback_provider.get_full_feedback_package(iteration_data)
+                    self._save_checkpoint(
+                        summary_data,
+                        continue_simulation=continue_simulation,
+                        feedback_package=feedback_package,
+                    )
                     # # Check if task is completed within the environment
                     # if self.environment.is_task_completed():
                     #     self.logger.info("Task has been completed successfully.")
@@ -470,10 +599,11 @@ class Engine:
             summary_data["planning_scores"] = self.evaluator.metrics["planning_score"]
             summary_data["communication_scores"] = self.evaluator.metrics["communication_score"]
             summary_data["token_usage"] = self._get_totoal_token_usage()
+            summary_data["token_ledger"] = self.token_ledger.summary()
             summary_data["agent_kpis"] = self.evaluator.metrics["agent_kpis"]
             summary_data["total_milestones"] = self.evaluator.metrics["total_milestones"]
             # if self.environment.name == 'Research Environment':
-            if isinstance(self.environment, ResearchEnvironment):
+            if is_environment(self.environment, "ResearchEnvironment"):
                 iteration_data_summary = iteration_data.get("summary")
                 assert isinstance(iteration_data_summary, str)
                 self.evaluator.evaluate_task_research(self.task, iteration_data_summary)
@@ -485,7 +615,7 @@ class Engine:
                 summary_data["task_evaluation"] = self.evaluator.metrics[
                     "task_evaluation"
                 ]
-            elif isinstance(self.environment, MinecraftEnvironment):
+            elif is_environment(self.environment, "MinecraftEnvironment"):
                 try:
                     with open("../data/score.json", "r",  encoding="utf-8") as f:
                         block_hit_rate = json.load(f)[-1]["block_hit_rate"]
@@ -513,23 +643,26 @@ class Engine:
                 self.logger.info(
                     f"Code quality evaluation results: {self.evaluator.metrics['code_quality']}"
                 )
-            elif isinstance(self.environment, TrainingEnvironment):
+            elif is_environment(self.environment, "TrainingEnvironment"):
                 iteration_data_summary = iteration_data.get("summary")
                 assert isinstance(iteration_data_summary, str)
                 self.evaluator.evaluate_task_training(self.task, iteration_data_summary)
                 summary_data["task_evaluation"] = self.evaluator.metrics[
                     "task_evaluation"
                 ]
+            self._clear_checkpoint()
             self.logger.info("Engine graph-based coordination loop completed.")
 
         except Exception:
             self.logger.exception("An error occurred during graph-based coordination.")
             raise
         finally:
+            self._drain_evaluations()
             self.evaluator.finalize()
             self.logger.info("Graph-based coordination simulation completed.")
             self._write_to_jsonl(summary_data)
 
+    @traced("engine.star_coordinate", category="engine")
     def star_coordinate(self) -> None:
         """
         Centralized coordination mode.
@@ -542,8 +675,17 @@ class Engine:
                 "final_output": "",
             }
             agents_results: List[Dict[str, Any]] = []
-            while self.current_iteration < self.max_iterations:
-                iteration_data: Dict[str, Any] = {
+            continue_simulation = True
+            state = self._load_checkpoint()
+            if state is not None:
+                summary_data = state["summary_data"]
+                agents_results = state["agents_results"]
+                continue_simulation = state["continue_simulation"]
+                if summary_data["iterations"]:
+                    # The task evaluation reads the last iteration even if none is left to run
+                    iteration_data = summary_data["iterations"][-1]
+            while continue_simulation and self.current_iteration < self.max_iterations:
+                iteration_data = {
                     "iteration": self.current_iteration + 1,
                     "task_assignments": {},
                     "task_results": [],
@@ -553,6 +695,7 @@ class Engine:
                     "agent_kpis": {},
                 }
                 self.logger.info(f"Starting iteration {self.current_iteration}")
+                set_token_labels(iteration=iteration_data["iteration"])
 
                 # Assign tasks to agents
                 assignment = self.planner.assign_tasks(
@@ -600,7 +743,9 @@ class Engine:
                     communications_str = self._format_communications(
                         iteration_data["communications"]
                     )
-                    self.evaluator.evaluate_communication(self.task, communications_str)
+                    self.evaluation_pipeline.submit(
+                        self.evaluator.evaluate_communication, self.task, communications_str
+                    )
                 else:
                     # Store -1 if communications are empty
                     self.evaluator.metrics["communication_score"].append(-1)
@@ -611,18 +756,25 @@ class Engine:
                     iteration_data["task_assignments"]
                 )
                 results_str = self._format_results(iteration_data["task_results"])
-                self.evaluator.evaluate_planning(
+                self.evaluation_pipeline.submit(
+                    self.evaluator.evaluate_planning,
                     iteration_data["summary"],
                     agent_profiles,
                     agent_tasks_str,
                     results_str,
                 )
-                self.evaluator.evaluate_kpi(self.task, results_str)
+                self.evaluation_pipeline.submit(self.evaluator.evaluate_kpi, self.task, results_str)
 
                 # Decide whether to continue or terminate
                 continue_simulation = self.planner.decide_next_step(agents_results)
                 iteration_data["continue_simulation"] = continue_simulation
+                self.evaluation_pipeline.join()
                 summary_data["iterations"].append(iteration_data)
+                self._save_checkpoint(
+                    summary_data,
+                    agents_results=agents_results,
+                    continue_simulation=continue_simulation,
+                )
                 if not continue_simulation:
                     self.logger.info(
                         "EnginePlanner decided to terminate the simulation."
@@ -638,6 +790,7 @@ class Engine:
                 "communication_score"
             ]
             summary_data["token_usage"] = self._get_totoal_token_usage()
+            summary_data["token_ledger"] = self.token_ledger.summary()
             summary_data["agent_kpis"] = self.evaluator.metrics["agent_kpis"]
             summary_data["total_milestones"] = self.evaluator.metrics[
                 "total_milestones"
@@ -679,16 +832,19 @@ class Engine:
                     "task_evaluation"
                 ]
                 self.logger.info("Engine star-based coordination loop completed.")
+            self._clear_checkpoint()
             self.logger.info("Engine simulation loop completed.")
 
         except Exception:
             self.logger.exception("An error occurred during simulation.")
             raise
         finally:
+            self._drain_evaluations()
             self.evaluator.finalize()
             self.logger.info("Simulation completed.")
             self._write_to_jsonl(summary_data)
 
+    @traced("engine.chain_coordinate", category="engine")
     def chain_coordinate(self) -> None:
         """
         Chain-based coordination mode.
@@ -713,8 +869,18 @@ class Engine:
 
             task = self.task
             agents_results = []
-
-            while current_agent and chain_length < max_chain_length:
+            continue_simulation = True
+            state = self._load_checkpoint()
+            if state is not None:
+                summary_data = state["summary_data"]
+                current_agent = self.graph.get_agent(state["current_agent"])
+                chain_length = state["chain_length"]
+                task = state["task"]
+                agents_results = state["agents_results"]
+                continue_simulation = state["continue_simulation"]
+                iteration_data = summary_data["iterations"][-1]
+
+            while continue_simulation and current_agent and chain_length < max_chain_length:
                 iteration_data = {
                     "chain_length": chain_length + 1,
                     "current_agent": current_agent.agent_id,
@@ -724,6 +890,7 @@ class Engine:
                     "total_milestones": 0,
                     "agent_kpis": {},
                 }
+                set_token_labels(iteration=iteration_data["chain_length"])
                 self.logger.info(f"Agent '{current_agent.agent_id}' is executing task.")
                 result, communication = current_agent.act(task)
                 result_str = f"AgentID: '{current_agent.agent_id}' completed task with result: {result}"
@@ -754,7 +921,7 @@ class Engine:
                 task = plan
                 chain_length += 1
                 self.planner.update_progress(result)
-                iteration_data["communications"] = communication
+                iteration_data["communications"] = [communication] if communication else []
 
                 # Evaluate communication
                 if iteration_data["communications"]:
@@ -763,7 +930,9 @@ class Engine:
                     communications_str = self._format_communications(
                         iteration_data_communications
                     )
-                    self.evaluator.evaluate_communication(self.task, communications_str)
+                    self.evaluation_pipeline.submit(
+                        self.evaluator.evaluate_communication, self.task, communications_str
+                    )
                 else:
                     # Store -1 if communications are empty
                     self.evaluator.metrics["communication_score"].append(-1)
@@ -783,17 +952,27 @@ class Engine:
                 )
                 iteration_data_summary = iteration_data.get("summary")
                 assert isinstance(iteration_data_summary, str)
-                self.evaluator.evaluate_planning(
+                self.evaluation_pipeline.submit(
+                    self.evaluator.evaluate_planning,
                     iteration_data_summary, agent_profiles_self, agent_tasks_str, result
                 )
-                self.evaluator.evaluate_kpi(self.task, result_str)
+                self.evaluation_pipeline.submit(self.evaluator.evaluate_kpi, self.task, result_str)
 
                 # Decide whether to continue or terminate
                 continue_simulation = self.planner.decide_next_step(
                     [{"root_agent": result}]
                 )
                 iteration_data["continue_simulation"] = continue_simulation
+                self.evaluation_pipeline.join()
                 summary_data["iterations"].append(iteration_data)
+                self._save_checkpoint(
+                    summary_data,
+                    current_agent=current_agent.agent_id,
+                    chain_length=chain_length,
+                    task=task,
+                    agents_results=agents_results,
+                    continue_simulation=continue_simulation,
+                )
                 if not continue_simulation:
                     self.logger.info(
                         "EnginePlanner decided to terminate the simulation."
@@ -810,6 +989,7 @@ class Engine:
                 "communication_score"
             ]
             summary_data["token_usage"] = self._get_totoal_token_usage()
+            summary_data["token_ledger"] = self.token_ledger.summary()
             summary_data["agent_kpis"] = self.evaluator.metrics["agent_kpis"]
             summary_data["total_milestones"] = self.evaluator.metrics[
                 "total_milestones"
@@ -838,17 +1018,21 @@ class Engine:
                     "task_evaluation"
                 ]
                 self.logger.info("Engine chain-based coordination loop completed.")
+            self._clear_checkpoint()
             self.logger.info("Chain-based coordination simulation completed.")
 
         except Exception:
             self.logger.exception("An error occurred during chain-based coordination.")
             raise
         finally:
+            self._drain_evaluations()
             self.evaluator.finalize()
             self.logger.info("Chain-based coordination simulation completed.")
             summary_data["token_usage"] = self._get_totoal_token_usage()
+            summary_data["token_ledger"] = self.token_ledger.summary()
             self._write_to_jsonl(summary_data)
 
+    @traced("engine.tree_coordinate", category="engine")
     def tree_coordinate(self) -> None:
         """
         Tree-based coordination mode.
@@ -865,8 +1049,14 @@ class Engine:
             if not root_agent:
                 self.logger.error("No root agent found in the tree.")
                 return
+            continue_simulation = True
+            state = self._load_checkpoint()
+            if state is not None:
+                summary_data = state["summary_data"]
+                continue_simulation = state["continue_simulation"]
+                iteration_data = summary_data["iterations"][-1]
             # Start the coordination from the root agent
-            while self.current_iteration < self.max_iterations:
+            while continue_simulation and self.current_iteration < self.max_iterations:
                 iteration_data: Dict[str, Any] = {
                     "iteration": self.current_iteration + 1,
                     "root_agent": root_agent.agent_id,
@@ -877,8 +1067,19 @@ class Engine:
                 }
                 self.current_iteration += 1
                 self.logger.info(f"Starting iteration {self.current_iteration}")
+                set_token_labels(iteration=iteration_data["iteration"])
+                subtree_timings: List[Dict[str, Any]] = []
+                iteration_start = time.perf_counter()
                 results, communication, tasks = self._execute_agent_task_recursive(
-                    root_agent, self.task
+                    root_agent, self.task, timings=subtree_timings
+                )
+                for timing in subtree_timings:
+                    timing["start"] = round(timing["start"] - iteration_start, 4)
+                    timing["end"] = round(timing["end"] - iteration_start, 4)
+                    timing["duration"] = round(timing["duration"], 4)
+                iteration_data["subtree_timings"] = subtree_timings
+                iteration_data["critical_path"] = self._get_critical_path(
+                    root_agent.agent_id, subtree_timings
                 )
                 # Update progress
                 summary = self._summarize_results(results)
@@ -898,7 +1099,9 @@ class Engine:
                     communications_str = self._format_communications(
                         iteration_data["communications"]
                     )
-                    self.evaluator.evaluate_communication(self.task, communications_str)
+                    self.evaluation_pipeline.submit(
+                        self.evaluator.evaluate_communication, self.task, communications_str
+                    )
                 else:
                     # Store -1 if communications are empty
                     self.evaluator.metrics["communication_score"].append(-1)
@@ -909,18 +1112,21 @@ class Engine:
                     iteration_data["task_assignments"]
                 )
                 results_str = self._format_results(iteration_data["task_results"])
-                self.evaluator.evaluate_planning(
+                self.evaluation_pipeline.submit(
+                    self.evaluator.evaluate_planning,
                     iteration_data["summary"],
                     agent_profiles,
                     agent_tasks_str,
                     results_str,
                 )
-                self.evaluator.evaluate_kpi(self.task, results_str)
+                self.evaluation_pipeline.submit(self.evaluator.evaluate_kpi, self.task, results_str)
 
                 # Decide whether to continue or terminate
                 continue_simulation = self.planner.decide_next_step(results)
                 iteration_data["continue_simulation"] = continue_simulation
+                self.evaluation_pipeline.join()
                 summary_data["iterations"].append(iteration_data)
+                self._save_checkpoint(summary_data, continue_simulation=continue_simulation)
                 if not continue_simulation:
                     self.logger.info(
                         "EnginePlanner decided to terminate the simulation."
@@ -932,6 +1138,7 @@ class Engine:
                 "communication_score"
             ]
             summary_data["token_usage"] = self._get_totoal_token_usage()
+            summary_data["token_ledger"] = self.token_ledger.summary()
             summary_data["agent_kpis"] = self.evaluator.metrics["agent_kpis"]
             summary_data["total_milestones"] = self.evaluator.metrics[
                 "total_milestones"
@@ -973,27 +1180,42 @@ class Engine:
                     "task_evaluation"
                 ]
                 self.logger.info("Engine tree-based coordination loop completed.")
+            self._clear_checkpoint()
             self.logger.info("Tree-based coordination simulation completed.")
 
         except Exception:
             self.logger.exception("An error occurred during tree-based coordination.")
             raise
         finally:
+            self._drain_evaluations()
             self.evaluator.finalize()
             self.logger.info("Tree-based coordination simulation completed.")
             self._write_to_jsonl(summary_data)
 
-    def _execute_agent_task_recursive(self, agent: BaseAgent, task: str) -> Any:
+    def _execute_agent_task_recursive(
+        self,
+        agent: BaseAgent,
+        task: str,
+        timings: Optional[List[Dict[str, Any]]] = None,
+        parent_id: Optional[str] = None,
+    ) -> Any:
         """
         Recursively execute tasks starting from the given agent.
 
+        Sibling subtrees run concurrently when max_parallel_agents is above 1; the
+        LLM calls they issue are bounded by the global in-flight cap.
+
         Args:
             agent (BaseAgent): The agent to execute task.
             task (str): The task to execute.
+            timings (Optional[List[Dict[str, Any]]]): If given, receives the start, end
+                and duration of every subtree rooted at an agent.
+            parent_id (Optional[str]): Agent ID of the parent in the tree.
 
         Returns:
             Any: The result of the agent's execution.
         """
+        start = time.perf_counter()
         self.logger.info(f"Agent '{agent.agent_id}' is executing task.")
         tasks = []
         print(agent.children)
@@ -1004,18 +1226,42 @@ class Engine:
             tasks.append(tasks_for_children)
             children_results = []
             communications = []
-            for child in agent.children:
-                child_task = tasks_for_children.get(child.agent_id, "")
-                if child_task:
-                    (
-                        child_result,
-                        communication,
-                        tasks_,
-                    ) = self._execute_agent_task_recursive(child, child_task)
-                    tasks += tasks_
-                    if communication:
-                        communications.append(communication)
-                    children_results += child_result
+            child_jobs = [
+                (child, tasks_for_children.get(child.agent_id, ""))
+                for child in agent.children
+            ]
+            child_jobs = [(child, child_task) for child, child_task in child_jobs if child_task]
+            if self.max_parallel_agents > 1 and len(child_jobs) > 1:
+                # Each node gets its own pool, so a parent waiting on its children
+                # never starves them of workers.
+                with ThreadPoolExecutor(
+                    max_workers=min(self.max_parallel_agents, len(child_jobs)),
+                    thread_name_prefix=f"subtree-{agent.agent_id}",
+                ) as executor:
+                    futures = [
+                        executor.submit(
+                            contextvars.copy_context().run,
+                            self._execute_agent_task_recursive,
+                            child,
+                            child_task,
+                            timings,
+                            agent.agent_id,
+                        )
+                        for child, child_task in child_jobs
+                    ]
+                    child_outputs = [future.result() for future in futures]
+            else:
+                child_outputs = [
+                    self._execute_agent_task_recursive(
+                        child, child_task, timings, agent.agent_id
+                    )
+                    for child, child_task in child_jobs
+                ]
+            for child_result, communication, tasks_ in child_outputs:
+                tasks += tasks_
+                if communication:
+                    communications.append(communication)
+                children_results += child_result
             # Agent may also act itself
             results_str = "\n".join(
                 json.dumps(result)[:500] for result in children_results
@@ -1037,16 +1283,123 @@ class Engine:
             results = [
                 {"agent_id": agent.agent_id, "result": own_result}
             ] + children_results
+            self._record_subtree_timing(timings, agent.agent_id, parent_id, start)
             return results, communications_str, tasks
         else:
             # Agent directly acts on the task
             result, communication = agent.act(task)
+            self._record_subtree_timing(timings, agent.agent_id, parent_id, start)
             return (
                 [{"agent_id": agent.agent_id, "result": result}],
                 communication,
                 tasks,
             )
 
+    def _record_subtree_timing(
+        self,
+        timings: Optional[List[Dict[str, Any]]],
+        agent_id: str,
+        parent_id: Optional[str],
+        start: float,
+    ) -> None:
+        """
+        Record how long the subtree rooted at an agent took.
+
+        Args:
+            timings (Optional[List[Dict[str, Any]]]): Timing records to append to, if any.
+            agent_id (str): Root agent of the subtree.
+            parent_id (Optional[str]): Parent of the subtree root.
+            start (float): perf_counter value when the subtree started.
+        """
+        if timings is None:
+            return
+        end = time.perf_counter()
+        timings.append(
+            {
+                "agent_id": agent_id,
+                "parent_id": parent_id,
+                "start": start,
+                "end": end,
+                "duration": end - start,
+            }
+        )
+
+    @staticmethod
+    def _get_critical_path(
+        root_id: str, timings: List[Dict[str, Any]]
+    ) -> List[str]:
+        """
+        Find the chain of subtrees that determined the latency of a tree run.
+
+        Starting at the root, follow the child subtree that finished last, since
+        that is the one its parent waited on.
+
+        Args:
+            root_id (str): Agent ID of the tree root.
+            timings (List[Dict[str, Any]]): Subtree timing records.
+
+        Returns:
+            List[str]: Agent IDs along the critical path, root first.
+        """
+        children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+        for timing in timings:
+            children.setdefault(timing["parent_id"], []).append(timing)
+        path = [root_id]
+        current = root_id
+        while children.get(current):
+            slowest = max(children[current], key=lambda timing: timing["end"])
+            current = slowest["agent_id"]
+            path.append(current)
+        return path
+
+    def _run_agent_steps(
+        self,
+        agents: List[BaseAgent],
+        step: Callable[[BaseAgent, Dict[str, Any]], None],
+        error_context: str,
+    ) -> List[Dict[str, Any]]:
+        """
+        Run one step per agent, concurrently up to max_parallel_agents.
+
+        Each step fills its own outcome dict, so whatever an agent produced before
+        failing is kept, and a failing agent does not affect the others.
+
+        Args:
+            agents (List[BaseAgent]): Agents to run the step for.
+            step (Callable[[BaseAgent, Dict[str, Any]], None]): Step to run; it records
+                its results in the given outcome dict.
+            error_context (str): Description of the step used in error logs.
+
+        Returns:
+            List[Dict[str, Any]]: One outcome dict per agent, in the order of `agents`.
+        """
+        outcomes: List[Dict[str, Any]] = [{} for _ in agents]
+
+        def run(index: int) -> None:
+            agent = agents[index]
+            try:
+                step(agent, outcomes[index])
+            except Exception as e:
+                self.logger.error(
+                    f"Error in agent '{agent.agent_id}' {error_context}: {e}"
+                )
+
+        if self.max_parallel_agents <= 1 or len(agents) <= 1:
+            for index in range(len(agents)):
+                run(index)
+        else:
+            with ThreadPoolExecutor(
+                max_workers=min(self.max_parallel_agents, len(agents)),
+                thread_name_prefix="agent",
+            ) as executor:
+                futures = [
+                    executor.submit(contextvars.copy_context().run, run, index)
+                    for index in range(len(agents))
+                ]
+                for future in futures:
+                    future.result()
+        return outcomes
+
     def _select_initial_agent(self) -> Optional[BaseAgent]:
         """
         Select the initial agent to start the chain.
@@ -1070,8 +1423,31 @@ class Engine:
         """
         Start the engine to run the simulation.
         """
+        # Run in a copy of the context so the token scope of this run stays with it
+        contextvars.copy_context().run(self._start)
+
+    def _start(self) -> None:
+        """
+        Run the simulation with this engine's token ledger collecting the LLM usage,
+        then flush the trace.
+        """
+        try:
+            with token_scope(ledger=self.token_ledger, component="engine"), span(
+                "engine.run", category="engine", coordinate_mode=self.coordinate_mode
+            ):
+                self._run()
+        finally:
+            tracer = get_tracer()
+            if tracer is not None:
+                tracer.flush()
+        self.logger.info(f"Token usage: {self.token_ledger.summary()['total']}")
+
+    def _run(self) -> None:
+        """
+        Run the coordination mode of the configuration.
+        """
         self.logger.info("Engine starting simulation.")
-        if isinstance(self.environment, MinecraftEnvironment):
+        if is_environment(self.environment, "MinecraftEnvironment"):
             self.environment.launch()
         if self.coordinate_mode == "star":
             self.logger.info("Running in centralized coordination mode.")
@@ -1088,8 +1464,15 @@ class Engine:
         else:
             self.logger.error(f"Unsupported coordinate mode: {self.coordinate_mode}")
             raise ValueError(f"Unsupported coordinate mode: {self.coordinate_mode}")
-        if isinstance(self.environment, MinecraftEnvironment):
+        if is_environment(self.environment, "MinecraftEnvironment"):
             self.environment.finish()
+        self.evaluation_pipeline.shutdown()
+        response_cache = get_response_cache()
+        if response_cache is not None:
+            self.logger.info(f"LLM response cache stats: {response_cache.stats()}")
+        rate_limits = rate_limiter_stats()
+        if rate_limits:
+            self.logger.info(f"LLM rate limiter stats: {rate_limits}")
 
     def _should_terminate(self) -> bool:
         """
@@ -1122,6 +1505,113 @@ class Engine:
         self.logger.debug(f"Summarized agents' results:\n{summary}")
         return summary
 
+    def _save_checkpoint(self, summary_data: Dict[str, Any], **loop_state: Any) -> None:
+        """
+        Persist the state needed to continue the run after the current iteration.
+
+        Args:
+            summary_data (Dict[str, Any]): Summary data collected so far.
+            **loop_state (Any): Loop variables of the coordination mode.
+        """
+        if not self.checkpoint_path:
+            return
+        state = {
+            "coordinate_mode": self.coordinate_mode,
+            "current_iteration": self.current_iteration,
+            "summary_data": summary_data,
+            "loop_state": loop_state,
+            "planner": {
+                "current_progress": self.planner.current_progress,
+                "token_usage": self.planner.token_usage,
+            },
+            "evaluator_metrics": self.evaluator.metrics,
+            "token_ledger": self.token_ledger.summary(),
+            "memory": self.memory.storage,
+            "agents": {
+                agent.agent_id: {
+                    "memory": agent.memory.storage,
+                    "shared_memory": agent.shared_memory.storage,
+                    # msg_box is a defaultdict of lambdas, which pickle cannot handle
+                    "msg_box": {
+                        session_id: {other_id: list(msgs) for other_id, msgs in boxes.items()}
+                        for session_id, boxes in agent.msg_box.items()
+                    },
+                    "task_history": agent.task_history,
+                    "token_usage": agent.token_usage,
+                    "session_id": agent.session_id,
+                }
+                for agent in self.agents
+            },
+        }
+        try:
+            save_checkpoint(self.checkpoint_path, state)
+        except Exception as e:
+            self.logger.error(f"Failed to write checkpoint to {self.checkpoint_path}: {e}")
+
+    def _load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        """
+        Restore the engine from its checkpoint when resuming.
+
+        Returns:
+            Optional[Dict[str, Any]]: The saved loop variables plus "summary_data", or None
+            if the run starts from scratch.
+        """
+        if not (self.resume and self.checkpoint_path):
+            return None
+        state = load_checkpoint(self.checkpoint_path)
+        if state is None:
+            self.logger.info(f"No checkpoint at {self.checkpoint_path}, starting from scratch.")
+            return None
+        if state["coordinate_mode"] != self.coordinate_mode:
+            raise ValueError(
+                f"Checkpoint was written in '{state['coordinate_mode']}' mode, "
+                f"not '{self.coordinate_mode}'."
+            )
+        self.current_iteration = state["current_iteration"]
+        self.planner.current_progress = state["planner"]["current_progress"]
+        self.planner.token_usage = state["planner"]["token_usage"]
+        self.evaluator.metrics = state["evaluator_metrics"]
+        if "token_ledger" in state:
+            # In place: the token scope of this run already records into this ledger
+            self.token_ledger.restore(state["token_ledger"])
+        self.memory.storage = state["memory"]
+        for agent in self.agents:
+            agent_state = state["agents"].get(agent.agent_id)
+            if agent_state is None:
+                continue
+            agent.memory.storage = agent_state["memory"]
+            agent.shared_memory.storage = agent_state["shared_memory"]
+            agent.msg_box.clear()
+            for session_id, boxes in agent_state["msg_box"].items():
+                for other_id, msgs in boxes.items():
+                    agent.msg_box[session_id][other_id] = list(msgs)
+            agent.task_history = agent_state["task_history"]
+            agent.token_usage = agent_state["token_usage"]
+            agent.session_id = agent_state["session_id"]
+        self.logger.info(
+            f"Resumed from {self.checkpoint_path} after iteration {self.current_iteration}."
+        )
+        return {"summary_data": state["summary_data"], **state["loop_state"]}
+
+    def _clear_checkpoint(self) -> None:
+        """
+        Remove the checkpoint once a run completed, so it is not resumed again.
+        """
+        if self.checkpoint_path and os.path.isfile(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    def _drain_evaluations(self) -> None:
+        """
+        Wait for outstanding background evaluations before results are written.
+
+        Errors are logged rather than raised, so they never mask the error that
+        ended a coordination loop.
+        """
+        try:
+            self.evaluation_pipeline.join()
+        except Exception as e:
+            self.logger.error(f"Error in background evaluation: {e}")
+
     def _write_to_jsonl(self, summary_data: Dict[str, Any]) -> None:
         """
         Write summary data to the JSONL file.
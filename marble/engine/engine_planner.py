@@ -8,12 +8,13 @@ import json
 import re
 from typing import Any, Dict, List
 
-from litellm import token_counter
 from litellm.types.utils import Message
 
 from marble.graph.agent_graph import AgentGraph
 from marble.llms.model_prompting import model_prompting
+from marble.llms.token_ledger import token_scope
 from marble.utils.logger import get_logger
+from marble.utils.tracing import traced
 
 
 def json_parse(input_str: str) -> Dict[str, Any]:
@@ -122,6 +123,7 @@ class EnginePlanner:
         # (The final JSON output instructions will be appended in each planning method.)
         return prompt
 
+    @traced("planner.assign_tasks", category="planner")
     def assign_tasks(self, planning_method: str = "naive") -> Dict[str, Any]:
         """
         Assign tasks to agents by interacting with the LLM using one of four planning strategies.
@@ -160,26 +162,22 @@ class EnginePlanner:
                     {"role": "system", "content": system_message_agent},
                     {"role": "user", "content": agent_prompt},
                 ]
-                response_agent = model_prompting(
-                    llm_model=self.model,
-                    messages=messages_agent,
-                    return_num=1,
-                    max_token_num=512,
-                    temperature=0.7,
-                    top_p=1.0,
-                )
+                with token_scope(component="planner") as usage:
+                    response_agent = model_prompting(
+                        llm_model=self.model,
+                        messages=messages_agent,
+                        return_num=1,
+                        max_token_num=512,
+                        temperature=0.7,
+                        top_p=1.0,
+                    )
                 proposal = (
                     response_agent[0].content.strip()
                     if response_agent[0].content
                     else ""
                 )
                 agent_proposals[agent_id] = proposal
-                messages_for_token = messages_agent + [
-                    {"role": "assistant", "content": proposal}
-                ]
-                self.token_usage += token_counter(
-                    model=self.model, messages=messages_for_token
-                )
+                self.token_usage += usage.total_tokens
 
             # Synthesize proposals into a final plan.
             proposals_text = ""
@@ -206,27 +204,23 @@ class EnginePlanner:
                 {"role": "system", "content": system_message_final},
                 {"role": "user", "content": final_prompt},
             ]
-            response_final = model_prompting(
-                llm_model=self.model,
-                messages=messages_final,
-                return_num=1,
-                max_token_num=1024,
-                temperature=0.7,
-                top_p=1.0,
-            )
-            messages_for_token = messages_final + [
-                {"role": "assistant", "content": response_final[0].content}
-            ]
-            self.token_usage += token_counter(
-                model=self.model, messages=messages_for_token
-            )
+            with token_scope(component="planner") as usage:
+                response_final = model_prompting(
+                    llm_model=self.model,
+                    messages=messages_final,
+                    return_num=1,
+                    max_token_num=1024,
+                    temperature=0.7,
+                    top_p=1.0,
+                )
+            self.token_usage += usage.total_tokens
             try:
                 assignment: Dict[str, Any] = json_parse(response_final[0].content)
                 self.logger.debug(
                     f"Received task assignment using group discussion: {assignment}"
                 )
                 return assignment
-            except json.JSONDecodeError as e:
+            except ValueError as e:
                 self.logger.error(
                     f"Failed to parse JSON response in group discussion: {e}"
                 )
@@ -273,20 +267,16 @@ class EnginePlanner:
                 {"role": "system", "content": system_message},
                 {"role": "user", "content": cognitive_prompt},
             ]
-            response = model_prompting(
-                llm_model=self.model,
-                messages=messages,
-                return_num=1,
-                max_token_num=1024,
-                temperature=0.7,
-                top_p=1.0,
-            )
-            messages_for_token = messages + [
-                {"role": "assistant", "content": response[0].content}
-            ]
-            self.token_usage += token_counter(
-                model=self.model, messages=messages_for_token
-            )
+            with token_scope(component="planner") as usage:
+                response = model_prompting(
+                    llm_model=self.model,
+                    messages=messages,
+                    return_num=1,
+                    max_token_num=1024,
+                    temperature=0.7,
+                    top_p=1.0,
+                )
+            self.token_usage += usage.total_tokens
             try:
                 assignment: Dict[str, Any] = json_parse(response[0].content)
                 self.logger.debug(
@@ -305,7 +295,7 @@ class EnginePlanner:
                         assignment.get("evolving_experiences", ""),
                     )
                 return assignment
-            except json.JSONDecodeError as e:
+            except ValueError as e:
                 self.logger.error(
                     f"Failed to parse JSON response in cognitive evolve: {e}"
                 )
@@ -330,20 +320,16 @@ class EnginePlanner:
                 {"role": "system", "content": system_message},
                 {"role": "user", "content": prompt},
             ]
-            response = model_prompting(
-                llm_model=self.model,
-                messages=messages,
-                return_num=1,
-                max_token_num=1024,
-                temperature=0.7,
-                top_p=1.0,
-            )
-            messages_for_token = messages + [
-                {"role": "assistant", "content": response[0].content}
-            ]
-            self.token_usage += token_counter(
-                model=self.model, messages=messages_for_token
-            )
+            with token_scope(component="planner") as usage:
+                response = model_prompting(
+                    llm_model=self.model,
+                    messages=messages,
+                    return_num=1,
+                    max_token_num=1024,
+                    temperature=0.7,
+                    top_p=1.0,
+                )
+            self.token_usage += usage.total_tokens
             response_json = json_parse(response[0].content)
             self.logger.debug(
                 f"Received task assignment using chain-of-thought planning: {response}"
@@ -373,20 +359,16 @@ class EnginePlanner:
                 {"role": "system", "content": system_message},
                 {"role": "user", "content": prompt},
             ]
-            response = model_prompting(
-                llm_model=self.model,
-                messages=messages,
-                return_num=1,
-                max_token_num=1024,
-                temperature=0.7,
-                top_p=1.0,
-            )
-            messages_for_token = messages + [
-                {"role": "assistant", "content": response[0].content}
-            ]
-            self.token_usage += token_counter(
-                model=self.model, messages=messages_for_token
-            )
+            with token_scope(component="planner") as usage:
+                response = model_prompting(
+                    llm_model=self.model,
+                    messages=messages,
+                    return_num=1,
+                    max_token_num=1024,
+                    temperature=0.7,
+                    top_p=1.0,
+                )
+            self.token_usage += usage.total_tokens
             try:
                 assignment: Dict[str, Any] = json_parse(response[0].content)
                 # assignment: Dict[str, Any] = json.loads(response[0].content if response[0].content else "")
@@ -394,7 +376,7 @@ class EnginePlanner:
                     f"Received task assignment using naive planning: {assignment}"
                 )
                 return assignment
-            except json.JSONDecodeError as e:
+            except ValueError as e:
                 self.logger.error(f"Failed to parse JSON response in naive mode: {e}")
                 return {"tasks": {}, "continue": False}
 
@@ -408,6 +390,7 @@ class EnginePlanner:
         self.current_progress += f"\n{summary}"
         self.logger.debug(f"Updated progress: {self.current_progress}")
 
+    @traced("planner.summarize_output", category="planner")
     def summarize_output(self, summary: str, task: str, output_format: str) -> Message:
         """
         Summarize the output of the agents.
@@ -418,32 +401,25 @@ class EnginePlanner:
         Returns:
             str: The summarized output.
         """
-        response = model_prompting(
-            llm_model=self.model,
-            messages=[
-                {
-                    "role": "user",
-                    "content": f"Summarize the output of the agents for the task: {task}\n\nNow here is some result of thr agent: {summary}, please analyze it. Return the final output into a json following the format: {output_format}",
-                }
-            ],
-            return_num=1,
-            max_token_num=2048,
-            temperature=0.0,
-            top_p=None,
-            stream=None,
-        )[0]
-        self.token_usage += token_counter(
-            model=self.model,
-            messages=[
-                {
-                    "role": "user",
-                    "content": f"Summarize the output of the agents for the task: {task}\n\nNow here is some result of thr agent: {summary}, please analyze it. Return the final output into a json following the format: {output_format}",
-                },
-                {"role": "assistant", "content": response.content},
-            ],
-        )
+        with token_scope(component="planner") as usage:
+            response = model_prompting(
+                llm_model=self.model,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": f"Summarize the output of the agents for the task: {task}\n\nNow here is some result of thr agent: {summary}, please analyze it. Return the final output into a json following the format: {output_format}",
+                    }
+                ],
+                return_num=1,
+                max_token_num=2048,
+                temperature=0.0,
+                top_p=None,
+                stream=None,
+            )[0]
+        self.token_usage += usage.total_tokens
         return response
 
+    @traced("planner.decide_next_step", category="planner")
     def decide_next_step(self, agents_results: List[Dict[str, Any]]) -> bool:
         """
         Decide whether to continue or terminate the simulation based on agents' results.
@@ -475,23 +451,21 @@ class EnginePlanner:
         )
 
         messages = [{"role": "system", "content": prompt}]
-        response = model_prompting(
-            llm_model=self.model,
-            messages=messages,
-            return_num=1,
-            max_token_num=256,
-            temperature=0.3,
-            top_p=1.0,
-        )
-        messages_for_token = messages + [
-            {"role": "assistant", "content": response[0].content}
-        ]
-        self.token_usage += token_counter(model=self.model, messages=messages_for_token)
+        with token_scope(component="planner") as usage:
+            response = model_prompting(
+                llm_model=self.model,
+                messages=messages,
+                return_num=1,
+                max_token_num=256,
+                temperature=0.3,
+                top_p=1.0,
+            )
+        self.token_usage += usage.total_tokens
         try:
             # decision = json.loads(response[0].content if response[0].content else "")
             decision = json_parse(response[0].content)
             self.logger.debug(f"Received continuation decision: {decision}")
             return decision.get("continue", False)
-        except json.JSONDecodeError as e:
+        except ValueError as e:
             self.logger.error(f"Failed to parse JSON decision response: {e}")
             return False
@@ -1,21 +1,109 @@
-from .base_env import BaseEnvironment
-from .coding_env import CodingEnvironment
-from .db_env import DBEnvironment
-from .minecraft_env import MinecraftEnvironment
-from .research_env import ResearchEnvironment
-from .web_env import WebEnvironment
-from .world_env import WorldSimulationEnvironment
-from .training_env import TrainingEnvironment
+"""
+Environments, imported on first use.
+
+Most environments pull in heavy optional dependencies (KeyBERT and
+sentence-transformers for Research, psycopg2 for DB, the JavaScript bridge for
+Minecraft), so the classes are resolved lazily (PEP 562) and the engine builds
+environments by type name from ENVIRONMENT_TYPES.
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple, Type
+
+if TYPE_CHECKING:
+    from .base_env import BaseEnvironment
+    from .coding_env import CodingEnvironment
+    from .db_env import DBEnvironment
+    from .minecraft_env import MinecraftEnvironment
+    from .research_env import ResearchEnvironment
+    from .training_env import TrainingEnvironment
+    from .web_env import WebEnvironment
+    from .world_env import WorldSimulationEnvironment
+
+# Class name -> module defining it
+_ENVIRONMENT_MODULES: Dict[str, str] = {
+    "BaseEnvironment": ".base_env",
+    "CodingEnvironment": ".coding_env",
+    "DBEnvironment": ".db_env",
+    "MinecraftEnvironment": ".minecraft_env",
+    "ResearchEnvironment": ".research_env",
+    "TrainingEnvironment": ".training_env",
+    "WebEnvironment": ".web_env",
+    "WorldSimulationEnvironment": ".world_env",
+}
+
+# Configured environment type -> (class name, environment name)
+ENVIRONMENT_TYPES: Dict[str, Tuple[str, str]] = {
+    "Base": ("BaseEnvironment", "Base Environment"),
+    "Coding": ("CodingEnvironment", "Coding Environment"),
+    "DB": ("DBEnvironment", "DB Environment"),
+    "Minecraft": ("MinecraftEnvironment", "Minecraft Environment"),
+    "Research": ("ResearchEnvironment", "Research Environment"),
+    "Training": ("TrainingEnvironment", "Training Environment"),
+    "Web": ("WebEnvironment", "Web Environment"),
+    "WorldSimulation": ("WorldSimulationEnvironment", "World Simulation Environment"),
+}
+
+
+def get_environment_class(env_type: str) -> Type["BaseEnvironment"]:
+    """
+    Import the class of a configured environment type.
+
+    Args:
+        env_type (str): The environment type, e.g. "Research".
+
+    Returns:
+        Type[BaseEnvironment]: The environment class.
+
+    Raises:
+        ValueError: If the environment type is not supported.
+    """
+    if env_type not in ENVIRONMENT_TYPES:
+        raise ValueError(f"Unsupported environment type: {env_type}")
+    class_name, _ = ENVIRONMENT_TYPES[env_type]
+    return __getattr__(class_name)  # type: ignore[no-any-return]
+
+
+def is_environment(environment: Any, class_name: str) -> bool:
+    """
+    isinstance check against an environment class, without importing it.
+
+    Args:
+        environment (Any): The object to check.
+        class_name (str): Name of the environment class, e.g. "MinecraftEnvironment".
+
+    Returns:
+        bool: Whether the object is an instance of the class or a subclass of it.
+    """
+    module = __name__ + _ENVIRONMENT_MODULES[class_name]
+    return any(
+        cls.__name__ == class_name and cls.__module__ == module
+        for cls in type(environment).__mro__
+    )
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _ENVIRONMENT_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_ENVIRONMENT_MODULES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + list(_ENVIRONMENT_MODULES))
+
 
 __all__ = [
     "BaseEnvironment",
-    "DBEnvironment",
-    "WebEnvironment",
-    "ResearchEnvironment",
     "CodingEnvironment",
+    "DBEnvironment",
+    "ENVIRONMENT_TYPES",
     "MinecraftEnvironment",
     "ResearchEnvironment",
     "TrainingEnvironment",
     "WebEnvironment",
     "WorldSimulationEnvironment",
+    "get_environment_class",
+    "is_environment",
 ]
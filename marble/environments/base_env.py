@@ -2,10 +2,16 @@
 Base environment module.
 """
 
+import threading
 from typing import Any, Callable, Dict, List, Union
 
+from marble.utils.tracing import span
+
 
 class BaseEnvironment:
+    # Whether the independent actions of one agent turn may run concurrently
+    concurrent_actions: bool = False
+
     def __init__(self, name: str, config: Dict[str, Any]):
         """
         Initialize the environment.
@@ -21,12 +27,16 @@ class BaseEnvironment:
             str, Callable[..., Dict[str, Any]]
         ] = {}  # private to avoid direct calls from outside
         self.action_handler_descriptions: Dict[str, Any] = {}  # in openai format
+        # Bumped whenever the action registry changes, so agents can cache derived prompts
+        self.actions_version: int = 0
         self.done = False
         self.description: str = config.get("description", "")
         self.task_description: str = config.get("task_description", "")
         self.ground_truth: str = config.get("ground_truth", "")
         self.max_iterations: int = config.get("max_iterations", 10)
         self.current_iteration: int = 0
+        # Guards the bookkeeping of apply_action against concurrent actions
+        self._lock = threading.RLock()
         # Initialize the state with the task description
         self.state["task_description"] = self.task_description
 
@@ -66,6 +76,28 @@ class BaseEnvironment:
         """
         self._action_handlers[action_name] = handler
         self.action_handler_descriptions[action_name] = description
+        self.actions_version += 1
+
+    def _run_action_handler(
+        self, action_name: str, arguments: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Run the handler of an action, traced as an "env.<action>" span.
+
+        Args:
+            action_name (str): The action to execute.
+            arguments (dict): Arguments for the action handler.
+
+        Returns:
+            Dict[str, Any]: The result of the handler.
+        """
+        with span(
+            f"env.{action_name}", category="environment", environment=self.name, action=action_name
+        ) as trace_span:
+            action_result = self._action_handlers[action_name](**arguments)
+            if isinstance(action_result, dict) and "success" in action_result:
+                trace_span.set_attributes(success=action_result["success"])
+        return action_result
 
     def apply_action(
         self, agent_id: Union[str, None], action_name: str, arguments: Dict[str, Any]
@@ -79,15 +111,16 @@ class BaseEnvironment:
             arguments (dict): Arguments for the action handler.
         """
         # Execution
-        action_result = self._action_handlers[action_name](**arguments)
+        action_result = self._run_action_handler(action_name, arguments)
 
-        # Update the state with the action result
-        self.state["last_action_result"] = action_result
+        with self._lock:
+            # Update the state with the action result
+            self.state["last_action_result"] = action_result
 
-        # Increment iteration count
-        self.current_iteration += 1
-        if self.current_iteration >= self.max_iterations:
-            self.done = True
+            # Increment iteration count
+            self.current_iteration += 1
+            if self.current_iteration >= self.max_iterations:
+                self.done = True
 
         return action_result
 
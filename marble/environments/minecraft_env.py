@@ -352,15 +352,16 @@ class MinecraftEnvironment(BaseEnvironment):
         """
         # Execution
         arguments["player_name"] = agent_id
-        action_result = self._action_handlers[action_name](**arguments)
+        action_result = self._run_action_handler(action_name, arguments)
 
-        # Update the state with the action result
-        self.state["last_action_result"] = action_result
+        with self._lock:
+            # Update the state with the action result
+            self.state["last_action_result"] = action_result
 
-        # Increment iteration count
-        self.current_iteration += 1
-        if self.current_iteration >= self.max_iterations:
-            self.done = True
+            # Increment iteration count
+            self.current_iteration += 1
+            if self.current_iteration >= self.max_iterations:
+                self.done = True
 
         return action_result
 
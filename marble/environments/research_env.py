@@ -1,4 +1,3 @@
-import time
 from typing import Any, Dict, List, Optional
 
 import requests
@@ -10,13 +9,18 @@ from marble.environments.research_utils.paper_collector import (
     get_paper_by_title,
     get_recent_papers,
     get_related_papers,
+    warm_keyword_model,
 )
 from marble.environments.research_utils.profile_collector import (
     collect_publications_and_coauthors,
 )
+from marble.utils.http_client import get_http_client
 
 
 class ResearchEnvironment(BaseEnvironment):
+    # Lookups only read remote sources, so one turn's lookups can run concurrently
+    concurrent_actions = True
+
     def __init__(self, config: Dict[str, Any], name: str = "ResearchEnv"):
         """
         Initialize the ResearchEnvironment.
@@ -25,6 +29,9 @@ class ResearchEnvironment(BaseEnvironment):
             name (str): The name of the environment.
         """
         super().__init__(name, config)
+        # Load the keyword model in the background so the first lookup does not wait for it
+        if config.get("warm_keyword_model", False):
+            warm_keyword_model()
 
         # Register the actions available in this environment
         self.register_action(
@@ -386,22 +393,8 @@ class ResearchEnvironment(BaseEnvironment):
             Dict[str, Any]: The result of the action, including the webpage content.
         """
         try:
-            # Set up a browser-like User-Agent
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36 Edg/114.0.0.0"
-            }
-
-            # Rate limiting to avoid excessive requests
-            while time.time() - getattr(self, "last_visited_timestamp", 0) < 1:
-                time.sleep(0.5)
-
-            response = requests.get(
-                url, headers=headers, timeout=5.0
-            )  # 5 second timeout
-            response.raise_for_status()  # Raise an error for bad responses
-            content = response.text
-            self.last_visited_timestamp = time.time()
-
+            # The shared client caches pages and spaces out requests to the same host
+            content = get_http_client().get_text(url)
             return {"success": True, "content": content}
         except requests.RequestException as e:
             return {"success": False, "error-msg": str(e)}
@@ -1,18 +1,45 @@
+import contextvars
 import re
+import tempfile
+import threading
 import time
 import uuid
-from io import BytesIO
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import arxiv
 import requests
-from beartype.typing import Any, Dict, List, Optional, Set
+from beartype.typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
 from bs4 import BeautifulSoup
-from keybert import KeyBERT
 from pydantic import BaseModel, Field
 from PyPDF2 import PdfReader
 from tqdm import tqdm
 
+from marble.environments.research_utils.paper_store import (
+    fts_phrase,
+    fts_terms,
+    get_paper_store,
+    strip_version,
+)
 from marble.llms import model_prompting
+from marble.utils.http_client import get_http_client
+
+if TYPE_CHECKING:
+    from keybert import KeyBERT
+
+T = TypeVar("T")
+R = TypeVar("R")
 
 MODEL_NAME = 'deepseek/deepseek-chat'
 class Data(BaseModel):
@@ -63,6 +90,178 @@ def perform_arxiv_search(
                 raise e
 
 
+KEYWORD_CACHE_SIZE = 1024
+
+_keyword_model: Optional["KeyBERT"] = None
+_keyword_model_lock = threading.Lock()
+# query -> extracted keywords joined by spaces, least recently used first
+_keyword_cache: "OrderedDict[str, str]" = OrderedDict()
+_keyword_cache_lock = threading.Lock()
+
+
+def get_keyword_model() -> "KeyBERT":
+    """
+    Get the process-wide KeyBERT model, loading it on first use.
+
+    Returns:
+        KeyBERT: The shared keyword extractor.
+    """
+    global _keyword_model
+    with _keyword_model_lock:
+        if _keyword_model is None:
+            # Imported here: keybert loads sentence-transformers and torch
+            from keybert import KeyBERT
+
+            _keyword_model = KeyBERT()
+        return _keyword_model
+
+
+def warm_keyword_model() -> threading.Thread:
+    """
+    Load the shared KeyBERT model in a background thread.
+
+    Returns:
+        threading.Thread: The loading thread; callers of get_keyword_model wait for it.
+    """
+    thread = threading.Thread(target=get_keyword_model, name="keybert-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def extract_keywords_batch(queries: List[str]) -> List[str]:
+    """
+    Extract the search keywords of many queries, with one KeyBERT pass over the
+    queries that are not cached yet.
+
+    Args:
+        queries (List[str]): Queries to extract keywords from.
+
+    Returns:
+        List[str]: The keywords of each query, joined by spaces.
+    """
+    keywords: Dict[str, str] = {}
+    with _keyword_cache_lock:
+        for query in queries:
+            if query in _keyword_cache:
+                _keyword_cache.move_to_end(query)
+                keywords[query] = _keyword_cache[query]
+    missing = [query for query in dict.fromkeys(queries) if query not in keywords]
+    if missing:
+        results = get_keyword_model().extract_keywords(
+            missing, keyphrase_ngram_range=(1, 3), stop_words="english"
+        )
+        # KeyBERT returns a flat list of (keyword, score) for a single document
+        per_query: List[List[Tuple[str, float]]] = [results] if len(missing) == 1 else results
+        with _keyword_cache_lock:
+            for query, extraction in zip(missing, per_query):
+                keywords[query] = " ".join(word for word, _ in extraction)
+                _keyword_cache[query] = keywords[query]
+            while len(_keyword_cache) > KEYWORD_CACHE_SIZE:
+                _keyword_cache.popitem(last=False)
+    return [keywords[query] for query in queries]
+
+
+def extract_keywords(query: str) -> str:
+    """
+    Extract the search keywords of a query.
+
+    Args:
+        query (str): The query.
+
+    Returns:
+        str: The keywords, joined by spaces.
+    """
+    return extract_keywords_batch([query])[0]
+
+
+def _record_from_result(result: arxiv.Result) -> Dict[str, Any]:
+    return {
+        "arxiv_id": strip_version(result.get_short_id()),
+        "title": result.title,
+        "abstract": result.summary.replace("\n", " "),
+        "authors": [author.name for author in result.authors],
+        "domain": result.primary_category,
+        "categories": list(result.categories),
+        "url": result.entry_id,
+        "timestamp": int(result.published.timestamp()),
+    }
+
+
+def _paper_from_record(record: Dict[str, Any]) -> Paper:
+    return Paper(
+        title=record["title"],
+        abstract=record["abstract"],
+        authors=record["authors"],
+        arxiv_id=record["arxiv_id"],
+        url=record["url"],
+        domain=record["domain"],
+        timestamp=record["timestamp"],
+        sections=record.get("sections"),
+        bibliography=record.get("bibliography"),
+    )
+
+
+def _search_records(
+    key: str,
+    search: arxiv.Search,
+    local_match: str,
+    newest_first: bool = False,
+    content_desc: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Answer an arXiv search from the paper store if possible, live otherwise.
+
+    A search recorded earlier is replayed; newest-first recordings only until
+    they are older than the store's recent_search_ttl. Otherwise a local
+    full-text search that finds as many papers as the live search asks for is
+    used, except for newest-first searches, whose local answer would miss new
+    submissions. Offline stores always answer locally. Live results are written
+    through to the store.
+
+    Args:
+        key (str): Key the search is recorded under.
+        search (arxiv.Search): The live search.
+        local_match (str): FTS5 query answering the search locally.
+        newest_first (bool): The search asks for the newest submissions; order local
+            results by publication time.
+        content_desc (Optional[str]): If set, the sections and bibliography of the
+            papers are fetched, with this progress-bar description.
+
+    Returns:
+        List[Dict[str, Any]]: The paper records.
+    """
+    store = get_paper_store()
+    wanted = search.max_results or 0
+    records = None
+    if store is not None:
+        max_age = store.recent_search_ttl if newest_first and not store.offline else None
+        records = store.get_search(key, max_age=max_age)
+        if records is None and (store.offline or not newest_first):
+            local_records = store.search(local_match, wanted, newest_first=newest_first)
+            if len(local_records) >= wanted or store.offline:
+                records = local_records
+    is_live = records is None
+    if records is None:
+        # Use the independent arXiv search function with retry logic
+        records = [_record_from_result(result) for result in perform_arxiv_search(search)]
+
+    updated = []
+    if content_desc is not None and not (store is not None and store.offline):
+        updated = [record for record in records if record.get("sections") is None]
+        sections = _map_papers(
+            get_paper_content_from_html, [record["url"] for record in updated], content_desc
+        )
+        for record, paper_sections in zip(updated, sections):
+            record["sections"] = paper_sections
+            record["bibliography"] = get_paper_bibliography_from_html(record["url"])
+    if store is not None:
+        if is_live:
+            store.record_search(key, records)
+        elif updated:
+            store.add_papers(updated)
+    return records
+
+
 def get_related_papers(
     num_results: int,
     query: Optional[str] = None,
@@ -72,22 +271,22 @@ def get_related_papers(
     keyword = ""
 
     if query is not None:
-        kw_model = KeyBERT()
-        extraction_results = kw_model.extract_keywords(
-            query, keyphrase_ngram_range=(1, 3), stop_words="english"
-        )
-        keyword = " ".join([word for word, _ in extraction_results])
+        keyword = extract_keywords(query)
 
     arxiv_query_parts = []
+    local_parts = []
 
     if keyword:
         arxiv_query_parts.append(f"({keyword})")
+        local_parts.append(" OR ".join(fts_terms(keyword)))
 
     if domain:
         arxiv_query_parts.append(f"all:{domain}")
+        local_parts.append(" AND ".join(fts_terms(domain)))
 
     if author:
         arxiv_query_parts.append(f"au:{author}")
+        local_parts.append(f"authors : ({' AND '.join(fts_terms(author))})")
 
     if arxiv_query_parts:
         arxiv_query = " AND ".join(arxiv_query_parts)
@@ -101,46 +300,22 @@ def get_related_papers(
         max_results=num_results,
         sort_by=arxiv.SortCriterion.Relevance,
     )
-
-    # Use the independent arXiv search function with retry logic
-    results = perform_arxiv_search(search)
-
-    papers_list = []
-
-    for result in tqdm(results, desc="Collecting related papers", unit="Paper"):
-        paper_title = result.title
-        paper_url = result.entry_id
-        paper_abstract = result.summary.replace("\n", " ")
-        paper_authors = [author.name for author in result.authors]
-        paper_domain = result.primary_category
-        publish_time = result.published
-        paper_timestamp = int(publish_time.timestamp())
-
-        paper_sections = get_paper_content_from_html(paper_url)
-        paper_bibliography = get_paper_bibliography_from_html(paper_url)
-
-        paper = Paper(
-            title=paper_title,
-            abstract=paper_abstract,
-            authors=paper_authors,
-            url=paper_url,
-            domain=paper_domain,
-            timestamp=paper_timestamp,
-            sections=paper_sections,
-            bibliography=paper_bibliography,
-        )
-        papers_list.append(paper)
-
-    return papers_list
+    records = _search_records(
+        f"related:{num_results}:{arxiv_query}",
+        search,
+        # Parts without search terms cannot be matched locally
+        " AND ".join(f"({part})" for part in local_parts if "\"" in part),
+        content_desc="Collecting related papers",
+    )
+    return [_paper_from_record(record) for record in records]
 
 
 def get_recent_papers(
     domain: Optional[str] = None, max_results: int = 1
 ) -> List[Paper]:
     if domain is None:
-        arxiv_query = "all:artificial intelligence"
-    else:
-        arxiv_query = f"all:{domain}"
+        domain = "artificial intelligence"
+    arxiv_query = f"all:{domain}"
 
     search = arxiv.Search(
         query=arxiv_query,
@@ -148,42 +323,27 @@ def get_recent_papers(
         sort_by=arxiv.SortCriterion.SubmittedDate,
         sort_order=arxiv.SortOrder.Descending,
     )
+    records = _search_records(
+        f"recent:{max_results}:{arxiv_query}",
+        search,
+        " AND ".join(fts_terms(domain)),
+        newest_first=True,
+        content_desc=f'Collecting recent papers in "{domain}"',
+    )
+    return [_paper_from_record(record) for record in records]
 
-    # Use the independent arXiv search function with retry logic
-    results = perform_arxiv_search(search)
 
-    papers_list = []
-
-    for result in tqdm(
-        results, desc=f'Collecting recent papers in "{domain}"', unit="Paper"
-    ):
-        paper_title = result.title
-        paper_url = result.entry_id
-        paper_abstract = result.summary.replace("\n", " ")
-        paper_authors = [author.name for author in result.authors]
-        paper_domain = result.primary_category
-        publish_time = result.published
-        paper_timestamp = int(publish_time.timestamp())
-
-        paper_sections = get_paper_content_from_html(paper_url)
-        paper_bibliography = get_paper_bibliography_from_html(paper_url)
-
-        paper = Paper(
-            title=paper_title,
-            abstract=paper_abstract,
-            authors=paper_authors,
-            url=paper_url,
-            domain=paper_domain,
-            timestamp=paper_timestamp,
-            sections=paper_sections,
-            bibliography=paper_bibliography,
-        )
-        papers_list.append(paper)
+def _fetch_html(url: str) -> Optional[BeautifulSoup]:
+    """
+    Fetch the HTML version of an arXiv paper.
 
-    return papers_list
+    Returns:
+        Optional[BeautifulSoup]: The parsed page, or None if the URL is not an arXiv
+        paper or the paper has no HTML version (404).
 
-
-def fetch_html_content(url: str) -> Optional[BeautifulSoup]:
+    Raises:
+        requests.RequestException: If the request fails for any other reason.
+    """
     if "http:" in url:
         url = url.replace("http:", "https:")
     if "arxiv" not in url:
@@ -195,26 +355,65 @@ def fetch_html_content(url: str) -> Optional[BeautifulSoup]:
     else:
         html_url = url
 
+    print("get html content：", html_url)
     try:
-        print("get html content：", html_url)
-        response = requests.get(html_url, timeout=10)
-        if response.status_code == 200:
-            print("get html content successfully")
-            return BeautifulSoup(response.text, "lxml")
-    except Exception:
+        html = get_http_client().get_text(html_url, timeout=10)
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            return None
+        raise
+    print("get html content successfully")
+    return BeautifulSoup(html, "lxml")
+
+
+def fetch_html_content(url: str) -> Optional[BeautifulSoup]:
+    try:
+        return _fetch_html(url)
+    except requests.RequestException:
         return None
-    return None
 
 
-def get_section_contents(soup: BeautifulSoup) -> Optional[Dict[str, str]]:
-    section_contents = None
+def parse_paper_soup(soup: BeautifulSoup) -> Dict[str, Optional[Dict[str, str]]]:
+    """
+    Parse the sections, table and figure captions and bibliography of an arXiv
+    HTML paper in one pass over its article.
+
+    Args:
+        soup (BeautifulSoup): The parsed paper page.
+
+    Returns:
+        Dict[str, Optional[Dict[str, str]]]: "sections", "tables", "figures" and
+        "bibliography", each None if the paper has none.
+    """
+    content: Dict[str, Optional[Dict[str, str]]] = {
+        "sections": None,
+        "tables": None,
+        "figures": None,
+        "bibliography": None,
+    }
     article = soup.find("article", class_="ltx_document")
-    sections = article.find_all("section", class_="ltx_section")
-    sections.extend(article.find_all("section", class_="ltx_appendix"))
+    if article is None:
+        return content
+    sections, appendices, tables, figures = [], [], [], []
+    bibliography_raw = None
+    for element in article.find_all(["section", "figure"]):
+        classes = element.get("class") or []
+        if element.name == "section":
+            if "ltx_section" in classes:
+                sections.append(element)
+            if "ltx_appendix" in classes:
+                appendices.append(element)
+            if "ltx_bibliography" in classes and bibliography_raw is None:
+                bibliography_raw = element
+        else:
+            if "ltx_table" in classes:
+                tables.append(element)
+            if "ltx_figure" in classes:
+                figures.append(element)
 
-    if len(sections) > 0:
+    if sections or appendices:
         section_contents = {}
-        for section in sections:
+        for section in sections + appendices:
             section_tag_raw = section.find(
                 attrs={
                     "class": [
@@ -224,27 +423,15 @@ def get_section_contents(soup: BeautifulSoup) -> Optional[Dict[str, str]]:
                 }
             )
             if section_tag_raw:
-                section_tag = section_tag_raw.text.replace("\n", "")
-            else:
-                continue
-            section_content = section.text
-            section_contents[section_tag] = section_content
-    return section_contents
-
-
-def get_table_captions(soup: BeautifulSoup) -> Optional[Dict[str, str]]:
-    table_captions = None
-    article = soup.find("article", class_="ltx_document")
-    tables = article.find_all("figure", class_="ltx_table")
+                section_contents[section_tag_raw.text.replace("\n", "")] = section.text
+        content["sections"] = section_contents
 
-    if len(tables) > 0:
+    if tables:
         table_captions = {}
         table_index = 0
         for table in tables:
             table_caption_raw = table.find("figcaption", class_="ltx_caption")
-            if table_caption_raw:
-                table_caption = table_caption_raw.text
-            else:
+            if not table_caption_raw:
                 continue
             table_tag_raw = table.find("span", class_="ltx_tag")
             if table_tag_raw:
@@ -252,23 +439,15 @@ def get_table_captions(soup: BeautifulSoup) -> Optional[Dict[str, str]]:
             else:
                 table_index += 1
                 table_tag = str(table_index)
-            table_captions[table_tag] = table_caption
-    return table_captions
+            table_captions[table_tag] = table_caption_raw.text
+        content["tables"] = table_captions
 
-
-def get_figure_captions(soup: BeautifulSoup) -> Optional[Dict[str, str]]:
-    figure_captions = None
-    article = soup.find("article", class_="ltx_document")
-    figures = article.find_all("figure", class_="ltx_figure")
-
-    if len(figures) > 0:
+    if figures:
         figure_captions = {}
         figure_index = 0
         for figure in figures:
             figure_caption_raw = figure.find_all("figcaption", class_="ltx_caption")
-            if len(figure_caption_raw) > 0:
-                figure_caption = figure_caption_raw[-1].text
-            else:
+            if len(figure_caption_raw) == 0:
                 continue
             figure_tag_raw = figure.find_all("span", class_="ltx_tag")
             if len(figure_tag_raw) > 0:
@@ -276,35 +455,129 @@ def get_figure_captions(soup: BeautifulSoup) -> Optional[Dict[str, str]]:
             else:
                 figure_index += 1
                 figure_tag = str(figure_index)
-            figure_captions[figure_tag] = figure_caption
-    return figure_captions
-
-
-def get_bibliography(soup: BeautifulSoup) -> Optional[Dict[str, str]]:
-    bibliography = None
-    article = soup.find("article", class_="ltx_document")
-    bibliography_raw = article.find("section", class_="ltx_bibliography")
+            figure_captions[figure_tag] = figure_caption_raw[-1].text
+        content["figures"] = figure_captions
 
     if bibliography_raw is not None:
         bibliography = {}
-        bibliography_list = bibliography_raw.find_all("li", class_="ltx_bibitem")
-        for bibliography_item in bibliography_list:
+        for bibliography_item in bibliography_raw.find_all("li", class_="ltx_bibitem"):
             bibliography_tag_raw = bibliography_item.find("span", class_="ltx_tag")
             if bibliography_tag_raw:
-                bibliography_tag = bibliography_tag_raw.text
-            else:
-                continue
-            bibliography_content = bibliography_item.text
-            bibliography[bibliography_tag] = bibliography_content
-    return bibliography
+                bibliography[bibliography_tag_raw.text] = bibliography_item.text
+        content["bibliography"] = bibliography
+    return content
+
+
+def get_section_contents(soup: BeautifulSoup) -> Optional[Dict[str, str]]:
+    return parse_paper_soup(soup)["sections"]
+
+
+def get_table_captions(soup: BeautifulSoup) -> Optional[Dict[str, str]]:
+    return parse_paper_soup(soup)["tables"]
+
+
+def get_figure_captions(soup: BeautifulSoup) -> Optional[Dict[str, str]]:
+    return parse_paper_soup(soup)["figures"]
+
+
+def get_bibliography(soup: BeautifulSoup) -> Optional[Dict[str, str]]:
+    return parse_paper_soup(soup)["bibliography"]
+
+
+PAPER_CONTENT_CACHE_SIZE = 256
+PAPER_FETCH_WORKERS = 4
+
+_ARXIV_URL = re.compile(r"arxiv\.org/(?:abs|pdf|html)/([^?#]+?)(?:\.pdf)?/?(?:[?#]|$)")
+# arXiv id -> parsed content (None if the paper has no HTML version), least recently used first.
+# Failed fetches are not remembered, so a transient error does not hide a paper for good.
+_paper_contents: "OrderedDict[str, Optional[Dict[str, Optional[Dict[str, str]]]]]" = OrderedDict()
+_paper_content_lock = threading.Lock()
+_paper_content_in_flight: Dict[str, threading.Event] = {}
+
+
+def get_paper_html_content(url: str) -> Optional[Dict[str, Optional[Dict[str, str]]]]:
+    """
+    Fetch and parse the HTML version of a paper, once per arXiv ID.
+
+    Parsed papers are cached by arXiv ID, and concurrent callers asking for the
+    same paper wait for a single fetch.
+
+    Args:
+        url (str): URL of the paper (abs, pdf or html).
+
+    Returns:
+        Optional[Dict[str, Optional[Dict[str, str]]]]: The parse_paper_soup result, or
+        None if the paper has no HTML version or could not be fetched.
+    """
+    match = _ARXIV_URL.search(url)
+    key = match.group(1) if match else url
+    while True:
+        with _paper_content_lock:
+            if key in _paper_contents:
+                _paper_contents.move_to_end(key)
+                return _paper_contents[key]
+            waiting = _paper_content_in_flight.get(key)
+            if waiting is None:
+                _paper_content_in_flight[key] = threading.Event()
+                break
+        waiting.wait()
+    try:
+        try:
+            soup = _fetch_html(url)
+        except requests.RequestException as e:
+            print(f"Failed to fetch the HTML version of {url}: {e}")
+            return None
+        content = parse_paper_soup(soup) if soup is not None else None
+        with _paper_content_lock:
+            _paper_contents[key] = content
+            while len(_paper_contents) > PAPER_CONTENT_CACHE_SIZE:
+                _paper_contents.popitem(last=False)
+        return content
+    finally:
+        with _paper_content_lock:
+            _paper_content_in_flight.pop(key).set()
+
+
+def _map_papers(
+    func: Callable[[T], R], items: List[T], desc: Optional[str] = None
+) -> List[R]:
+    """
+    Apply a function to papers on a bounded thread pool, keeping their order.
+    """
+    if not items:
+        return []
+    results: List[Any] = [None] * len(items)
+    with ThreadPoolExecutor(max_workers=min(PAPER_FETCH_WORKERS, len(items))) as pool:
+        # Each task runs in a copy of the caller's context (token scope, tracing span)
+        futures = {
+            pool.submit(contextvars.copy_context().run, func, item): index
+            for index, item in enumerate(items)
+        }
+        for future in tqdm(as_completed(futures), total=len(items), desc=desc, unit="Paper"):
+            results[futures[future]] = future.result()
+    return results
+
+
+def fetch_paper_contents(urls: List[str]) -> List[Optional[Dict[str, Optional[Dict[str, str]]]]]:
+    """
+    Fetch and parse many papers concurrently on a bounded pool.
+
+    Args:
+        urls (List[str]): URLs of the papers.
+
+    Returns:
+        List[Optional[Dict[str, Optional[Dict[str, str]]]]]: The get_paper_html_content
+        result of each URL.
+    """
+    return _map_papers(get_paper_html_content, urls)
 
 
 def get_paper_content_from_html(url: str) -> Optional[Dict[str, str]]:
-    soup = fetch_html_content(url)
-    if soup is None:
+    content = get_paper_html_content(url)
+    if content is None:
         return None
 
-    section_contents = get_section_contents(soup)
+    section_contents = content["sections"]
     response = model_prompting(
         MODEL_NAME,
         messages=[
@@ -356,34 +629,134 @@ The content of the paper is as follows:
 
 
 def get_paper_figure_captions_from_html(url: str) -> Optional[Dict[str, str]]:
-    soup = fetch_html_content(url)
-    if soup is None:
-        return None
-
-    figure_captions = get_figure_captions(soup)
-    return figure_captions
+    content = get_paper_html_content(url)
+    return content["figures"] if content is not None else None
 
 
 def get_paper_table_captions_from_html(url: str) -> Optional[Dict[str, str]]:
-    soup = fetch_html_content(url)
-    if soup is None:
-        return None
-
-    table_captions = get_table_captions(soup)
-    return table_captions
+    content = get_paper_html_content(url)
+    return content["tables"] if content is not None else None
 
 
 def get_paper_bibliography_from_html(url: str) -> Optional[Dict[str, str]]:
-    soup = fetch_html_content(url)
-    if soup is None:
-        return None
-
-    bibliography = get_bibliography(soup)
-    # return bibliography
+    # The bibliography is parsed with the rest of the page but not returned
+    # content = get_paper_html_content(url)
+    # return content["bibliography"] if content is not None else None
     return None
 
 
-def get_paper_content_from_pdf(url: str) -> Optional[Dict[str, str]]:
+PDF_SECTION_TITLES = [
+    "Abstract",
+    "Introduction",
+    "Related Work",
+    "Background",
+    "Methods",
+    "Experiments",
+    "Results",
+    "Discussion",
+    "Conclusion",
+    "Conclusions",
+    "Acknowledgments",
+    "References",
+    "Appendix",
+    "Materials and Methods",
+]
+_PDF_SECTION_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(title) for title in PDF_SECTION_TITLES) + r")\b",
+    re.IGNORECASE,
+)
+# Section titles that start a line, optionally numbered ("3", "3.1", "III."); unlike
+# _PDF_SECTION_PATTERN this does not match the same words in running text
+_PDF_HEADING_PATTERN = re.compile(
+    r"^[ \t]*(?:(?:\d+(?:\.\d+)*|[IVX]+)\.?[ \t]+)?("
+    + "|".join(re.escape(title) for title in PDF_SECTION_TITLES)
+    + r")\b",
+    re.IGNORECASE | re.MULTILINE,
+)
+PDF_CACHE_SIZE = 16
+# Downloads up to this size stay in memory, larger ones are spooled to disk
+_PDF_SPOOL_BYTES = 8 * 1024 * 1024
+
+
+class _PdfPages:
+    """
+    Page texts of a PDF, extracted lazily and kept for later readers.
+    """
+
+    def __init__(self, reader: PdfReader) -> None:
+        self._reader: Optional[PdfReader] = reader
+        self._texts: List[str] = []
+        self._lock = threading.Lock()
+
+    def __iter__(self) -> Iterator[str]:
+        index = 0
+        while True:
+            with self._lock:
+                if index == len(self._texts):
+                    if self._reader is None or index == len(self._reader.pages):
+                        # Every page is extracted; the reader and its file can go
+                        self._reader = None
+                        return
+                    self._texts.append(self._reader.pages[index].extract_text() or "")
+                text = self._texts[index]
+            yield text
+            index += 1
+
+
+# arXiv id -> page texts of its PDF, least recently used first
+_pdf_pages: "OrderedDict[str, _PdfPages]" = OrderedDict()
+_pdf_pages_lock = threading.Lock()
+
+
+def _get_pdf_pages(pdf_url: str) -> _PdfPages:
+    match = _ARXIV_URL.search(pdf_url)
+    key = match.group(1) if match else pdf_url
+    with _pdf_pages_lock:
+        if key in _pdf_pages:
+            _pdf_pages.move_to_end(key)
+            return _pdf_pages[key]
+
+    file_stream = tempfile.SpooledTemporaryFile(max_size=_PDF_SPOOL_BYTES)
+    with requests.get(pdf_url, stream=True, timeout=30) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            file_stream.write(chunk)
+    file_stream.seek(0)
+    pages = _PdfPages(PdfReader(file_stream))
+    with _pdf_pages_lock:
+        pages = _pdf_pages.setdefault(key, pages)
+        _pdf_pages.move_to_end(key)
+        while len(_pdf_pages) > PDF_CACHE_SIZE:
+            _pdf_pages.popitem(last=False)
+    return pages
+
+
+def get_paper_content_from_pdf(
+    url: str, sections: Optional[List[str]] = None, min_words_after: int = 0
+) -> Optional[Dict[str, str]]:
+    """
+    Split the text of a paper's PDF into sections.
+
+    Pages are extracted one at a time and cached per paper. When sections are
+    requested, extraction stops at the first page where the headings of all of
+    them were found, another heading follows the last one, and at least
+    min_words_after words follow it, so the remaining pages are never extracted.
+    Headings are only recognized at the start of a line, so section titles in
+    running text neither stop extraction nor split sections. If the headings
+    cannot be found, every page is read and the text is split wherever a
+    section title occurs.
+
+    Args:
+        url (str): URL of the paper (abs, html or pdf).
+        sections (Optional[List[str]]): Section titles needed, e.g. ["Abstract",
+            "Introduction"]; all pages are read if None.
+        min_words_after (int): Words of text needed from the heading of the last
+            requested section on.
+
+    Returns:
+        Optional[Dict[str, str]]: Section title to text for the pages read, or None
+        if no text could be extracted.
+    """
     try:
         if "abs" in url:
             pdf_url = url.replace("abs", "pdf")
@@ -392,45 +765,46 @@ def get_paper_content_from_pdf(url: str) -> Optional[Dict[str, str]]:
         else:
             pdf_url = url
 
-        response = requests.get(pdf_url)
-        file_stream = BytesIO(response.content)
-        reader = PdfReader(file_stream)
-
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text()
-
-        if text == "":
+        wanted = {title.lower() for title in sections} if sections else None
+        texts = []
+        # Text from the heading of the last requested section on, once all were found
+        after_last: List[str] = []
+        for page_text in _get_pdf_pages(pdf_url):
+            texts.append(page_text)
+            if wanted is None:
+                continue
+            if wanted:
+                for match in _PDF_HEADING_PATTERN.finditer(page_text):
+                    wanted.discard(match.group(1).lower())
+                    if not wanted:
+                        after_last.append(page_text[match.start(1) :])
+                        break
+            else:
+                after_last.append(page_text)
+            if after_last:
+                # A page break ends a line, so a heading may open the next page
+                following = "\n".join(after_last)
+                if len(following.split()) >= min_words_after and any(
+                    match.start() > 0 for match in _PDF_HEADING_PATTERN.finditer(following)
+                ):
+                    break
+
+        text = "\n".join(texts)
+        if text.strip() == "":
             return None
 
-        section_titles = [
-            "Abstract",
-            "Introduction",
-            "Related Work",
-            "Background",
-            "Methods",
-            "Experiments",
-            "Results",
-            "Discussion",
-            "Conclusion",
-            "Conclusions",
-            "Acknowledgments",
-            "References",
-            "Appendix",
-            "Materials and Methods",
-        ]
-
-        section_pattern = re.compile(
-            r"\b(" + "|".join(re.escape(title) for title in section_titles) + r")\b",
-            re.IGNORECASE,
-        )
-
-        sections = {}
-        matches = list(section_pattern.finditer(text))
+        paper_sections = {}
+        matches = list(_PDF_HEADING_PATTERN.finditer(text))
+        found = {match.group(1).lower() for match in matches}
+        if not (
+            all(title.lower() in found for title in sections) if sections else len(found) > 1
+        ):
+            # Headings do not start lines in this PDF's text; split on the titles anywhere
+            matches = list(_PDF_SECTION_PATTERN.finditer(text))
 
         for i, match in enumerate(matches):
-            section_name = match.group()
-            section_start = match.start()
+            section_name = match.group(1)
+            section_start = match.start(1)
 
             if i + 1 < len(matches):
                 section_end = matches[i + 1].start()
@@ -438,9 +812,9 @@ def get_paper_content_from_pdf(url: str) -> Optional[Dict[str, str]]:
                 section_end = len(text)
 
             section_content = text[section_start:section_end].strip()
-            sections[section_name] = section_content
+            paper_sections[section_name] = section_content
 
-        return sections
+        return paper_sections
 
     except requests.exceptions.RequestException as e:
         print(f"Error fetching the PDF from the URL: {e}")
@@ -452,9 +826,12 @@ def get_paper_content_from_pdf(url: str) -> Optional[Dict[str, str]]:
 
 def get_paper_introduction(url: str) -> Optional[str]:
     intro_length = 512
-    sections = get_paper_content_from_html(url)
+    content = get_paper_html_content(url)
+    sections = content["sections"] if content is not None else None
     if not sections:
-        sections = get_paper_content_from_pdf(url)
+        sections = get_paper_content_from_pdf(
+            url, sections=["Introduction"], min_words_after=intro_length
+        )
     if not sections:
         return None
 
@@ -511,39 +888,57 @@ def get_references(arxiv_id: str, max_retries: int = 5) -> List[Dict[str, Any]]:
 
 def get_paper_by_keyword(
     keyword: str, existing_arxiv_ids: Set[str], max_papers: int = 10
-) -> List[arxiv.Result]:
+) -> List[Paper]:
     query = f'all:"{keyword}" AND (cat:cs.AI OR cat:cs.LG)'
     search = arxiv.Search(
         query=query,
         max_results=max_papers * 2,  # Fetch extra to account for duplicates
         sort_by=arxiv.SortCriterion.SubmittedDate,
     )
-    results = perform_arxiv_search(search)
+    records = _search_records(
+        f"keyword:{max_papers}:{query}",
+        search,
+        f'{fts_phrase(keyword)} AND categories : ("cs ai" OR "cs lg")',
+        newest_first=True,
+    )
 
     papers = []
-    for paper in results:
-        short_id = paper.get_short_id().split("v")[0]
-        if short_id not in existing_arxiv_ids:
-            papers.append(paper)
-            existing_arxiv_ids.add(short_id)
+    for record in records:
+        if record["arxiv_id"] not in existing_arxiv_ids:
+            papers.append(_paper_from_record(record))
+            existing_arxiv_ids.add(record["arxiv_id"])
         if len(papers) >= max_papers:
             break
     return papers
 
 
-def get_paper_by_arxiv_id(arxiv_id: str) -> Optional[arxiv.Result]:
+def get_paper_by_arxiv_id(arxiv_id: str) -> Optional[Paper]:
+    arxiv_id = strip_version(arxiv_id)
+    store = get_paper_store()
+    if store is not None:
+        record = store.get(arxiv_id)
+        if record is not None or store.offline:
+            return _paper_from_record(record) if record else None
     query = f"id:{arxiv_id}"
     search = arxiv.Search(
         query=query, max_results=1, sort_by=arxiv.SortCriterion.Relevance
     )
     results = perform_arxiv_search(search)
     for result in results:
-        if result.get_short_id().split("v")[0] == arxiv_id:
-            return result
+        if strip_version(result.get_short_id()) == arxiv_id:
+            record = _record_from_result(result)
+            if store is not None:
+                store.add_papers([record])
+            return _paper_from_record(record)
     return None
 
 
-def get_paper_by_title(title: str) -> Optional[arxiv.Result]:
+def get_paper_by_title(title: str) -> Optional[Paper]:
+    store = get_paper_store()
+    if store is not None:
+        record = store.get_by_title(title)
+        if record is not None or store.offline:
+            return _paper_from_record(record) if record else None
     query = f'ti:"{title}"'
     search = arxiv.Search(
         query=query,
@@ -553,5 +948,8 @@ def get_paper_by_title(title: str) -> Optional[arxiv.Result]:
     results = perform_arxiv_search(search)
     for result in results:
         if result.title.lower() == title.lower():
-            return result
+            record = _record_from_result(result)
+            if store is not None:
+                store.add_papers([record])
+            return _paper_from_record(record)
     return None
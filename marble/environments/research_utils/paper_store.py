@@ -0,0 +1,470 @@
+"""
+Local arXiv metadata store for the research environment.
+
+Papers are kept in SQLite with an FTS5 index over title, abstract, authors and
+categories, ranked with BM25. The store is filled by ingesting metadata dumps
+(the arXiv OAI snapshot JSONL, or records of this store) or by write-through
+from live searches, which also record their result lists so that an identical
+search is answered the same way later; recorded newest-first searches expire
+after a TTL, since new submissions change their answer. With offline set, the
+paper_collector helpers never fall back to the network.
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from marble.utils.logger import get_logger
+
+logger = get_logger("PAPER_STORE")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    arxiv_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    title_key TEXT NOT NULL,
+    abstract TEXT NOT NULL,
+    authors TEXT NOT NULL,
+    domain TEXT,
+    categories TEXT NOT NULL,
+    url TEXT,
+    timestamp INTEGER,
+    sections TEXT,
+    bibliography TEXT
+);
+CREATE INDEX IF NOT EXISTS papers_title_key ON papers(title_key);
+CREATE INDEX IF NOT EXISTS papers_timestamp ON papers(timestamp);
+CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+    title, abstract, authors, categories, content='papers', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS papers_ai AFTER INSERT ON papers BEGIN
+    INSERT INTO papers_fts(rowid, title, abstract, authors, categories)
+    VALUES (new.rowid, new.title, new.abstract, new.authors, new.categories);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_ad AFTER DELETE ON papers BEGIN
+    INSERT INTO papers_fts(papers_fts, rowid, title, abstract, authors, categories)
+    VALUES ('delete', old.rowid, old.title, old.abstract, old.authors, old.categories);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_au AFTER UPDATE ON papers BEGIN
+    INSERT INTO papers_fts(papers_fts, rowid, title, abstract, authors, categories)
+    VALUES ('delete', old.rowid, old.title, old.abstract, old.authors, old.categories);
+    INSERT INTO papers_fts(rowid, title, abstract, authors, categories)
+    VALUES (new.rowid, new.title, new.abstract, new.authors, new.categories);
+END;
+CREATE TABLE IF NOT EXISTS searches (
+    key TEXT PRIMARY KEY,
+    arxiv_ids TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+_UPSERT = """
+INSERT INTO papers (
+    arxiv_id, title, title_key, abstract, authors, domain, categories, url, timestamp,
+    sections, bibliography
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(arxiv_id) DO UPDATE SET
+    title = excluded.title,
+    title_key = excluded.title_key,
+    abstract = excluded.abstract,
+    authors = excluded.authors,
+    domain = excluded.domain,
+    categories = excluded.categories,
+    url = COALESCE(excluded.url, papers.url),
+    timestamp = COALESCE(excluded.timestamp, papers.timestamp),
+    sections = COALESCE(excluded.sections, papers.sections),
+    bibliography = COALESCE(excluded.bibliography, papers.bibliography)
+"""
+
+_VERSION = re.compile(r"v\d+$")
+
+
+def strip_version(arxiv_id: str) -> str:
+    """
+    Remove the version suffix of an arXiv ID ("2101.00001v2" -> "2101.00001").
+
+    Args:
+        arxiv_id (str): The arXiv ID.
+
+    Returns:
+        str: The ID without its version.
+    """
+    return _VERSION.sub("", arxiv_id)
+
+
+def title_key(title: str) -> str:
+    """
+    Normalize a title for case- and whitespace-insensitive lookups.
+
+    Args:
+        title (str): The title.
+
+    Returns:
+        str: The normalized title.
+    """
+    return " ".join(title.lower().split())
+
+
+def fts_terms(text: str) -> List[str]:
+    """
+    Split free text into quoted FTS5 terms, so user input cannot inject query syntax.
+
+    Args:
+        text (str): Free text.
+
+    Returns:
+        List[str]: The quoted terms.
+    """
+    return [f'"{token}"' for token in re.findall(r"\w+", text.lower())]
+
+
+def fts_phrase(text: str) -> str:
+    """
+    Quote free text as one FTS5 phrase.
+
+    Args:
+        text (str): Free text.
+
+    Returns:
+        str: The phrase, or an empty string if the text has no terms.
+    """
+    tokens = re.findall(r"\w+", text.lower())
+    return f'"{" ".join(tokens)}"' if tokens else ""
+
+
+class PaperStore:
+    """
+    SQLite/FTS5 store of arXiv paper metadata and recorded search results.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "cache/papers.sqlite3",
+        offline: bool = False,
+        recent_search_ttl: Optional[float] = 86400.0,
+    ) -> None:
+        """
+        Open (and create if needed) the store.
+
+        Args:
+            db_path (str): Path of the SQLite database.
+            offline (bool): Answer lookups from the store only, without network fallback.
+            recent_search_ttl (Optional[float]): Seconds a recorded newest-first search
+                is replayed before it is run live again; None never expires them.
+        """
+        self.db_path = db_path
+        self.offline = offline
+        self.recent_search_ttl = recent_search_ttl
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets readers run while another process writes
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30.0)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _to_row(record: Dict[str, Any]) -> Tuple[Any, ...]:
+        categories = record.get("categories") or []
+        if isinstance(categories, str):
+            categories = categories.split()
+        return (
+            strip_version(record["arxiv_id"]),
+            record["title"],
+            title_key(record["title"]),
+            record.get("abstract") or "",
+            json.dumps(record.get("authors") or []),
+            record.get("domain") or (categories[0] if categories else None),
+            " ".join(categories),
+            record.get("url"),
+            record.get("timestamp"),
+            json.dumps(record["sections"]) if record.get("sections") else None,
+            json.dumps(record["bibliography"]) if record.get("bibliography") else None,
+        )
+
+    @staticmethod
+    def _to_record(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "arxiv_id": row["arxiv_id"],
+            "title": row["title"],
+            "abstract": row["abstract"],
+            "authors": json.loads(row["authors"]),
+            "domain": row["domain"],
+            "categories": row["categories"].split(),
+            "url": row["url"],
+            "timestamp": row["timestamp"],
+            "sections": json.loads(row["sections"]) if row["sections"] else None,
+            "bibliography": json.loads(row["bibliography"]) if row["bibliography"] else None,
+        }
+
+    def add_papers(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insert or update papers in one transaction.
+
+        Known papers keep their stored sections and bibliography unless the record
+        brings new ones.
+
+        Args:
+            records (Iterable[Dict[str, Any]]): Records with at least arxiv_id and title,
+                and optionally abstract, authors, domain, categories, url, timestamp,
+                sections and bibliography.
+
+        Returns:
+            int: Number of records written.
+        """
+        rows = [self._to_row(record) for record in records]
+        if rows:
+            with self._write_lock, self._connection() as connection:
+                connection.executemany(_UPSERT, rows)
+        return len(rows)
+
+    def get(self, arxiv_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a paper by arXiv ID.
+
+        Args:
+            arxiv_id (str): The arXiv ID, with or without version.
+
+        Returns:
+            Optional[Dict[str, Any]]: The paper record, or None if it is not stored.
+        """
+        row = self._connection().execute(
+            "SELECT * FROM papers WHERE arxiv_id = ?", (strip_version(arxiv_id),)
+        ).fetchone()
+        return self._to_record(row) if row else None
+
+    def get_many(self, arxiv_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get stored papers by arXiv ID, in the order of the IDs.
+
+        Args:
+            arxiv_ids (List[str]): The arXiv IDs.
+
+        Returns:
+            List[Dict[str, Any]]: Records of the IDs that are stored.
+        """
+        records = {}
+        connection = self._connection()
+        # Chunked to stay below SQLite's limit on bound parameters
+        for start in range(0, len(arxiv_ids), 500):
+            chunk = [strip_version(arxiv_id) for arxiv_id in arxiv_ids[start : start + 500]]
+            placeholders = ", ".join("?" * len(chunk))
+            for row in connection.execute(
+                f"SELECT * FROM papers WHERE arxiv_id IN ({placeholders})", chunk
+            ):
+                records[row["arxiv_id"]] = self._to_record(row)
+        return [records[a] for a in map(strip_version, arxiv_ids) if a in records]
+
+    def get_by_title(self, title: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a paper by its exact title, ignoring case and whitespace.
+
+        Args:
+            title (str): The title.
+
+        Returns:
+            Optional[Dict[str, Any]]: The paper record, or None if it is not stored.
+        """
+        row = self._connection().execute(
+            "SELECT * FROM papers WHERE title_key = ? LIMIT 1", (title_key(title),)
+        ).fetchone()
+        return self._to_record(row) if row else None
+
+    def search(
+        self, match: str, max_results: int, newest_first: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Full-text search of the stored papers.
+
+        Args:
+            match (str): An FTS5 query over the title, abstract, authors and categories
+                columns, built from fts_terms/fts_phrase.
+            max_results (int): Maximum number of papers returned.
+            newest_first (bool): Order by publication time instead of BM25 relevance.
+
+        Returns:
+            List[Dict[str, Any]]: The matching paper records.
+        """
+        if not match:
+            return []
+        # Title matches weigh most, then the abstract
+        order = "p.timestamp DESC" if newest_first else "bm25(papers_fts, 4.0, 1.0, 2.0, 1.0)"
+        rows = self._connection().execute(
+            "SELECT p.* FROM papers_fts JOIN papers p ON p.rowid = papers_fts.rowid "
+            f"WHERE papers_fts MATCH ? ORDER BY {order} LIMIT ?",
+            (match, max_results),
+        )
+        return [self._to_record(row) for row in rows]
+
+    def get_search(
+        self, key: str, max_age: Optional[float] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get the papers a live search returned when it was recorded.
+
+        Args:
+            key (str): Key of the search.
+            max_age (Optional[float]): Seconds after which a recording is ignored;
+                recordings never expire if None.
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: The recorded papers, or None if the search
+            was not recorded or its recording expired.
+        """
+        row = self._connection().execute(
+            "SELECT arxiv_ids, created_at FROM searches WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or (max_age is not None and time.time() - row["created_at"] > max_age):
+            return None
+        return self.get_many(json.loads(row["arxiv_ids"]))
+
+    def record_search(self, key: str, records: List[Dict[str, Any]]) -> None:
+        """
+        Store the papers of a live search and record its result list.
+
+        Args:
+            key (str): Key of the search.
+            records (List[Dict[str, Any]]): The papers it returned, in order.
+        """
+        self.add_papers(records)
+        arxiv_ids = json.dumps([strip_version(record["arxiv_id"]) for record in records])
+        with self._write_lock, self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO searches (key, arxiv_ids, created_at) VALUES (?, ?, ?)",
+                (key, arxiv_ids, time.time()),
+            )
+
+    def ingest(self, path: str, batch_size: int = 10000) -> int:
+        """
+        Ingest a JSONL metadata dump.
+
+        Lines may be records of this store or entries of the arXiv OAI metadata
+        snapshot (id, title, abstract, authors_parsed, categories, versions).
+
+        Args:
+            path (str): Path of the dump.
+            batch_size (int): Records written per transaction.
+
+        Returns:
+            int: Number of papers ingested.
+        """
+        count = 0
+        batch: List[Dict[str, Any]] = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                batch.append(self._from_dump(json.loads(line)))
+                if len(batch) >= batch_size:
+                    count += self.add_papers(batch)
+                    batch = []
+        count += self.add_papers(batch)
+        logger.info(f"Ingested {count} papers from {path} into {self.db_path}")
+        return count
+
+    @staticmethod
+    def _from_dump(entry: Dict[str, Any]) -> Dict[str, Any]:
+        if "arxiv_id" in entry:
+            return entry
+        if entry.get("authors_parsed"):
+            authors = [
+                " ".join(part for part in (name[1], name[0]) if part)
+                for name in entry["authors_parsed"]
+            ]
+        else:
+            authors = [a.strip() for a in re.split(r",| and ", entry.get("authors", "")) if a.strip()]
+        timestamp = None
+        if entry.get("versions"):
+            timestamp = int(parsedate_to_datetime(entry["versions"][0]["created"]).timestamp())
+        return {
+            "arxiv_id": entry["id"],
+            "title": " ".join(entry["title"].split()),
+            "abstract": " ".join(entry.get("abstract", "").split()),
+            "authors": authors,
+            "categories": entry.get("categories", ""),
+            "url": f"http://arxiv.org/abs/{entry['id']}",
+            "timestamp": timestamp,
+        }
+
+    def __len__(self) -> int:
+        return int(self._connection().execute("SELECT COUNT(*) FROM papers").fetchone()[0])
+
+
+_paper_store: Optional[PaperStore] = None
+_configured = False
+_config_lock = threading.Lock()
+
+
+def configure_paper_store(
+    db_path: Optional[str] = "cache/papers.sqlite3",
+    offline: bool = False,
+    recent_search_ttl: Optional[float] = 86400.0,
+) -> Optional[PaperStore]:
+    """
+    Install the process-wide paper store used by the paper_collector helpers.
+
+    Args:
+        db_path (Optional[str]): Path of the SQLite database; None disables the store.
+        offline (bool): Answer lookups from the store only, without network fallback.
+        recent_search_ttl (Optional[float]): Seconds a recorded newest-first search
+            is replayed; None never expires them.
+
+    Returns:
+        Optional[PaperStore]: The installed store, or None if it is disabled.
+    """
+    global _paper_store, _configured
+    with _config_lock:
+        _paper_store = (
+            PaperStore(db_path, offline=offline, recent_search_ttl=recent_search_ttl)
+            if db_path
+            else None
+        )
+        _configured = True
+        if _paper_store is not None:
+            logger.info(f"Paper store at {db_path}{' (offline)' if offline else ''}")
+        return _paper_store
+
+
+def get_paper_store() -> Optional[PaperStore]:
+    """
+    Get the process-wide paper store.
+
+    Unless configure_paper_store was called, the store is enabled when the
+    MARBLE_PAPER_STORE environment variable names its database, offline if
+    MARBLE_PAPER_STORE_OFFLINE is set, and off otherwise.
+
+    Returns:
+        Optional[PaperStore]: The active store, or None if it is disabled.
+    """
+    if not _configured:
+        configure_paper_store(
+            db_path=os.environ.get("MARBLE_PAPER_STORE") or None,
+            offline=bool(os.environ.get("MARBLE_PAPER_STORE_OFFLINE")),
+        )
+    return _paper_store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest arXiv metadata dumps into a paper store.")
+    parser.add_argument("dumps", nargs="+", help="JSONL metadata dumps.")
+    parser.add_argument("--db_path", default="cache/papers.sqlite3", help="Store database.")
+    args = parser.parse_args()
+    store = PaperStore(args.db_path)
+    for dump in args.dumps:
+        store.ingest(dump)
+    print(f"{len(store)} papers in {args.db_path}")
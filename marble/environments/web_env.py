@@ -1,4 +1,3 @@
-import time
 from typing import Any, Dict
 
 import requests
@@ -6,6 +5,7 @@ from bs4 import BeautifulSoup
 from litellm.utils import trim_messages
 
 from marble.environments.base_env import BaseEnvironment
+from marble.utils.http_client import get_http_client
 
 
 class WebEnvironment(BaseEnvironment):
@@ -16,9 +16,8 @@ class WebEnvironment(BaseEnvironment):
             name (str): The name of the environment.
         """
         super().__init__(name, config)
-        self.last_visited_timestamp: float = 0
         self.last_visited_url: str = ""
-        self.web_cache: Dict[str, str] = {}  # Cache for storing webpage content
+        self.last_visited_content: str = ""
 
         # Register the fetch_webpage action
         fetch_webpage_description = {
@@ -85,32 +84,16 @@ class WebEnvironment(BaseEnvironment):
                 "error-msg": "URL is required to fetch a webpage.",
             }
 
-        # Check if the URL is already cached
-        if url in self.web_cache:
-            content = self.web_cache[url]
-        else:
-            # Set up a browser-like User-Agent
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36 Edg/114.0.0.0"
+        # The shared client caches pages and spaces out requests to the same host
+        try:
+            content = get_http_client().get_text(url)
+        except requests.RequestException as e:
+            return {
+                "success": False,
+                "error-msg": str(e),
             }
-
-            while time.time() - self.last_visited_timestamp < 1:
-                time.sleep(0.5)
-
-            try:
-                response = requests.get(
-                    url, headers=headers, timeout=5.0
-                )  # 5 second timeout
-                response.raise_for_status()  # Raise an error for bad responses
-                content = response.text
-                self.web_cache[url] = content
-                self.last_visited_url = url
-                self.last_visited_timestamp = time.time()
-            except requests.RequestException as e:
-                return {
-                    "success": False,
-                    "error-msg": str(e),
-                }
+        self.last_visited_url = url
+        self.last_visited_content = content
 
         # Extract text content and trim it
         extracted_text = self.extract_text_from_html(content)
@@ -135,7 +118,5 @@ class WebEnvironment(BaseEnvironment):
         """
         return {
             "url": self.last_visited_url,
-            "content": self.web_cache[self.last_visited_url]
-            if self.last_visited_url
-            else "",
+            "content": self.last_visited_content,
         }
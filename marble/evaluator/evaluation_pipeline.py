@@ -0,0 +1,116 @@
+"""
+Background evaluation stage for the engine.
+
+The per-iteration LLM judgments (communication, planning, KPI) do not feed the
+planner's continue/stop decision, so the engine submits them to this pipeline
+and only waits for them right before their results are read.
+"""
+
+import contextvars
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+from marble.utils.logger import get_logger
+
+_Job = Tuple[Future, contextvars.Context, Callable[..., Any], Tuple[Any, ...]]
+
+
+class EvaluationPipeline:
+    """
+    A job queue drained by a fixed set of worker threads.
+    """
+
+    def __init__(self, num_workers: int = 3):
+        """
+        Initialize the pipeline.
+
+        Args:
+            num_workers (int): Number of worker threads. With 0 every job runs inline on submit.
+        """
+        self.logger = get_logger(self.__class__.__name__)
+        self.num_workers = max(0, num_workers)
+        self._queue: "queue.Queue[Optional[_Job]]" = queue.Queue()
+        self._workers: List[threading.Thread] = []
+        self._pending: List[Future] = []
+        self._lock = threading.Lock()
+
+    def _ensure_workers(self) -> None:
+        if self._workers:
+            return
+        for index in range(self.num_workers):
+            worker = threading.Thread(
+                target=self._work, name=f"evaluation-{index}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                return
+            future, context, func, args = job
+            if future.set_running_or_notify_cancel():
+                try:
+                    # Run in the submitter's context so context-local state follows the job
+                    future.set_result(context.run(func, *args))
+                except BaseException as e:
+                    future.set_exception(e)
+            self._queue.task_done()
+
+    def submit(self, func: Callable[..., Any], *args: Any) -> Future:
+        """
+        Queue an evaluation job.
+
+        Args:
+            func (Callable[..., Any]): The evaluation to run, e.g. Evaluator.evaluate_kpi.
+            *args (Any): Positional arguments for the evaluation.
+
+        Returns:
+            Future: Future holding the result of the evaluation.
+        """
+        future: Future = Future()
+        if self.num_workers == 0:
+            future.set_running_or_notify_cancel()
+            try:
+                future.set_result(func(*args))
+            except BaseException as e:
+                future.set_exception(e)
+        else:
+            with self._lock:
+                self._ensure_workers()
+                self._queue.put((future, contextvars.copy_context(), func, args))
+        with self._lock:
+            self._pending.append(future)
+        return future
+
+    def join(self) -> None:
+        """
+        Wait for every submitted evaluation to finish.
+
+        Raises:
+            Exception: The first error raised by an evaluation, after all of them finished.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        error: Optional[BaseException] = None
+        for future in pending:
+            exception = future.exception()
+            if exception is not None and error is None:
+                error = exception
+        if error is not None:
+            raise error
+
+    def shutdown(self) -> None:
+        """
+        Stop the worker threads once the queued jobs are done.
+        """
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for _ in workers:
+            self._queue.put(None)
+        for worker in workers:
+            worker.join()
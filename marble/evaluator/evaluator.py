@@ -12,7 +12,9 @@ from ruamel.yaml import YAML
 from marble.agent import BaseAgent
 from marble.environments import BaseEnvironment
 from marble.llms.model_prompting import model_prompting
+from marble.llms.token_ledger import token_scope
 from marble.utils.logger import get_logger
+from marble.utils.tracing import traced
 from marble.utils import coding_config_util
 
 CODING_CONFIG = coding_config_util.read_coding_config()
@@ -66,6 +68,7 @@ class Evaluator:
         total_tokens = sum(agent.get_token_usage() for agent in agents)
         self.metrics["token_consumption"].append(total_tokens)
 
+    @traced("evaluator.communication", category="evaluator")
     def evaluate_communication(self, task: str, communications: str) -> None:
         """
         Evaluate communication between agents and update the communication score.
@@ -79,21 +82,23 @@ class Evaluator:
         # Fill in the placeholders {task} and {communications}
         prompt = communication_prompt_template.format(task=task, communications=communications)
         # Call the language model
-        result = model_prompting(
-            llm_model=self.llm,
-            messages=[{"role": "user", "content": prompt}],
-            return_num=1,
-            max_token_num=512,
-            temperature=0.0,
-            top_p=None,
-            stream=None,
-        )[0]
+        with token_scope(component="evaluator"):
+            result = model_prompting(
+                llm_model=self.llm,
+                messages=[{"role": "user", "content": prompt}],
+                return_num=1,
+                max_token_num=512,
+                temperature=0.0,
+                top_p=None,
+                stream=None,
+            )[0]
         # Parse the score from result.content
         assert isinstance(result.content, str)
         score = self.parse_score(result.content)
         # Update the metric
         self.metrics["communication_score"].append(score)
 
+    @traced("evaluator.planning", category="evaluator")
     def evaluate_planning(self, summary: str, agent_profiles: str, agent_tasks: str, results: str) -> None:
         """
         Evaluate planning and self-coordination among agents and update the planning score.
@@ -114,21 +119,23 @@ class Evaluator:
             results=results
         )
         # Call the language model
-        result = model_prompting(
-            llm_model=self.llm,
-            messages=[{"role": "user", "content": prompt}],
-            return_num=1,
-            max_token_num=512,
-            temperature=0.0,
-            top_p=None,
-            stream=None,
-        )[0]
+        with token_scope(component="evaluator"):
+            result = model_prompting(
+                llm_model=self.llm,
+                messages=[{"role": "user", "content": prompt}],
+                return_num=1,
+                max_token_num=512,
+                temperature=0.0,
+                top_p=None,
+                stream=None,
+            )[0]
         # Parse the score from result.content
         assert isinstance(result.content, str)
         score = self.parse_score(result.content)
         # Update the metric
         self.metrics["planning_score"].append(score)
 
+    @traced("evaluator.kpi", category="evaluator")
     def evaluate_kpi(self, task: str, agent_results: str) -> None:
         """
         Evaluate milestones achieved and update agent KPIs.
@@ -146,15 +153,16 @@ class Evaluator:
         # Fill in the placeholders {task} and {agent_results}
         prompt = kpi_prompt_template.format(task=task, agent_results=agent_results)
         # Call the language model
-        result = model_prompting(
-            llm_model=self.llm,
-            messages=[{"role": "user", "content": prompt}],
-            return_num=1,
-            max_token_num=512,
-            temperature=0.0,
-            top_p=None,
-            stream=None,
-        )[0]
+        with token_scope(component="evaluator"):
+            result = model_prompting(
+                llm_model=self.llm,
+                messages=[{"role": "user", "content": prompt}],
+                return_num=1,
+                max_token_num=512,
+                temperature=0.0,
+                top_p=None,
+                stream=None,
+            )[0]
         # Parse the milestones from result.content
         assert isinstance(result.content, str)
         milestones = self.parse_milestones(result.content)
@@ -170,6 +178,7 @@ class Evaluator:
                     self.metrics["agent_kpis"][agent_id] = 1
         self.logger.debug(f"LLM Response: {result.content}")
 
+    @traced("evaluator.task_research", category="evaluator")
     def evaluate_task_research(self, task: str, result: str) -> None:
         """
         Evaluate the final research idea based on innovation, safety, and feasibility.
@@ -183,15 +192,16 @@ class Evaluator:
         # Fill in the placeholders {task} and {result}
         prompt = research_prompt_template.format(task=task, result=result)
         # Call the language model
-        llm_response = model_prompting(
-            llm_model=self.llm,
-            messages=[{"role": "user", "content": prompt}],
-            return_num=1,
-            max_token_num=512,
-            temperature=0.0,
-            top_p=None,
-            stream=None,
-        )[0]
+        with token_scope(component="evaluator"):
+            llm_response = model_prompting(
+                llm_model=self.llm,
+                messages=[{"role": "user", "content": prompt}],
+                return_num=1,
+                max_token_num=512,
+                temperature=0.0,
+                top_p=None,
+                stream=None,
+            )[0]
         # Parse the ratings from llm_response.content
         assert isinstance(llm_response.content, str)
         ratings = self.parse_research_ratings(llm_response.content)
@@ -201,6 +211,7 @@ class Evaluator:
         else:
             self.logger.error("Failed to parse research ratings.")
 
+    @traced("evaluator.task_world", category="evaluator")
     def evaluate_task_world(self, task: str, result: str) -> None:
         """
         Evaluate the final world idea based on Effectiveness of Strategies, Progress and Outcome and Interaction Dynamics
@@ -225,15 +236,16 @@ class Evaluator:
             raise ValueError(f"Invalid person: {person}")
         prompt = prompt_template.format(task=task, result=result)
 
-        llm_response = model_prompting(
-            llm_model=self.llm,
-            messages=[{"role": "user", "content": prompt}],
-            return_num=1,
-            max_token_num=512,
-            temperature=0.0,
-            top_p=None,
-            stream=None,
-        )[0]
+        with token_scope(component="evaluator"):
+            llm_response = model_prompting(
+                llm_model=self.llm,
+                messages=[{"role": "user", "content": prompt}],
+                return_num=1,
+                max_token_num=512,
+                temperature=0.0,
+                top_p=None,
+                stream=None,
+            )[0]
 
         ratings = self.parse_task_world_evaluation(llm_response.content)
         self.logger.info(f"Parse task world ratings for {person}: {ratings}")
@@ -298,6 +310,7 @@ class Evaluator:
             self.logger.error(f"Failed to parse task world ratings: {llm_response}")
             return default_ratings  # 解析失败则返回默认评分
 
+    @traced("evaluator.task_db", category="evaluator")
     def evaluate_task_db(self, task: str, result: str, labels: List[str], pred_num: int, root_causes: List[str]) -> None:
         """
         Evaluate the final database idea based on Data Quality, Data Security, and Data Privacy.
@@ -523,6 +536,7 @@ class Evaluator:
                 "quality": 1
             }
 
+    @traced("evaluator.code_quality", category="evaluator")
     def evaluate_code_quality(self) -> None:
         """
         Evaluate the code quality based on stricter criteria.
@@ -553,15 +567,16 @@ class Evaluator:
             )
 
             # Call the LLM
-            response = model_prompting(
-                llm_model=self.llm,
-                messages=[{"role": "user", "content": prompt}],
-                return_num=1,
-                max_token_num=4096,
-                temperature=0.0,
-                top_p=None,
-                stream=None,
-            )[0]
+            with token_scope(component="evaluator"):
+                response = model_prompting(
+                    llm_model=self.llm,
+                    messages=[{"role": "user", "content": prompt}],
+                    return_num=1,
+                    max_token_num=4096,
+                    temperature=0.0,
+                    top_p=None,
+                    stream=None,
+                )[0]
 
             scores = self.parse_code_quality_scores(response.content)
 
@@ -587,6 +602,7 @@ class Evaluator:
                 "quality": 1
             }
 
+    @traced("evaluator.task_training", category="evaluator")
     def evaluate_task_training(self, task: str, result: str) -> None:
         """
         Evaluate the final training plan
@@ -600,15 +616,16 @@ class Evaluator:
         # Fill in the placeholders {task} and {result}
         prompt = training_prompt_template.format(task=task, result=result)
         # Call the language model
-        llm_response = model_prompting(
-            llm_model=self.llm,
-            messages=[{"role": "user", "content": prompt}],
-            return_num=1,
-            max_token_num=512,
-            temperature=0.0,
-            top_p=None,
-            stream=None,
-        )[0]
+        with token_scope(component="evaluator"):
+            llm_response = model_prompting(
+                llm_model=self.llm,
+                messages=[{"role": "user", "content": prompt}],
+                return_num=1,
+                max_token_num=512,
+                temperature=0.0,
+                top_p=None,
+                stream=None,
+            )[0]
         # Parse the ratings from llm_response.content
         assert isinstance(llm_response.content, str)
         ratings = self.parse_training_ratings(llm_response.content)
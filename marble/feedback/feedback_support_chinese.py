@@ -1,3 +1,5 @@
+from typing import Optional
+
 from marble.memory import BaseMemory
 
 def generate_agent_task_planning_prompt(
@@ -101,7 +103,8 @@ def generate_agent_task_execution_prompt(
     reasoning_prompt: str,
     task: str,
     agent_descriptions: list[str],
-    full_feedback: dict
+    full_feedback: dict,
+    memory_token_budget: Optional[int] = None
 ) -> str:
     """
     嵌入完整反馈包的任务执行提示词（处理full_feedback为{}或None的边界情况）
@@ -191,6 +194,6 @@ These are the ids and profiles of other agents you can interact with:
 {agent_descriptions}
 But you do not have to communicate with other agents.
 You can also solve the task by calling other functions to solve it by yourself.
-These are your memory: {memory.get_memory_str()}
+These are your memory: {memory.render(memory_token_budget)}
 """
     return final_prompt
\ No newline at end of file
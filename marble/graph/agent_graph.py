@@ -2,6 +2,7 @@
 Agent graph module for representing agent structures and interactions.
 """
 
+import threading
 from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from marble.agent.base_agent import BaseAgent
@@ -18,6 +19,7 @@ class AgentGraph:
         agents (Dict[str, BaseAgent]): A dictionary of agent_id to agent instances.
         adjacency_list (Dict[str, List[str]]): The graph represented as an adjacency list.
         relationships (List[Tuple[str, str, str]]): List of relationships as triples.
+        version (int): Counter bumped on every change to the agents or relationships.
     """
 
     def __init__(self, agents: Sequence[BaseAgent], structure_config: Config) -> None:
@@ -35,7 +37,15 @@ class AgentGraph:
         self.logger = get_logger(self.__class__.__name__)
         self.agents = {agent.agent_id: agent for agent in agents}
         self.adjacency_list: Dict[str, List[str]] = {}  # Initialize adjacency_list
-        self.relationships: List[Tuple[str, str, str]] = []
+        # Typed edges in insertion order, plus forward and reverse adjacency maps
+        self._edges: Dict[Tuple[str, str], Tuple[str, int]] = {}
+        self._out: Dict[str, Dict[str, str]] = {agent_id: {} for agent_id in self.agents}
+        self._in: Dict[str, Dict[str, str]] = {agent_id: {} for agent_id in self.agents}
+        self._edge_counter = 0
+        self._relationships_cache: Optional[Tuple[int, List[Tuple[str, str, str]]]] = None
+        self._neighbor_cache: Dict[str, Tuple[int, Dict[str, Dict[str, Any]]]] = {}
+        self._lock = threading.RLock()
+        self.version = 0
         self.coordination_mode = structure_config.coordination_mode
         self.logger.info(
             f"AgentGraph initialized with execution mode '{self.coordination_mode}'."
@@ -80,6 +90,75 @@ class AgentGraph:
     #     for agent_id in self.agents:
     #         self.adjacency_list.setdefault(agent_id, [])
 
+    @property
+    def relationships(self) -> List[Tuple[str, str, str]]:
+        """
+        Relationships as (source, target, type) triples in the order they were added.
+        """
+        with self._lock:
+            cached = self._relationships_cache
+            if cached is None or cached[0] != self.version:
+                cached = (
+                    self.version,
+                    [(source, target, rel) for (source, target), (rel, _) in self._edges.items()],
+                )
+                self._relationships_cache = cached
+            return list(cached[1])
+
+    def _changed(self) -> None:
+        """Invalidate the derived views. Called with the lock held."""
+        self.version += 1
+
+    def get_relationship(self, source: str, target: str) -> Optional[str]:
+        """
+        Get the type of the relationship from one agent to another.
+
+        Args:
+            source (str): Source agent ID.
+            target (str): Target agent ID.
+
+        Returns:
+            Optional[str]: The relationship type, or None if there is none.
+        """
+        return self._out.get(source, {}).get(target)
+
+    def get_neighbors(self, agent_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the agents an agent has a relationship with, in either direction.
+
+        The view is cached per agent until the graph changes, so repeated calls cost
+        O(1) and rebuilding it costs O(degree).
+
+        Args:
+            agent_id (str): The ID of the agent.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Maps each neighbour ID to its "profile" and the
+            "role" triple rendered as "<source> <type> <target>". Neighbours are ordered by
+            when their relationship was added; the most recent one wins for each neighbour.
+        """
+        with self._lock:
+            cached = self._neighbor_cache.get(agent_id)
+            if cached is not None and cached[0] == self.version:
+                return dict(cached[1])
+            incident = [
+                (self._edges[(agent_id, target)][1], agent_id, target, rel)
+                for target, rel in self._out.get(agent_id, {}).items()
+            ] + [
+                (self._edges[(source, agent_id)][1], source, agent_id, rel)
+                for source, rel in self._in.get(agent_id, {}).items()
+                if source != agent_id
+            ]
+            neighbors: Dict[str, Dict[str, Any]] = {}
+            for _, source, target, rel in sorted(incident):
+                neighbor_id = target if source == agent_id else source
+                neighbors[neighbor_id] = {
+                    "profile": self.agents[neighbor_id].get_profile(),
+                    "role": f"{source} {rel} {target}",
+                }
+            self._neighbor_cache[agent_id] = (self.version, neighbors)
+            return dict(neighbors)
+
     # CRUD Operations
 
     def add_agent(self, agent: BaseAgent) -> None:
@@ -94,8 +173,12 @@ class AgentGraph:
         """
         if agent.agent_id in self.agents:
             raise ValueError(f"Agent '{agent.agent_id}' already exists.")
-        self.agents[agent.agent_id] = agent
-        self.adjacency_list[agent.agent_id] = []
+        with self._lock:
+            self.agents[agent.agent_id] = agent
+            self.adjacency_list[agent.agent_id] = []
+            self._out[agent.agent_id] = {}
+            self._in[agent.agent_id] = {}
+            self._changed()
         self.logger.info(f"Agent '{agent.agent_id}' added to the graph.")
 
     def remove_agent(self, agent_id: str) -> None:
@@ -116,17 +199,21 @@ class AgentGraph:
         for children in self.adjacency_list.values():
             if agent_id in children:
                 children.remove(agent_id)
-        # Remove relationships
-        self.relationships = [
-            rel
-            for rel in self.relationships
-            if rel[0] != agent_id and rel[1] != agent_id
-        ]
-        # Remove relationships from agents
-        for agent in self.agents.values():
-            agent.relationships.pop(agent_id, None)
-        # Remove from agents
-        del self.agents[agent_id]
+        with self._lock:
+            # Remove relationships in O(degree) through the adjacency maps
+            for target in self._out.pop(agent_id, {}):
+                self._edges.pop((agent_id, target), None)
+                self._in.get(target, {}).pop(agent_id, None)
+            for source in self._in.pop(agent_id, {}):
+                self._edges.pop((source, agent_id), None)
+                self._out.get(source, {}).pop(agent_id, None)
+                # Remove relationships from agents
+                if source in self.agents:
+                    self.agents[source].relationships.pop(agent_id, None)
+            self._neighbor_cache.pop(agent_id, None)
+            # Remove from agents
+            del self.agents[agent_id]
+            self._changed()
         self.logger.info(f"Agent '{agent_id}' removed from the graph.")
 
     def update_agent(self, agent_id: str, **kwargs: Any) -> None:
@@ -143,6 +230,9 @@ class AgentGraph:
         if agent_id not in self.agents:
             raise ValueError(f"Agent '{agent_id}' does not exist.")
         agent = self.agents[agent_id]
+        with self._lock:
+            # Neighbour views include agent profiles
+            self._changed()
         for key, value in kwargs.items():
             if hasattr(agent, key):
                 setattr(agent, key, value)
@@ -187,8 +277,17 @@ class AgentGraph:
             raise ValueError(f"Source agent '{source}' does not exist.")
         if target not in self.agents:
             raise ValueError(f"Target agent '{target}' does not exist.")
-        self.relationships.append((source, target, rel_type))
-        self.agents[source].relationships[target] = rel_type
+        with self._lock:
+            if (source, target) in self._edges:
+                # Keep the original position of a re-added relationship
+                self._edges[(source, target)] = (rel_type, self._edges[(source, target)][1])
+            else:
+                self._edge_counter += 1
+                self._edges[(source, target)] = (rel_type, self._edge_counter)
+            self._out[source][target] = rel_type
+            self._in[target][source] = rel_type
+            self.agents[source].relationships[target] = rel_type
+            self._changed()
         if rel_type == "parent":
             parent_agent = self.agents[source]
             child_agent = self.agents[target]
@@ -207,17 +306,16 @@ class AgentGraph:
         Raises:
             ValueError: If the relationship does not exist.
         """
-        rel_to_remove = None
-        for rel in self.relationships:
-            if rel[0] == source and rel[1] == target:
-                rel_to_remove = rel
-                break
-        if not rel_to_remove:
-            raise ValueError(
-                f"Relationship from '{source}' to '{target}' does not exist."
-            )
-        self.relationships.remove(rel_to_remove)
-        del self.agents[source].relationships[target]
+        with self._lock:
+            if (source, target) not in self._edges:
+                raise ValueError(
+                    f"Relationship from '{source}' to '{target}' does not exist."
+                )
+            del self._edges[(source, target)]
+            del self._out[source][target]
+            del self._in[target][source]
+            del self.agents[source].relationships[target]
+            self._changed()
         self.logger.info(f"Relationship removed: {source} --> {target}")
 
     def update_relationship(self, source: str, target: str, new_type: str) -> None:
@@ -232,15 +330,17 @@ class AgentGraph:
         Raises:
             ValueError: If the relationship does not exist.
         """
-        for idx, rel in enumerate(self.relationships):
-            if rel[0] == source and rel[1] == target:
-                self.relationships[idx] = (source, target, new_type)
-                self.agents[source].relationships[target] = new_type
-                self.logger.info(
-                    f"Relationship updated: {source} --[{new_type}]--> {target}"
+        with self._lock:
+            if (source, target) not in self._edges:
+                raise ValueError(
+                    f"Relationship from '{source}' to '{target}' does not exist."
                 )
-                return
-        raise ValueError(f"Relationship from '{source}' to '{target}' does not exist.")
+            self._edges[(source, target)] = (new_type, self._edges[(source, target)][1])
+            self._out[source][target] = new_type
+            self._in[target][source] = new_type
+            self.agents[source].relationships[target] = new_type
+            self._changed()
+        self.logger.info(f"Relationship updated: {source} --[{new_type}]--> {target}")
 
     # Existing methods remain unchanged...
 
@@ -294,6 +394,27 @@ class AgentGraph:
             }
         return profiles
 
+    def get_agent_profiles_linked(self, agent_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Get profiles of the agents an agent has a relationship with.
+
+        Args:
+            agent_id (str): The ID of the agent.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Profiles of the neighbouring agents, in the format
+            of get_agent_profiles.
+        """
+        profiles = {}
+        for neighbor_id in self.get_neighbors(agent_id):
+            agent = self.agents[neighbor_id]
+            profiles[neighbor_id] = {
+                "agent_id": agent.agent_id,
+                "relationships": agent.relationships,
+                "profile": agent.get_profile(),
+            }
+        return profiles
+
     def get_roots(self) -> List[BaseAgent]:
         """
         Get the root agents (agents with no parents).
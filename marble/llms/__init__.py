@@ -1,5 +1,6 @@
-from .model_prompting import model_prompting
+from .model_prompting import amodel_prompting, model_prompting
 
 __all__ = [
     "model_prompting",
+    "amodel_prompting",
 ]
@@ -0,0 +1,234 @@
+"""
+Process-wide cap on the number of in-flight LLM calls.
+
+Coordination modes that fan work out over threads (parallel agents, sibling
+subtrees) share a single semaphore, so widening the fan-out never floods the
+provider with more concurrent requests than configured.
+"""
+
+import asyncio
+import threading
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncContextManager, AsyncIterator, ContextManager, Deque, Iterator, Optional
+
+from marble.utils.logger import get_logger
+
+logger = get_logger("LLM_CONCURRENCY")
+
+# A threading semaphore, or a multiprocessing one shared by a process pool
+_semaphore: Optional[Any] = None
+_max_concurrent_calls: Optional[int] = None
+_config_lock = threading.Lock()
+
+# Polling interval of async waiters on semaphores without a waiter queue
+_POLL_INTERVAL = 0.01
+
+
+class _Waiter:
+    """A blocked acquirer: a thread waiting on an event, or a coroutine awaiting a future."""
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop
+        self.future: Optional["asyncio.Future[None]"] = loop.create_future() if loop else None
+        self.event: Optional[threading.Event] = None if loop else threading.Event()
+
+
+class SlotSemaphore:
+    """
+    Bounded semaphore shared by threads and event loops.
+
+    Blocked acquirers wait in one FIFO queue and a release hands its slot straight
+    to the next of them. Coroutines wait on a future of their own loop, so no
+    worker thread is parked per waiter.
+    """
+
+    def __init__(self, value: int):
+        """
+        Initialize the semaphore.
+
+        Args:
+            value (int): Number of slots.
+        """
+        self._initial = value
+        self._value = value
+        self._waiters: Deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self, blocking: bool = True, timeout: Optional[float] = None) -> bool:
+        """
+        Take a slot, waiting for one if blocking, like threading.Semaphore.acquire.
+
+        Args:
+            blocking (bool): Wait for a slot if none is free.
+            timeout (Optional[float]): Maximum seconds to wait; forever if None.
+
+        Returns:
+            bool: Whether a slot was taken.
+        """
+        with self._lock:
+            if self._value > 0 and not self._waiters:
+                self._value -= 1
+                return True
+            if not blocking:
+                return False
+            waiter = _Waiter()
+            self._waiters.append(waiter)
+        assert waiter.event is not None
+        if waiter.event.wait(timeout):
+            return True
+        with self._lock:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                return False
+        # The slot was handed over just as the wait timed out
+        return True
+
+    async def acquire_async(self) -> None:
+        """
+        Take a slot, waiting for one without blocking the event loop.
+        """
+        with self._lock:
+            if self._value > 0 and not self._waiters:
+                self._value -= 1
+                return
+            waiter = _Waiter(asyncio.get_running_loop())
+            self._waiters.append(waiter)
+        assert waiter.future is not None
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise
+            # Already handed a slot: give it back, unless _grant does so itself
+            if not waiter.future.cancelled():
+                self.release()
+            raise
+
+    def _grant(self, waiter: _Waiter) -> None:
+        assert waiter.future is not None
+        if waiter.future.cancelled():
+            # The waiter gave up before the slot reached it
+            self.release()
+        else:
+            waiter.future.set_result(None)
+
+    def release(self) -> None:
+        """
+        Give a slot back, handing it to the longest waiting acquirer if any.
+
+        Raises:
+            ValueError: If released more often than acquired.
+        """
+        while True:
+            with self._lock:
+                if not self._waiters:
+                    if self._value >= self._initial:
+                        raise ValueError("Semaphore released too many times")
+                    self._value += 1
+                    return
+                waiter = self._waiters.popleft()
+            if waiter.event is not None:
+                waiter.event.set()
+                return
+            assert waiter.loop is not None
+            try:
+                waiter.loop.call_soon_threadsafe(self._grant, waiter)
+                return
+            except RuntimeError:
+                # The waiter's loop is closed; try the next one
+                continue
+
+
+def configure_llm_concurrency(
+    max_concurrent_calls: Optional[int], semaphore: Optional[Any] = None
+) -> None:
+    """
+    Set the maximum number of LLM calls allowed in flight at once.
+
+    Args:
+        max_concurrent_calls (Optional[int]): The cap; None or a value below 1 removes it.
+        semaphore (Optional[Any]): Semaphore to enforce the cap with, e.g. a
+            multiprocessing semaphore shared by the workers of a process pool. A new
+            thread-level semaphore is created if not given.
+    """
+    global _semaphore, _max_concurrent_calls
+    with _config_lock:
+        if max_concurrent_calls is None or max_concurrent_calls < 1:
+            _semaphore = None
+            _max_concurrent_calls = None
+        else:
+            _semaphore = (
+                semaphore
+                if semaphore is not None
+                else SlotSemaphore(max_concurrent_calls)
+            )
+            _max_concurrent_calls = max_concurrent_calls
+            logger.info(f"Limiting in-flight LLM calls to {max_concurrent_calls}")
+
+
+def get_max_concurrent_llm_calls() -> Optional[int]:
+    """
+    Get the configured cap on in-flight LLM calls.
+
+    Returns:
+        Optional[int]: The cap, or None if calls are not limited.
+    """
+    return _max_concurrent_calls
+
+
+@contextmanager
+def semaphore_slot(semaphore: Optional[Any]) -> Iterator[None]:
+    """
+    Hold one slot of a semaphore for the duration of the block.
+
+    Args:
+        semaphore (Optional[Any]): The semaphore; None holds nothing.
+    """
+    if semaphore is None:
+        yield
+        return
+    semaphore.acquire()
+    try:
+        yield
+    finally:
+        semaphore.release()
+
+
+@asynccontextmanager
+async def async_semaphore_slot(semaphore: Optional[Any]) -> AsyncIterator[None]:
+    """
+    Asynchronous variant of semaphore_slot that does not block the event loop while waiting.
+
+    Args:
+        semaphore (Optional[Any]): The semaphore; None holds nothing.
+    """
+    if semaphore is None:
+        yield
+        return
+    if isinstance(semaphore, SlotSemaphore):
+        await semaphore.acquire_async()
+    else:
+        # e.g. a multiprocessing semaphore, whose release cannot wake a coroutine
+        while not semaphore.acquire(False):
+            await asyncio.sleep(_POLL_INTERVAL)
+    try:
+        yield
+    finally:
+        semaphore.release()
+
+
+def llm_call_slot() -> ContextManager[None]:
+    """
+    Hold one in-flight LLM call slot for the duration of the block.
+    """
+    return semaphore_slot(_semaphore)
+
+
+def async_llm_call_slot() -> AsyncContextManager[None]:
+    """
+    Asynchronous variant of llm_call_slot that does not block the event loop while waiting.
+    """
+    return async_semaphore_slot(_semaphore)
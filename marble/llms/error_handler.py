@@ -1,15 +1,62 @@
+import asyncio
 import math
 import time
 from functools import wraps
 
-from beartype.typing import Any, Callable, List, Optional, Set, TypeVar, Union, cast
+from beartype.typing import (
+    Any,
+    Awaitable,
+    Callable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+    cast,
+)
 from pydantic import BaseModel
 
+from marble.utils.tracing import add_span_event
+
 INF = float(math.inf)
 
 T = TypeVar("T", bound=Callable[..., Union[Optional[List[Any]], Set[str]]])
 
 
+def _backoff_settings(kwargs: Any, retries: int, base_wait_time: int) -> Tuple[int, int]:
+    """
+    Get the retries and base wait time of a call; mode="TEST" tries once.
+    """
+    if kwargs.get("mode", None) == "TEST":
+        return 1, 1
+    return retries, base_wait_time
+
+
+def _backoff_wait(attempt: int, base_wait_time: int, error: Exception) -> int:
+    """
+    Report a failed attempt and get how long to wait before the next one.
+
+    Args:
+        attempt (int): Number of failed attempts so far, starting at 0.
+        base_wait_time (int): Base wait time in seconds.
+        error (Exception): The error of the attempt.
+
+    Returns:
+        int: Seconds to wait.
+    """
+    wait_time = base_wait_time * (2**attempt)
+    print(f"Attempt {attempt + 1} failed: {error}")
+    print(f"Waiting {wait_time} seconds before retrying...")
+    add_span_event("retry", attempt=attempt + 1, wait=wait_time, error=str(error))
+    return wait_time
+
+
+def _backoff_exhausted(func_name: str, retries: int) -> None:
+    print(f"Failed to execute '{func_name}' after {retries} retries.")
+    add_span_event("retries_exhausted", retries=retries)
+
+
 def api_calling_error_exponential_backoff(
     retries: int = 5, base_wait_time: int = 1
 ) -> Callable[[T], T]:
@@ -23,27 +70,15 @@ def api_calling_error_exponential_backoff(
     def decorator(func: T) -> T:
         @wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> Optional[List[str]]:
-            error_handler_mode = kwargs.get("mode", None)
-            if error_handler_mode == "TEST":
-                modified_retries = 1
-                modified_base_wait_time = 1
-            else:
-                modified_retries = retries
-                modified_base_wait_time = base_wait_time
-
-            attempts = 0
-            while attempts < modified_retries:
+            modified_retries, modified_base_wait_time = _backoff_settings(
+                kwargs, retries, base_wait_time
+            )
+            for attempt in range(modified_retries):
                 try:
                     return func(*args, **kwargs)
                 except Exception as e:
-                    wait_time = modified_base_wait_time * (2**attempts)
-                    print(f"Attempt {attempts + 1} failed: {e}")
-                    print(f"Waiting {wait_time} seconds before retrying...")
-                    time.sleep(wait_time)
-                    attempts += 1
-            print(
-                f"Failed to execute '{func.__name__}' after {modified_retries} retries."
-            )
+                    time.sleep(_backoff_wait(attempt, modified_base_wait_time, e))
+            _backoff_exhausted(func.__name__, modified_retries)
             return None
 
         return cast(T, wrapper)
@@ -51,6 +86,39 @@ def api_calling_error_exponential_backoff(
     return cast(Callable[[T], T], decorator)
 
 
+TAsync = TypeVar("TAsync", bound=Callable[..., Awaitable[Any]])
+
+
+def async_api_calling_error_exponential_backoff(
+    retries: int = 5, base_wait_time: int = 1
+) -> Callable[[TAsync], TAsync]:
+    """
+    Decorator for applying exponential backoff to a coroutine function.
+    Waits with asyncio.sleep so that other requests on the event loop keep running.
+    :param retries: Maximum number of retries.
+    :param base_wait_time: Base wait time in seconds for the exponential backoff.
+    :return: The wrapped coroutine function with exponential backoff applied.
+    """
+
+    def decorator(func: TAsync) -> TAsync:
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            modified_retries, modified_base_wait_time = _backoff_settings(
+                kwargs, retries, base_wait_time
+            )
+            for attempt in range(modified_retries):
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    await asyncio.sleep(_backoff_wait(attempt, modified_base_wait_time, e))
+            _backoff_exhausted(func.__name__, modified_retries)
+            return None
+
+        return cast(TAsync, wrapper)
+
+    return cast(Callable[[TAsync], TAsync], decorator)
+
+
 TBaseModel = TypeVar("TBaseModel", bound=Callable[..., BaseModel])
 
 
@@ -1,16 +1,97 @@
+from contextlib import nullcontext
+
 import litellm
 from beartype import beartype
-from beartype.typing import Any, Dict, List, Optional
+from beartype.typing import Any, AsyncContextManager, ContextManager, Dict, List, Optional, Tuple
 from litellm.types.utils import Message
 
-from marble.llms.error_handler import api_calling_error_exponential_backoff
+from marble.llms.concurrency import async_llm_call_slot, llm_call_slot
+from marble.llms.error_handler import (
+    api_calling_error_exponential_backoff,
+    async_api_calling_error_exponential_backoff,
+)
+from marble.llms.rate_limiter import estimate_tokens, get_rate_limiter
+from marble.llms.response_cache import ResponseCache, get_response_cache
+from marble.llms.stub_backend import get_stub_backend, is_stub_model
+from marble.llms.token_ledger import TokenUsage, record_usage, token_scope
 from marble.utils import get_logger
+from marble.utils.tracing import span
 
 logger = get_logger("LLM_CALL")
 
-@beartype
+MAX_INPUT_LENGTH = 350000
+
+
+def _resolve_base_url(llm_model: str) -> Optional[str]:
+    """
+    Pick the provider endpoint for a model name.
+    """
+    if "together_ai/TA" in llm_model:
+        return "https://api.ohmygpt.com/v1"
+    elif "deepseek" in llm_model:
+        return "https://api.deepseek.com/v1"
+    elif "gpt" in llm_model:
+        return "https://api.deerapi.com/v1"
+    return None
+
+
+def _truncate_messages(messages: List[Dict[str, str]]) -> None:
+    """
+    Truncate over-long message contents in place.
+    """
+    for msg in messages:
+        if len(msg["content"]) > MAX_INPUT_LENGTH:
+            logger.info(f"The input of the large model is too large and is being compressed: {msg['content']}")
+            msg["content"] = msg["content"][:MAX_INPUT_LENGTH] + '...'
+
+
+def _total_tokens(completion: Any, default: int) -> int:
+    """
+    Read the total token usage a provider reported for a completion.
+    """
+    usage = getattr(completion, "usage", None)
+    total = getattr(usage, "total_tokens", None)
+    return total if isinstance(total, int) else default
+
+
+def _record_completion_usage(
+    llm_model: str,
+    completion: Any,
+    messages: List[Dict[str, str]],
+    tools: Optional[List[Dict[str, Any]]],
+) -> None:
+    """
+    Record the usage a provider reported for a completion in the token ledger.
+
+    Falls back to a cheap estimate for providers that do not report usage.
+    """
+    usage = getattr(completion, "usage", None)
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    if not isinstance(prompt_tokens, int):
+        prompt_tokens = estimate_tokens(messages, tools)
+    if not isinstance(completion_tokens, int):
+        completion_tokens = sum(
+            len(choice.message.content or "") // 4 for choice in completion.choices
+        )
+    record_usage(llm_model, prompt_tokens, completion_tokens)
+
+
+def _message_to_dict(message: Message) -> Dict[str, Any]:
+    """
+    Serialize the fields of a Message that are needed to rebuild it.
+    """
+    data = message.model_dump()
+    return {
+        "role": data.get("role"),
+        "content": data.get("content"),
+        "tool_calls": data.get("tool_calls"),
+        "function_call": data.get("function_call"),
+    }
+
+
 @api_calling_error_exponential_backoff(retries=5, base_wait_time=1)
-def model_prompting(
+def _completion(
     llm_model: str,
     messages: List[Dict[str, str]],
     return_num: Optional[int] = 1,
@@ -22,40 +103,39 @@ def model_prompting(
     tools: Optional[List[Dict[str, Any]]] = None,
     tool_choice: Optional[str] = None,
 ) -> List[Message]:
-    """
-    Select model via router in LiteLLM with support for function calling.
-    """
-    # litellm.set_verbose=True
     api_key = None
-    if "together_ai/TA" in llm_model:
-        base_url = "https://api.ohmygpt.com/v1"
-    elif "deepseek" in llm_model:
-        base_url = "https://api.deepseek.com/v1"
-    elif "gpt" in llm_model:
-        base_url = "https://api.deerapi.com/v1"
-    else:
-        base_url = None
+    base_url = _resolve_base_url(llm_model)
+    limiter = get_rate_limiter(llm_model, base_url)
+    estimated_tokens = estimate_tokens(messages, tools) if limiter is not None else 0
     try:
-        max_length = 350000
-        max_token_num = 4096
-        # logger.info(f"大模型输入: {messages}")
-        for msg in messages:
-            if len(msg["content"]) > max_length:
-                logger.info(f"The input of the large model is too large and is being compressed: {msg['content']}")
-                msg["content"] = msg["content"][:max_length] + '...'
-        completion = litellm.completion(
-            model=llm_model,
-            messages=messages,
-            max_tokens=max_token_num,
-            n=return_num,
-            top_p=top_p,
-            temperature=temperature,
-            stream=stream,
-            tools=tools,
-            tool_choice=tool_choice,
-            base_url=base_url,
-            api_key=api_key,
-        )
+        limiter_slot: ContextManager[None] = nullcontext()
+        if limiter is not None:
+            limiter.acquire(estimated_tokens)
+            limiter_slot = limiter.concurrency_slot()
+        with limiter_slot, llm_call_slot():
+            if is_stub_model(llm_model):
+                completion = get_stub_backend().complete(
+                    llm_model, messages, tools=tools, tool_choice=tool_choice
+                )
+            else:
+                completion = litellm.completion(
+                    model=llm_model,
+                    messages=messages,
+                    max_tokens=max_token_num,
+                    n=return_num,
+                    top_p=top_p,
+                    temperature=temperature,
+                    stream=stream,
+                    tools=tools,
+                    tool_choice=tool_choice,
+                    base_url=base_url,
+                    api_key=api_key,
+                )
+        if limiter is not None:
+            limiter.record_usage(
+                estimated_tokens, _total_tokens(completion, estimated_tokens)
+            )
+        _record_completion_usage(llm_model, completion, messages, tools)
         # logger.info(f"大模型输出: {completion}")
         message_0: Message = completion.choices[0].message
         assert message_0 is not None
@@ -64,3 +144,226 @@ def model_prompting(
     except Exception as e:
         logger.info(f"Error: Request a large model - {str(e)}")
         raise e
+
+
+@async_api_calling_error_exponential_backoff(retries=5, base_wait_time=1)
+async def _acompletion(
+    llm_model: str,
+    messages: List[Dict[str, str]],
+    return_num: Optional[int] = 1,
+    max_token_num: Optional[int] = 512,
+    temperature: Optional[float] = 0.0,
+    top_p: Optional[float] = None,
+    stream: Optional[bool] = None,
+    mode: Optional[str] = None,
+    tools: Optional[List[Dict[str, Any]]] = None,
+    tool_choice: Optional[str] = None,
+) -> List[Message]:
+    api_key = None
+    base_url = _resolve_base_url(llm_model)
+    limiter = get_rate_limiter(llm_model, base_url)
+    estimated_tokens = estimate_tokens(messages, tools) if limiter is not None else 0
+    try:
+        limiter_slot: AsyncContextManager[None] = nullcontext()
+        if limiter is not None:
+            await limiter.aacquire(estimated_tokens)
+            limiter_slot = limiter.async_concurrency_slot()
+        async with limiter_slot, async_llm_call_slot():
+            if is_stub_model(llm_model):
+                completion = await get_stub_backend().acomplete(
+                    llm_model, messages, tools=tools, tool_choice=tool_choice
+                )
+            else:
+                completion = await litellm.acompletion(
+                    model=llm_model,
+                    messages=messages,
+                    max_tokens=max_token_num,
+                    n=return_num,
+                    top_p=top_p,
+                    temperature=temperature,
+                    stream=stream,
+                    tools=tools,
+                    tool_choice=tool_choice,
+                    base_url=base_url,
+                    api_key=api_key,
+                )
+        if limiter is not None:
+            limiter.record_usage(
+                estimated_tokens, _total_tokens(completion, estimated_tokens)
+            )
+        _record_completion_usage(llm_model, completion, messages, tools)
+        message_0: Message = completion.choices[0].message
+        assert message_0 is not None
+        assert isinstance(message_0, Message)
+        return [message_0]
+    except Exception as e:
+        logger.info(f"Error: Request a large model - {str(e)}")
+        raise e
+
+
+def _lookup_cache(
+    llm_model: str,
+    messages: List[Dict[str, str]],
+    return_num: Optional[int],
+    max_token_num: Optional[int],
+    temperature: Optional[float],
+    top_p: Optional[float],
+    stream: Optional[bool],
+    tools: Optional[List[Dict[str, Any]]],
+    tool_choice: Optional[str],
+) -> Tuple[Optional[ResponseCache], str, Optional[List[Message]]]:
+    """
+    Consult the response cache for a request.
+
+    Returns:
+        Tuple[Optional[ResponseCache], str, Optional[List[Message]]]: The active cache
+        (None if caching does not apply), the request key and the cached response, if any.
+    """
+    cache = get_response_cache()
+    if cache is None or stream:
+        return None, "", None
+    key = cache.make_key(
+        model=llm_model,
+        messages=messages,
+        tools=tools,
+        tool_choice=tool_choice,
+        temperature=temperature,
+        top_p=top_p,
+        max_tokens=max_token_num,
+        n=return_num,
+    )
+    entry = cache.lookup(key)
+    if entry is not None:
+        # Replays account for the tokens the original call used
+        usage = entry.get("usage") or {}
+        record_usage(
+            llm_model,
+            usage.get("prompt_tokens", estimate_tokens(messages, tools)),
+            usage.get("completion_tokens", 0),
+            cached=True,
+        )
+        return cache, key, [Message(**entry["message"])]
+    return cache, key, None
+
+
+def _store_cache(
+    cache: Optional[ResponseCache],
+    key: str,
+    llm_model: str,
+    result: Optional[List[Message]],
+    usage: TokenUsage,
+) -> None:
+    if cache is not None and result and cache.writes_enabled:
+        cache.put(
+            key,
+            {
+                "model": llm_model,
+                "message": _message_to_dict(result[0]),
+                "usage": {
+                    "prompt_tokens": usage.prompt_tokens,
+                    "completion_tokens": usage.completion_tokens,
+                },
+            },
+        )
+
+
+@beartype
+def model_prompting(
+    llm_model: str,
+    messages: List[Dict[str, str]],
+    return_num: Optional[int] = 1,
+    max_token_num: Optional[int] = 512,
+    temperature: Optional[float] = 0.0,
+    top_p: Optional[float] = None,
+    stream: Optional[bool] = None,
+    mode: Optional[str] = None,
+    tools: Optional[List[Dict[str, Any]]] = None,
+    tool_choice: Optional[str] = None,
+) -> List[Message]:
+    """
+    Select model via router in LiteLLM with support for function calling.
+
+    Responses are served from the process-wide response cache when one is
+    configured (see marble.llms.response_cache). The usage of every call is
+    recorded in the token ledger; wrap the call in token_scope to read it
+    (see marble.llms.token_ledger). Models named "stub/..." are answered
+    locally by the seeded stub backend (see marble.llms.stub_backend). Each call
+    is traced as an "llm.completion" span (see marble.utils.tracing).
+    """
+    # litellm.set_verbose=True
+    max_token_num = 4096
+    # logger.info(f"大模型输入: {messages}")
+    _truncate_messages(messages)
+    with span("llm.completion", category="llm", model=llm_model) as trace_span, token_scope() as usage:
+        cache, key, result = _lookup_cache(
+            llm_model, messages, return_num, max_token_num, temperature, top_p, stream, tools, tool_choice
+        )
+        trace_span.set_attributes(cached=result is not None)
+        if result is None:
+            result = _completion(
+                llm_model,
+                messages,
+                return_num=return_num,
+                max_token_num=max_token_num,
+                temperature=temperature,
+                top_p=top_p,
+                stream=stream,
+                mode=mode,
+                tools=tools,
+                tool_choice=tool_choice,
+            )
+            if result is None:
+                trace_span.set_error("retries exhausted")
+            _store_cache(cache, key, llm_model, result, usage)
+        trace_span.set_attributes(
+            prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens
+        )
+    return result
+
+
+@beartype
+async def amodel_prompting(
+    llm_model: str,
+    messages: List[Dict[str, str]],
+    return_num: Optional[int] = 1,
+    max_token_num: Optional[int] = 512,
+    temperature: Optional[float] = 0.0,
+    top_p: Optional[float] = None,
+    stream: Optional[bool] = None,
+    mode: Optional[str] = None,
+    tools: Optional[List[Dict[str, Any]]] = None,
+    tool_choice: Optional[str] = None,
+) -> List[Message]:
+    """
+    Asynchronous counterpart of model_prompting built on litellm.acompletion.
+
+    Applies the same truncation, response cache and retry/backoff semantics, but
+    waits on the event loop so many requests can be in flight at once.
+    """
+    max_token_num = 4096
+    _truncate_messages(messages)
+    with span("llm.completion", category="llm", model=llm_model) as trace_span, token_scope() as usage:
+        cache, key, result = _lookup_cache(
+            llm_model, messages, return_num, max_token_num, temperature, top_p, stream, tools, tool_choice
+        )
+        trace_span.set_attributes(cached=result is not None)
+        if result is None:
+            result = await _acompletion(
+                llm_model,
+                messages,
+                return_num=return_num,
+                max_token_num=max_token_num,
+                temperature=temperature,
+                top_p=top_p,
+                stream=stream,
+                mode=mode,
+                tools=tools,
+                tool_choice=tool_choice,
+            )
+            if result is None:
+                trace_span.set_error("retries exhausted")
+            _store_cache(cache, key, llm_model, result, usage)
+        trace_span.set_attributes(
+            prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens
+        )
+    return result
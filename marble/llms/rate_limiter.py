@@ -0,0 +1,361 @@
+"""
+Requests-per-minute and tokens-per-minute admission control for LLM calls.
+
+Every call reserves one request and its estimated tokens from the token buckets
+of its model/endpoint before it is sent, and waits for as long as the buckets
+are in debt. Buckets are process-wide and can optionally be shared across
+processes through state files guarded by file locks. A limiter can also cap the
+calls of its model/endpoint in flight at once; that cap is per process.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, AsyncContextManager, Callable, ContextManager, Dict, Optional
+
+from marble.llms.concurrency import SlotSemaphore, async_semaphore_slot, semaphore_slot
+from marble.utils.logger import get_logger
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None  # type: ignore[assignment]
+
+logger = get_logger("LLM_RATE_LIMIT")
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations instead of blocking.
+
+    The level may go negative; the deficit divided by the refill rate is how
+    long the caller has to wait before its reservation is covered.
+    """
+
+    def __init__(self, per_minute: float):
+        """
+        Initialize the bucket, full.
+
+        Args:
+            per_minute (float): Budget per minute, which is also the burst capacity.
+        """
+        self.capacity = float(per_minute)
+        self.rate = float(per_minute) / 60.0
+        self.level = self.capacity
+        self.updated_at = time.time()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """
+        Take an amount out of the bucket.
+
+        Args:
+            amount (float): Amount to reserve.
+            now (float): Current wall-clock time.
+
+        Returns:
+            float: Seconds to wait until the reservation is covered.
+        """
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        self.level -= amount
+        return max(0.0, -self.level / self.rate)
+
+    def refund(self, amount: float) -> None:
+        """
+        Give back (or, if negative, additionally charge) part of a reservation.
+
+        Args:
+            amount (float): Amount to give back.
+        """
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """
+    Rate limiter of one model or endpoint with optional rpm, tpm and concurrency limits.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        state_dir: Optional[str] = None,
+        max_concurrent: Optional[int] = None,
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            name (str): Model name or base URL the limits apply to.
+            rpm (Optional[float]): Requests per minute, unlimited if None.
+            tpm (Optional[float]): Tokens per minute, unlimited if None.
+            state_dir (Optional[str]): Directory for bucket state shared with other processes.
+            max_concurrent (Optional[int]): Calls in flight at once within this process,
+                unlimited if None.
+        """
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrent = max_concurrent
+        self._slots = SlotSemaphore(max_concurrent) if max_concurrent else None
+        self._buckets: Dict[str, TokenBucket] = {}
+        if rpm:
+            self._buckets["requests"] = TokenBucket(rpm)
+        if tpm:
+            self._buckets["tokens"] = TokenBucket(tpm)
+        self._lock = threading.Lock()
+        self._state_path: Optional[str] = None
+        if state_dir and fcntl is not None:
+            os.makedirs(state_dir, exist_ok=True)
+            digest = hashlib.sha256(name.encode("utf-8")).hexdigest()[:16]
+            self._state_path = os.path.join(state_dir, f"{digest}.json")
+        self.requests = 0
+        self.tokens = 0
+        self.waits = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _update(self, update: Callable[[float], float]) -> float:
+        """Apply an update to the buckets under the thread lock and, if shared, the file lock."""
+        with self._lock:
+            if self._state_path is None:
+                return update(time.time())
+            with open(f"{self._state_path}.lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self._load_state()
+                    result = update(time.time())
+                    self._save_state()
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+            return result
+
+    def _load_state(self) -> None:
+        assert self._state_path is not None
+        try:
+            with open(self._state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        for key, bucket in self._buckets.items():
+            if key in state:
+                bucket.level, bucket.updated_at = state[key]
+
+    def _save_state(self) -> None:
+        assert self._state_path is not None
+        state = {
+            key: (bucket.level, bucket.updated_at) for key, bucket in self._buckets.items()
+        }
+        with open(self._state_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+
+    def reserve(self, tokens: int) -> float:
+        """
+        Reserve one request and an estimated number of tokens.
+
+        Args:
+            tokens (int): Estimated tokens of the request.
+
+        Returns:
+            float: Seconds the caller has to wait before sending the request.
+        """
+
+        def update(now: float) -> float:
+            wait = 0.0
+            if "requests" in self._buckets:
+                wait = max(wait, self._buckets["requests"].reserve(1, now))
+            if "tokens" in self._buckets:
+                wait = max(wait, self._buckets["tokens"].reserve(tokens, now))
+            return wait
+
+        wait = self._update(update)
+        with self._lock:
+            self.requests += 1
+            self.tokens += tokens
+            if wait > 0:
+                self.waits += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+        return wait
+
+    def acquire(self, tokens: int) -> float:
+        """
+        Reserve capacity and sleep until it is available.
+
+        Args:
+            tokens (int): Estimated tokens of the request.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, tokens: int) -> float:
+        """
+        Asynchronous variant of acquire that waits on the event loop.
+
+        Args:
+            tokens (int): Estimated tokens of the request.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        if self._state_path is None:
+            wait = self.reserve(tokens)
+        else:
+            # The shared state is guarded by a blocking file lock
+            wait = await asyncio.to_thread(self.reserve, tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def concurrency_slot(self) -> ContextManager[None]:
+        """
+        Hold one of the limiter's in-flight call slots for the duration of the block.
+        """
+        return semaphore_slot(self._slots)
+
+    def async_concurrency_slot(self) -> AsyncContextManager[None]:
+        """
+        Asynchronous variant of concurrency_slot that does not block the event loop while waiting.
+        """
+        return async_semaphore_slot(self._slots)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """
+        Correct the token reservation of a finished request with its reported usage.
+
+        Args:
+            estimated_tokens (int): Tokens reserved for the request.
+            actual_tokens (int): Tokens the provider reported.
+        """
+        if "tokens" not in self._buckets or actual_tokens == estimated_tokens:
+            return
+
+        def update(now: float) -> float:
+            self._buckets["tokens"].refund(estimated_tokens - actual_tokens)
+            return 0.0
+
+        self._update(update)
+        with self._lock:
+            self.tokens += actual_tokens - estimated_tokens
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the admission statistics of the limiter.
+
+        Returns:
+            Dict[str, Any]: Limits, request and token counts and queue-wait times in seconds.
+        """
+        with self._lock:
+            return {
+                "rpm": self.rpm,
+                "tpm": self.tpm,
+                "max_concurrent": self.max_concurrent,
+                "requests": self.requests,
+                "tokens": self.tokens,
+                "waits": self.waits,
+                "total_wait": round(self.total_wait, 3),
+                "mean_wait": round(self.total_wait / self.requests, 3) if self.requests else 0.0,
+                "max_wait": round(self.max_wait, 3),
+            }
+
+
+_limits: Dict[str, Dict[str, Any]] = {}
+_limiters: Dict[str, RateLimiter] = {}
+_state_dir: Optional[str] = None
+_config_lock = threading.Lock()
+
+
+def configure_rate_limits(
+    limits: Optional[Dict[str, Dict[str, Any]]] = None, state_dir: Optional[str] = None
+) -> None:
+    """
+    Set the rate limits of models and endpoints.
+
+    Limiters whose limits did not change keep their state, so engines that are
+    created one after another in the same process share their budgets.
+
+    Args:
+        limits (Optional[Dict[str, Dict[str, Any]]]): Maps a model name, a base URL or
+            "default" to {"rpm": ..., "tpm": ..., "max_concurrent": ...}.
+        state_dir (Optional[str]): Directory for bucket state shared across processes.
+    """
+    global _limits, _state_dir
+    with _config_lock:
+        limits = limits or {}
+        for key in list(_limiters):
+            if key not in limits or limits[key] != _limits.get(key) or state_dir != _state_dir:
+                del _limiters[key]
+        _limits = dict(limits)
+        _state_dir = state_dir
+    if limits:
+        logger.info(f"LLM rate limits: {limits}")
+
+
+def get_rate_limiter(llm_model: str, base_url: Optional[str] = None) -> Optional[RateLimiter]:
+    """
+    Find the limiter that applies to a call.
+
+    Args:
+        llm_model (str): Model of the call.
+        base_url (Optional[str]): Endpoint of the call.
+
+    Returns:
+        Optional[RateLimiter]: The limiter of the model, else of the endpoint, else the
+        default one; None if no limit applies.
+    """
+    for key in (llm_model, base_url, "default"):
+        if key and key in _limits:
+            break
+    else:
+        return None
+    with _config_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limit = _limits[key]
+            limiter = RateLimiter(
+                key,
+                rpm=limit.get("rpm"),
+                tpm=limit.get("tpm"),
+                state_dir=_state_dir,
+                max_concurrent=limit.get("max_concurrent"),
+            )
+            _limiters[key] = limiter
+        return limiter
+
+
+def rate_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get the statistics of every limiter used so far.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Statistics keyed by model name or base URL.
+    """
+    with _config_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.stats() for limiter in limiters}
+
+
+def estimate_tokens(messages: Any, tools: Any = None) -> int:
+    """
+    Cheaply estimate the prompt tokens of a request (about four characters per token).
+
+    Args:
+        messages (Any): Messages of the request.
+        tools (Any): Tool schemas of the request.
+
+    Returns:
+        int: Estimated number of tokens.
+    """
+    size = len(json.dumps(messages, ensure_ascii=False, default=str))
+    if tools:
+        size += len(json.dumps(tools, ensure_ascii=False, default=str))
+    return size // 4 + 1
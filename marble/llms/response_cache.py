@@ -0,0 +1,314 @@
+"""
+Content-addressed on-disk cache for LLM responses.
+
+Entries are keyed on a hash of everything that determines a completion
+(model, messages, tools, tool_choice, temperature, top_p, max_tokens, n) and
+stored one JSON file per entry, so identical calls across reruns of the same
+task can be answered locally.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from marble.utils.logger import get_logger
+
+logger = get_logger("LLM_CACHE")
+
+CACHE_MODES = ("off", "read_through", "record", "replay")
+
+
+class CacheMissError(RuntimeError):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+class ResponseCache:
+    """
+    Persistent response cache with size-bounded LRU eviction.
+
+    Modes:
+        - "read_through": serve hits from disk, call the provider on a miss and record it.
+        - "record": always call the provider and (over)write the recorded response.
+        - "replay": serve hits from disk only; a miss raises CacheMissError.
+        - "off": the cache is bypassed entirely.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = "cache/llm_responses",
+        mode: str = "read_through",
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir (str): Directory holding the cache entries.
+            mode (str): One of CACHE_MODES.
+            max_entries (Optional[int]): Maximum number of entries kept on disk.
+            max_bytes (Optional[int]): Maximum total size in bytes kept on disk.
+        """
+        if mode not in CACHE_MODES:
+            raise ValueError(
+                f"Unsupported cache mode: {mode}. Expected one of {CACHE_MODES}."
+            )
+        self.cache_dir = cache_dir
+        self.mode = mode
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # key -> (size in bytes, last access time), loaded lazily from disk
+        self._index: Optional[Dict[str, Tuple[int, float]]] = None
+        self._total_bytes = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(
+        model: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[str] = None,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        n: Optional[int] = None,
+    ) -> str:
+        """
+        Build the content address of a request.
+
+        Returns:
+            str: Hex sha256 digest of the canonical JSON form of the request.
+        """
+        payload = {
+            "model": model,
+            "messages": messages,
+            "tools": tools,
+            "tool_choice": tool_choice,
+            "temperature": temperature,
+            "top_p": top_p,
+            "max_tokens": max_tokens,
+            "n": n,
+        }
+        canonical = json.dumps(
+            payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    @property
+    def reads_enabled(self) -> bool:
+        return self.mode in ("read_through", "replay")
+
+    @property
+    def writes_enabled(self) -> bool:
+        return self.mode in ("read_through", "record")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _load_index(self) -> Dict[str, Tuple[int, float]]:
+        """Scan the cache directory once to learn entry sizes and access times."""
+        if self._index is None:
+            index: Dict[str, Tuple[int, float]] = {}
+            total = 0
+            for root, _, files in os.walk(self.cache_dir):
+                for file_name in files:
+                    if not file_name.endswith(".json"):
+                        continue
+                    stat = os.stat(os.path.join(root, file_name))
+                    index[file_name[: -len(".json")]] = (stat.st_size, stat.st_mtime)
+                    total += stat.st_size
+            self._index = index
+            self._total_bytes = total
+        return self._index
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Read a recorded entry.
+
+        Args:
+            key (str): Content address of the request.
+
+        Returns:
+            Optional[Dict[str, Any]]: The recorded entry, or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry: Dict[str, Any] = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+            if self._index is not None and key in self._index:
+                self._index[key] = (self._index[key][0], now)
+        return entry
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        """
+        Record an entry and evict old ones if the cache exceeds its bounds.
+
+        Args:
+            key (str): Content address of the request.
+            entry (Dict[str, Any]): JSON-serializable response entry.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps(entry, ensure_ascii=False, default=str)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            index = self._load_index()
+            previous = index.get(key)
+            if previous is not None:
+                self._total_bytes -= previous[0]
+            index[key] = (size, time.time())
+            self._total_bytes += size
+            self.writes += 1
+            self._evict_locked()
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Consult the cache according to its mode.
+
+        Args:
+            key (str): Content address of the request.
+
+        Returns:
+            Optional[Dict[str, Any]]: The recorded entry, or None if the provider should be called.
+
+        Raises:
+            CacheMissError: In replay mode when no entry is recorded for the key.
+        """
+        if not self.reads_enabled:
+            return None
+        entry = self.get(key)
+        if entry is None and self.mode == "replay":
+            raise CacheMissError(f"No recorded LLM response for request {key}.")
+        return entry
+
+    def _evict_locked(self) -> None:
+        """Evict least recently used entries. Caller must hold the lock."""
+        if self.max_entries is None and self.max_bytes is None:
+            return
+        index = self._load_index()
+
+        def over_limit() -> bool:
+            if self.max_entries is not None and len(index) > self.max_entries:
+                return True
+            if self.max_bytes is not None and self._total_bytes > self.max_bytes:
+                return True
+            return False
+
+        if not over_limit():
+            return
+        for key, (size, _) in sorted(index.items(), key=lambda item: item[1][1]):
+            if not over_limit():
+                break
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            del index[key]
+            self._total_bytes -= size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the hit/miss counters of the cache.
+
+        Returns:
+            Dict[str, Any]: Counters and the current on-disk footprint.
+        """
+        with self._lock:
+            index = self._load_index()
+            lookups = self.hits + self.misses
+            return {
+                "mode": self.mode,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "entries": len(index),
+                "bytes": self._total_bytes,
+            }
+
+
+_response_cache: Optional[ResponseCache] = None
+_configured = False
+_config_lock = threading.Lock()
+
+
+def configure_response_cache(
+    mode: str = "read_through",
+    cache_dir: str = "cache/llm_responses",
+    max_entries: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+) -> Optional[ResponseCache]:
+    """
+    Install the process-wide response cache used by model_prompting.
+
+    Args:
+        mode (str): One of CACHE_MODES. "off" disables caching.
+        cache_dir (str): Directory holding the cache entries.
+        max_entries (Optional[int]): Maximum number of entries kept on disk.
+        max_bytes (Optional[int]): Maximum total size in bytes kept on disk.
+
+    Returns:
+        Optional[ResponseCache]: The installed cache, or None if caching is off.
+    """
+    global _response_cache, _configured
+    with _config_lock:
+        if mode == "off":
+            _response_cache = None
+        else:
+            _response_cache = ResponseCache(
+                cache_dir=cache_dir,
+                mode=mode,
+                max_entries=max_entries,
+                max_bytes=max_bytes,
+            )
+            logger.info(f"LLM response cache enabled in '{mode}' mode at {cache_dir}")
+        _configured = True
+        return _response_cache
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Get the process-wide response cache.
+
+    Unless configure_response_cache was called, the cache is configured from the
+    MARBLE_LLM_CACHE_MODE and MARBLE_LLM_CACHE_DIR environment variables and is
+    off by default.
+
+    Returns:
+        Optional[ResponseCache]: The active cache, or None if caching is off.
+    """
+    if not _configured:
+        max_entries = os.environ.get("MARBLE_LLM_CACHE_MAX_ENTRIES")
+        max_bytes = os.environ.get("MARBLE_LLM_CACHE_MAX_BYTES")
+        configure_response_cache(
+            mode=os.environ.get("MARBLE_LLM_CACHE_MODE", "off"),
+            cache_dir=os.environ.get("MARBLE_LLM_CACHE_DIR", "cache/llm_responses"),
+            max_entries=int(max_entries) if max_entries else None,
+            max_bytes=int(max_bytes) if max_bytes else None,
+        )
+    return _response_cache
@@ -0,0 +1,374 @@
+"""
+Deterministic local stand-in for LLM providers.
+
+model_prompting routes every model whose name starts with "stub/" here instead
+of calling a provider. Responses are either scripted or generated from a seed and
+the request itself, so a run produces the same responses on every machine, in
+any thread interleaving and without network access. Generated responses follow
+the formats the framework parses: tool calls against the offered tool schemas,
+planner JSON, continuation decisions and evaluator ratings.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from litellm import ModelResponse
+
+from marble.llms.rate_limiter import estimate_tokens
+from marble.utils.logger import get_logger
+
+logger = get_logger("LLM_STUB")
+
+STUB_PREFIX = "stub/"
+
+# A scripted response: fixed text, or a function of the request messages
+StubResponse = Union[str, Callable[[List[Dict[str, Any]]], str]]
+
+_RATED_KEY = re.compile(r'"(\w+)"\s*:\s*(?:NUMBER|X|rating|score)\b')
+_ROLE_KEY = re.compile(r'"(seller|buyer)"\s*:\s*\{')
+_AGENT_ID = re.compile(r"- Agent ID: (\S+)")
+_CHILD_ID = re.compile(r"^- (\S+): ", re.MULTILINE)
+# Generated per run (e.g. communication session ids, possibly truncated), so left
+# out of the seed
+_UUID = re.compile(r"[0-9a-f]{8}-[0-9a-f-]{0,27}")
+_WORDS = (
+    "analyze", "result", "plan", "agent", "review", "summary", "data", "next",
+    "step", "task", "progress", "share", "update", "findings", "idea", "check",
+)
+
+
+def is_stub_model(llm_model: str) -> bool:
+    """
+    Check whether a model name selects the stub backend.
+
+    Args:
+        llm_model (str): Model name.
+
+    Returns:
+        bool: True if the name starts with "stub/".
+    """
+    return llm_model.startswith(STUB_PREFIX)
+
+
+class StubBackend:
+    """
+    Generates seeded responses for requests to "stub/..." models.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        tool_call_probability: float = 1.0,
+        max_tool_calls: int = 1,
+        continue_probability: float = 1.0,
+        responses: Optional[Sequence[Tuple[str, StubResponse]]] = None,
+    ) -> None:
+        """
+        Initialize the backend.
+
+        Args:
+            seed (int): Seed of the generated responses.
+            latency (float): Artificial latency of each call in seconds.
+            latency_jitter (float): Maximum seeded extra latency of each call in seconds.
+            tool_call_probability (float): Probability of answering with tool calls when
+                tools are offered and tool_choice is "auto".
+            max_tool_calls (int): Maximum number of tool calls in one response.
+            continue_probability (float): Probability that a continuation decision is true.
+            responses (Optional[Sequence[Tuple[str, StubResponse]]]): Scripted responses
+                as (regex, response) pairs. The first regex found in the request
+                messages wins; its response is returned as the message content.
+        """
+        self.seed = seed
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.tool_call_probability = tool_call_probability
+        self.max_tool_calls = max(1, max_tool_calls)
+        self.continue_probability = continue_probability
+        self.responses = [
+            (re.compile(pattern, re.DOTALL), response)
+            for pattern, response in (responses or [])
+        ]
+
+    def _rng(
+        self,
+        llm_model: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]],
+    ) -> random.Random:
+        """
+        Seed a generator from the backend seed and the request.
+        """
+        request = _UUID.sub(
+            "<uuid>",
+            json.dumps([self.seed, llm_model, messages, tools], sort_keys=True, default=str),
+        )
+        return random.Random(int(hashlib.sha256(request.encode("utf-8")).hexdigest(), 16))
+
+    def delay(self, rng: random.Random) -> float:
+        """
+        Get the artificial latency of a call.
+
+        Args:
+            rng (random.Random): Generator of the request.
+
+        Returns:
+            float: Latency in seconds.
+        """
+        if not self.latency_jitter:
+            return self.latency
+        return self.latency + rng.uniform(0, self.latency_jitter)
+
+    def respond(
+        self,
+        llm_model: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[str] = None,
+    ) -> Tuple[ModelResponse, float]:
+        """
+        Build the response to a request.
+
+        Args:
+            llm_model (str): Model name.
+            messages (List[Dict[str, Any]]): Request messages.
+            tools (Optional[List[Dict[str, Any]]]): Offered tool schemas.
+            tool_choice (Optional[str]): Tool choice of the request.
+
+        Returns:
+            Tuple[ModelResponse, float]: The response and the latency to simulate.
+        """
+        rng = self._rng(llm_model, messages, tools)
+        prompt = "\n".join(str(message.get("content") or "") for message in messages)
+        message: Dict[str, Any] = {"role": "assistant", "content": None}
+        finish_reason = "stop"
+        scripted = self._scripted(messages, prompt)
+        if scripted is not None:
+            message["content"] = scripted
+        elif (
+            tools
+            and tool_choice != "none"
+            and any(self._callable(tool) for tool in tools)
+            and (tool_choice == "required" or rng.random() < self.tool_call_probability)
+        ):
+            message["tool_calls"] = self._tool_calls(tools, rng)
+            finish_reason = "tool_calls"
+        else:
+            message["content"] = self._content(prompt, rng)
+
+        prompt_tokens = estimate_tokens(messages, tools)
+        completion_tokens = len(message["content"] or json.dumps(message.get("tool_calls"))) // 4
+        response = ModelResponse(
+            model=llm_model,
+            choices=[{"index": 0, "finish_reason": finish_reason, "message": message}],
+            usage={
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        )
+        return response, self.delay(rng)
+
+    def _scripted(self, messages: List[Dict[str, Any]], prompt: str) -> Optional[str]:
+        for pattern, response in self.responses:
+            if pattern.search(prompt):
+                return response(messages) if callable(response) else response
+        return None
+
+    def _callable(self, tool: Dict[str, Any]) -> bool:
+        """
+        Check that every enumerated parameter of a tool has a value to pick.
+        """
+        properties = tool["function"].get("parameters", {}).get("properties", {})
+        return all(schema.get("enum", True) for schema in properties.values())
+
+    def _tool_calls(
+        self, tools: List[Dict[str, Any]], rng: random.Random
+    ) -> List[Dict[str, Any]]:
+        """
+        Call seeded tools with arguments that satisfy their parameter schemas.
+        """
+        callable_tools = [tool for tool in tools if self._callable(tool)]
+        calls = []
+        for _ in range(rng.randint(1, self.max_tool_calls)):
+            function = rng.choice(callable_tools)["function"]
+            arguments = {
+                name: self._value(schema, rng)
+                for name, schema in function.get("parameters", {})
+                .get("properties", {})
+                .items()
+            }
+            calls.append(
+                {
+                    "id": f"call_{rng.getrandbits(48):012x}",
+                    "type": "function",
+                    "function": {
+                        "name": function["name"],
+                        "arguments": json.dumps(arguments),
+                    },
+                }
+            )
+        return calls
+
+    def _value(self, schema: Dict[str, Any], rng: random.Random) -> Any:
+        """
+        Generate a value of a JSON schema.
+        """
+        if schema.get("enum"):
+            return rng.choice(schema["enum"])
+        kind = schema.get("type")
+        if kind == "integer":
+            return rng.randint(1, 5)
+        if kind == "number":
+            return round(rng.uniform(0, 1), 3)
+        if kind == "boolean":
+            return rng.random() < 0.5
+        if kind == "array":
+            return [self._value(schema.get("items", {}), rng) for _ in range(rng.randint(1, 2))]
+        if kind == "object":
+            return {
+                name: self._value(item, rng)
+                for name, item in schema.get("properties", {}).items()
+            }
+        return self._sentence(rng)
+
+    def _content(self, prompt: str, rng: random.Random) -> str:
+        """
+        Generate a text response in the format the prompt asks for.
+        """
+        if '"tasks"' in prompt:
+            # Planner assignment (all planning methods accept the union of keys)
+            agent_ids = list(dict.fromkeys(_AGENT_ID.findall(prompt)))
+            return json.dumps(
+                {
+                    "tasks": {agent_id: self._sentence(rng) for agent_id in agent_ids},
+                    "chain_of_thought": self._sentence(rng),
+                    "expected_result": self._sentence(rng),
+                    "expected_progress": self._sentence(rng),
+                    "evolving_experiences": self._sentence(rng),
+                    "continue": True,
+                }
+            )
+        if '"agent_id": "<next_agent_id>"' in prompt:
+            # Chain hand-off to one of the listed agents
+            agent_ids = _AGENT_ID.findall(prompt)
+            return json.dumps(
+                {
+                    "agent_id": rng.choice(agent_ids) if agent_ids else None,
+                    "planning_task": self._sentence(rng),
+                }
+            )
+        if "Assign specific tasks to your children agents" in prompt:
+            child_ids = _CHILD_ID.findall(prompt)
+            return json.dumps({child_id: self._sentence(rng) for child_id in child_ids})
+        if "'continue'" in prompt or '"continue"' in prompt:
+            return json.dumps({"continue": rng.random() < self.continue_probability})
+        if '"rating"' in prompt:
+            return json.dumps({"rating": rng.randint(1, 5)})
+        if "JSON array" in prompt:
+            return json.dumps(
+                [
+                    {"milestone": self._sentence(rng), "agents": []}
+                    for _ in range(rng.randint(0, 2))
+                ]
+            )
+        keys = list(dict.fromkeys(_RATED_KEY.findall(prompt)))
+        if keys:
+            ratings: Dict[str, Any] = {key: rng.randint(1, 5) for key in keys}
+            role = _ROLE_KEY.search(prompt)
+            return json.dumps({role.group(1): ratings} if role else ratings)
+        return self._sentence(rng, 24)
+
+    def _sentence(self, rng: random.Random, words: int = 8) -> str:
+        return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+    def complete(
+        self,
+        llm_model: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[str] = None,
+    ) -> ModelResponse:
+        """
+        Answer a request after the artificial latency.
+
+        Args:
+            llm_model (str): Model name.
+            messages (List[Dict[str, Any]]): Request messages.
+            tools (Optional[List[Dict[str, Any]]]): Offered tool schemas.
+            tool_choice (Optional[str]): Tool choice of the request.
+
+        Returns:
+            ModelResponse: The response, in the format litellm.completion returns.
+        """
+        response, latency = self.respond(llm_model, messages, tools, tool_choice)
+        if latency > 0:
+            time.sleep(latency)
+        return response
+
+    async def acomplete(
+        self,
+        llm_model: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[str] = None,
+    ) -> ModelResponse:
+        """
+        Asynchronous counterpart of complete.
+        """
+        response, latency = self.respond(llm_model, messages, tools, tool_choice)
+        if latency > 0:
+            await asyncio.sleep(latency)
+        return response
+
+
+_stub_backend: Optional[StubBackend] = None
+_config_lock = threading.Lock()
+
+
+def configure_stub_backend(backend: Optional[StubBackend] = None, **kwargs: Any) -> StubBackend:
+    """
+    Install the process-wide stub backend used for "stub/..." models.
+
+    Args:
+        backend (Optional[StubBackend]): Backend to install, e.g. an instrumented
+            subclass; built from kwargs if None.
+        **kwargs (Any): Arguments of StubBackend.
+
+    Returns:
+        StubBackend: The installed backend.
+    """
+    global _stub_backend
+    with _config_lock:
+        _stub_backend = backend if backend is not None else StubBackend(**kwargs)
+        logger.info(f"LLM stub backend configured: {type(_stub_backend).__name__} {kwargs}")
+        return _stub_backend
+
+
+def get_stub_backend() -> StubBackend:
+    """
+    Get the process-wide stub backend.
+
+    Unless configure_stub_backend was called, the backend is configured from the
+    MARBLE_STUB_SEED, MARBLE_STUB_LATENCY and MARBLE_STUB_LATENCY_JITTER
+    environment variables.
+
+    Returns:
+        StubBackend: The active backend.
+    """
+    if _stub_backend is None:
+        configure_stub_backend(
+            seed=int(os.environ.get("MARBLE_STUB_SEED", "0")),
+            latency=float(os.environ.get("MARBLE_STUB_LATENCY", "0")),
+            latency_jitter=float(os.environ.get("MARBLE_STUB_LATENCY_JITTER", "0")),
+        )
+    assert _stub_backend is not None
+    return _stub_backend
@@ -1,25 +1,341 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
 import litellm
 from beartype import beartype
-from beartype.typing import List
+from beartype.typing import Dict, List, Optional, Tuple
+
+from marble.utils.logger import get_logger
 
 from .error_handler import api_calling_error_exponential_backoff
 
+logger = get_logger("EMBEDDING")
+
+MAX_BATCH_SIZE = 256
+
+_KEY_PREFIX = b'{"key": "'
+
+
+class EmbeddingCache:
+    """
+    Embedding cache keyed by (model, sha256 of the text).
+
+    Entries are held in a bounded in-memory LRU tier and, if a directory is
+    given, appended to one JSONL file per model so they survive across runs.
+    Each file is indexed by key on first use, so entries evicted from memory
+    are read back from disk instead of being embedded and appended again.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: int = 2048):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir (Optional[str]): Directory of the persisted entries; memory only if None.
+            max_entries (int): Maximum number of embeddings kept in memory.
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        # Byte offset of each persisted entry, per model whose file was indexed
+        self._offsets: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _path(self, model: str) -> str:
+        assert self.cache_dir is not None
+        return os.path.join(self.cache_dir, re.sub(r"[^A-Za-z0-9._-]+", "_", model) + ".jsonl")
+
+    def _remember_locked(self, model: str, key: str, embedding: List[float]) -> None:
+        self._entries[(model, key)] = embedding
+        self._entries.move_to_end((model, key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _record_key(line: bytes) -> Optional[str]:
+        # Records are written as {"key": "<sha256>", ...}; avoid parsing the embedding
+        if line.startswith(_KEY_PREFIX) and line[len(_KEY_PREFIX) + 64 : len(_KEY_PREFIX) + 65] == b'"':
+            return line[len(_KEY_PREFIX) : len(_KEY_PREFIX) + 64].decode("ascii")
+        try:
+            return str(json.loads(line)["key"])
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    def _load_locked(self, model: str) -> Dict[str, int]:
+        offsets = self._offsets.get(model)
+        if offsets is not None:
+            return offsets
+        offsets = {}
+        self._offsets[model] = offsets
+        if not self.cache_dir or not os.path.isfile(self._path(model)):
+            return offsets
+        records = 0
+        damaged = False
+        with open(self._path(model), "rb") as f:
+            offset = 0
+            for line in f:
+                # A partially written last line from an interrupted run has no newline
+                key = self._record_key(line) if line.endswith(b"\n") else None
+                if key is None:
+                    damaged = True
+                else:
+                    offsets[key] = offset
+                    records += 1
+                offset += len(line)
+        if damaged or records > len(offsets):
+            self._compact_locked(model, offsets)
+        return offsets
+
+    def _compact_locked(self, model: str, offsets: Dict[str, int]) -> None:
+        """Rewrite a model's file with one record per key, the latest one."""
+        path = self._path(model)
+        compacted = {}
+        with open(path, "rb") as src, open(path + ".tmp", "wb") as dst:
+            for key, offset in sorted(offsets.items(), key=lambda item: item[1]):
+                src.seek(offset)
+                compacted[key] = dst.tell()
+                dst.write(src.readline())
+        os.replace(path + ".tmp", path)
+        offsets.clear()
+        offsets.update(compacted)
+        logger.info(f"Compacted the embedding cache of {model} to {len(offsets)} entries")
+
+    def _read_locked(self, model: str, offsets: Dict[str, int], keys: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        with open(self._path(model), "rb") as f:
+            for key in keys:
+                f.seek(offsets[key])
+                found[key] = json.loads(f.readline())["embedding"]
+        return found
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Look up the embeddings of several texts.
+
+        Args:
+            model (str): Embedding model.
+            texts (List[str]): Texts to look up.
+
+        Returns:
+            List[Optional[List[float]]]: The cached embeddings, None for misses.
+        """
+        with self._lock:
+            offsets = self._load_locked(model)
+            keys = [self.make_key(text) for text in texts]
+            # Resolve every key before refreshing the LRU, which may evict some of them
+            found = [self._entries.get((model, key)) for key in keys]
+            on_disk = [key for key, embedding in zip(keys, found) if embedding is None and key in offsets]
+            if on_disk:
+                read = self._read_locked(model, offsets, on_disk)
+                found = [read.get(key) if embedding is None else embedding for key, embedding in zip(keys, found)]
+            for key, embedding in zip(keys, found):
+                if embedding is not None:
+                    self._remember_locked(model, key, embedding)
+            hits = sum(1 for embedding in found if embedding is not None)
+            self.hits += hits
+            self.misses += len(texts) - hits
+            return found
+
+    def put_many(self, model: str, texts: List[str], embeddings: List[List[float]]) -> None:
+        """
+        Store the embeddings of several texts.
+
+        Args:
+            model (str): Embedding model.
+            texts (List[str]): Embedded texts.
+            embeddings (List[List[float]]): Their embeddings.
+        """
+        with self._lock:
+            offsets = self._load_locked(model)
+            new = {}
+            for text, embedding in zip(texts, embeddings):
+                key = self.make_key(text)
+                if key not in offsets:
+                    new[key] = embedding
+                self._remember_locked(model, key, embedding)
+            if self.cache_dir and new:
+                with open(self._path(model), "ab") as f:
+                    for key, embedding in new.items():
+                        offsets[key] = f.tell()
+                        f.write((json.dumps({"key": key, "embedding": embedding}) + "\n").encode("utf-8"))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def configure_embedding_cache(
+    cache_dir: Optional[str] = None, max_entries: int = 2048
+) -> EmbeddingCache:
+    """
+    Install the process-wide embedding cache.
+
+    Args:
+        cache_dir (Optional[str]): Directory of the persisted entries; memory only if None.
+        max_entries (int): Maximum number of embeddings kept in memory.
+
+    Returns:
+        EmbeddingCache: The installed cache.
+    """
+    global _embedding_cache
+    with _cache_lock:
+        _embedding_cache = EmbeddingCache(cache_dir, max_entries=max_entries)
+        return _embedding_cache
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """
+    Get the process-wide embedding cache.
+
+    Unless configure_embedding_cache was called, entries are kept in memory only,
+    or persisted under the MARBLE_EMBEDDING_CACHE_DIR environment variable if set.
+
+    Returns:
+        EmbeddingCache: The active cache.
+    """
+    if _embedding_cache is None:
+        configure_embedding_cache(os.environ.get("MARBLE_EMBEDDING_CACHE_DIR") or None)
+    assert _embedding_cache is not None
+    return _embedding_cache
+
 
-@beartype
 @api_calling_error_exponential_backoff(retries=5, base_wait_time=1)
+def _embed_batch(model: str, inputs: List[str]) -> List[List[float]]:
+    embedding = litellm.embedding(
+        model=model,
+        input=inputs,
+    )
+    # Providers may return the items out of order; "index" ties them back to the input
+    data = sorted(embedding.data, key=lambda item: item["index"])
+    embeddings = [item["embedding"] for item in data]
+    assert len(embeddings) == len(inputs)
+    assert all(isinstance(embedding_i, list) for embedding_i in embeddings)
+    return embeddings
+
+
+@beartype
+def text_embeddings(
+    model: str,
+    inputs: List[str],
+) -> List[List[float]]:
+    """
+    Embed several texts, sending only the ones not in the embedding cache.
+
+    Args:
+        model (str): Embedding model.
+        inputs (List[str]): Texts to embed.
+
+    Returns:
+        List[List[float]]: One embedding per input, in input order.
+
+    Raises:
+        RuntimeError: If the provider keeps failing after all retries.
+    """
+    cache = get_embedding_cache()
+    found = cache.get_many(model, inputs)
+    # Embed every distinct missing text once
+    missing = list(dict.fromkeys(text for text, embedding in zip(inputs, found) if embedding is None))
+    computed: Dict[str, List[float]] = {}
+    for start in range(0, len(missing), MAX_BATCH_SIZE):
+        chunk = missing[start : start + MAX_BATCH_SIZE]
+        embeddings = _embed_batch(model, chunk)
+        if embeddings is None:
+            raise RuntimeError(f"Embedding request to {model} failed.")
+        cache.put_many(model, chunk, embeddings)
+        computed.update(zip(chunk, embeddings))
+    return [
+        embedding if embedding is not None else computed[text]
+        for text, embedding in zip(inputs, found)
+    ]
+
+
+class EmbeddingBatcher:
+    """
+    Groups concurrent single-text embedding requests into micro-batches.
+
+    The first request of a batch waits up to max_wait seconds for others to
+    join, then one text_embeddings call serves all of them.
+    """
+
+    def __init__(self, max_wait: float = 0.01, max_batch_size: int = MAX_BATCH_SIZE):
+        """
+        Initialize the batcher.
+
+        Args:
+            max_wait (float): Seconds a batch stays open for more requests.
+            max_batch_size (int): Number of texts that closes a batch early.
+        """
+        self.max_wait = max_wait
+        self.max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+        self._pending: Dict[str, List[Tuple[str, Future]]] = {}
+        self._full: Dict[str, threading.Event] = {}
+
+    def embed(self, model: str, text: str) -> List[float]:
+        """
+        Embed one text, batched with the concurrent requests for the same model.
+
+        Args:
+            model (str): Embedding model.
+            text (str): Text to embed.
+
+        Returns:
+            List[float]: The embedding of the text.
+        """
+        future: Future = Future()
+        with self._lock:
+            batch = self._pending.get(model)
+            leader = batch is None
+            if batch is None:
+                batch = self._pending[model] = []
+                self._full[model] = threading.Event()
+            batch.append((text, future))
+            full = self._full[model]
+            if len(batch) >= self.max_batch_size:
+                full.set()
+        if leader:
+            full.wait(self.max_wait)
+            with self._lock:
+                batch = self._pending.pop(model)
+                del self._full[model]
+            try:
+                embeddings = text_embeddings(model, [text_i for text_i, _ in batch])
+            except Exception as e:
+                for _, future_i in batch:
+                    future_i.set_exception(e)
+            else:
+                for (_, future_i), embedding in zip(batch, embeddings):
+                    future_i.set_result(embedding)
+        result: List[float] = future.result()
+        return result
+
+
+_batcher = EmbeddingBatcher()
+
+
+@beartype
 def text_embedding(
     model: str,
     input: str,
 ) -> List[float]:
     """
-    Select model via router in LiteLLM with support for function calling.
+    Embed one text through the embedding cache and the micro-batcher.
     """
-    # litellm.set_verbose=True
-    embedding = litellm.embedding(
-        model=model,
-        input=[input],
-    )
-    embedding_0 = embedding.data[0]["embedding"]
-    assert embedding_0 is not None
-    assert isinstance(embedding_0, list)
-    return embedding_0
+    return _batcher.embed(model, input)
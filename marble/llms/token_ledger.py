@@ -0,0 +1,267 @@
+"""
+Token accounting based on the usage providers report for each LLM call.
+
+model_prompting records every call into a ledger, labelled with the scope the
+call was made in (agent, component, iteration). Scopes live in a context
+variable, so they follow work submitted to thread pools that copy the context.
+"""
+
+import contextvars
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+class TokenUsage:
+    """
+    Token counts of one call or an aggregate of calls.
+    """
+
+    def __init__(self, prompt_tokens: int = 0, completion_tokens: int = 0) -> None:
+        """
+        Initialize the counts.
+
+        Args:
+            prompt_tokens (int): Prompt tokens.
+            completion_tokens (int): Completion tokens.
+        """
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.calls = 0
+        self.cached_calls = 0
+        self.cached_tokens = 0
+        self._lock = threading.Lock()
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, usage: "TokenUsage", cached: bool = False) -> None:
+        """
+        Add the usage of a call.
+
+        Args:
+            usage (TokenUsage): Usage of the call.
+            cached (bool): Whether the call was answered from the response cache.
+        """
+        with self._lock:
+            self.prompt_tokens += usage.prompt_tokens
+            self.completion_tokens += usage.completion_tokens
+            self.calls += 1
+            if cached:
+                self.cached_calls += 1
+                self.cached_tokens += usage.total_tokens
+
+    def to_dict(self) -> Dict[str, int]:
+        """
+        Get the counts as a dictionary.
+
+        Returns:
+            Dict[str, int]: Prompt, completion, total and cached token counts and call counts.
+        """
+        with self._lock:
+            return {
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "total_tokens": self.prompt_tokens + self.completion_tokens,
+                "calls": self.calls,
+                "cached_calls": self.cached_calls,
+                "cached_tokens": self.cached_tokens,
+            }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, int]) -> "TokenUsage":
+        usage = cls(data.get("prompt_tokens", 0), data.get("completion_tokens", 0))
+        usage.calls = data.get("calls", 0)
+        usage.cached_calls = data.get("cached_calls", 0)
+        usage.cached_tokens = data.get("cached_tokens", 0)
+        return usage
+
+
+class TokenLedger:
+    """
+    Aggregates call usage in total and per model, agent, component and iteration.
+    """
+
+    DIMENSIONS = ("model", "agent", "component", "iteration")
+
+    def __init__(self) -> None:
+        """
+        Initialize an empty ledger.
+        """
+        self._lock = threading.Lock()
+        self.total = TokenUsage()
+        self._by: Dict[str, Dict[Any, TokenUsage]] = {dim: {} for dim in self.DIMENSIONS}
+
+    def record(
+        self, model: str, usage: TokenUsage, labels: Dict[str, Any], cached: bool = False
+    ) -> None:
+        """
+        Record the usage of a call.
+
+        Args:
+            model (str): Model of the call.
+            usage (TokenUsage): Usage of the call.
+            labels (Dict[str, Any]): Scope labels of the call (agent, component, iteration).
+            cached (bool): Whether the call was answered from the response cache.
+        """
+        self.total.add(usage, cached)
+        keys = {**labels, "model": model}
+        with self._lock:
+            entries = [
+                self._by[dim].setdefault(keys[dim], TokenUsage())
+                for dim in self.DIMENSIONS
+                if keys.get(dim) is not None
+            ]
+        for entry in entries:
+            entry.add(usage, cached)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Get the aggregated usage.
+
+        Returns:
+            Dict[str, Any]: The "total" counts and, under "by_model", "by_agent",
+            "by_component" and "by_iteration", the counts per label value.
+        """
+        with self._lock:
+            by = {dim: dict(values) for dim, values in self._by.items()}
+        result: Dict[str, Any] = {"total": self.total.to_dict()}
+        for dim in self.DIMENSIONS:
+            result[f"by_{dim}"] = {key: usage.to_dict() for key, usage in by[dim].items()}
+        return result
+
+    @classmethod
+    def from_summary(cls, summary: Dict[str, Any]) -> "TokenLedger":
+        """
+        Rebuild a ledger from its summary, e.g. when resuming a checkpointed run.
+
+        Args:
+            summary (Dict[str, Any]): Output of summary.
+
+        Returns:
+            TokenLedger: A ledger with the same counts.
+        """
+        ledger = cls()
+        ledger.restore(summary)
+        return ledger
+
+    def restore(self, summary: Dict[str, Any]) -> None:
+        """
+        Replace the counts with those of a summary, in place, so token scopes that
+        already hold this ledger keep recording into it.
+
+        Args:
+            summary (Dict[str, Any]): Output of summary.
+        """
+        by = {
+            dim: {
+                # JSON checkpoints turn integer iterations into strings
+                (int(key) if dim == "iteration" and str(key).isdigit() else key): TokenUsage.from_dict(data)
+                for key, data in summary.get(f"by_{dim}", {}).items()
+            }
+            for dim in self.DIMENSIONS
+        }
+        with self._lock:
+            self.total = TokenUsage.from_dict(summary.get("total", {}))
+            self._by = by
+
+
+# Innermost scope last: (labels, ledger, usage accumulated in the scope)
+_Frame = Tuple[Dict[str, Any], Optional[TokenLedger], TokenUsage]
+_scopes: contextvars.ContextVar[Tuple[_Frame, ...]] = contextvars.ContextVar(
+    "token_scopes", default=()
+)
+_global_ledger = TokenLedger()
+
+
+def get_token_ledger() -> TokenLedger:
+    """
+    Get the ledger calls made in the current context are recorded into.
+
+    Returns:
+        TokenLedger: The ledger of the innermost scope that set one, else the
+        process-wide ledger.
+    """
+    for _, ledger, _ in reversed(_scopes.get()):
+        if ledger is not None:
+            return ledger
+    return _global_ledger
+
+
+@contextmanager
+def token_scope(ledger: Optional[TokenLedger] = None, **labels: Any) -> Iterator[TokenUsage]:
+    """
+    Label the LLM calls made inside the block and measure their usage.
+
+    Args:
+        ledger (Optional[TokenLedger]): Ledger to record into; inherited from the
+            enclosing scope if None.
+        **labels (Any): Labels such as agent, component or iteration; inner scopes
+            override the labels of outer ones.
+
+    Yields:
+        TokenUsage: The usage of the calls made inside the block, including calls
+        made on threads that copied the context.
+    """
+    usage = TokenUsage()
+    token = _scopes.set(_scopes.get() + ((labels, ledger, usage),))
+    try:
+        yield usage
+    finally:
+        _scopes.reset(token)
+
+
+def set_token_labels(**labels: Any) -> None:
+    """
+    Change labels of the innermost scope for the rest of the current context.
+
+    Used for labels that advance inside a long-running block, such as the iteration
+    of a coordination loop.
+
+    Args:
+        **labels (Any): Labels to set.
+    """
+    scopes = _scopes.get()
+    if scopes:
+        current, ledger, usage = scopes[-1]
+        _scopes.set(scopes[:-1] + (({**current, **labels}, ledger, usage),))
+    else:
+        _scopes.set((({**labels}, None, TokenUsage()),))
+
+
+def get_token_labels() -> Dict[str, Any]:
+    """
+    Get the labels calls made in the current context are recorded with.
+
+    Returns:
+        Dict[str, Any]: The labels of all enclosing scopes, inner ones taking precedence.
+    """
+    labels: Dict[str, Any] = {}
+    for frame_labels, _, _ in _scopes.get():
+        labels.update(frame_labels)
+    return labels
+
+
+def record_usage(
+    model: str, prompt_tokens: int, completion_tokens: int, cached: bool = False
+) -> TokenUsage:
+    """
+    Record the usage of one call in the current scopes and ledger.
+
+    Args:
+        model (str): Model of the call.
+        prompt_tokens (int): Prompt tokens of the call.
+        completion_tokens (int): Completion tokens of the call.
+        cached (bool): Whether the call was answered from the response cache.
+
+    Returns:
+        TokenUsage: The usage of the call.
+    """
+    usage = TokenUsage(prompt_tokens, completion_tokens)
+    labels: Dict[str, Any] = {}
+    for frame_labels, _, frame_usage in _scopes.get():
+        labels.update(frame_labels)
+        frame_usage.add(usage, cached)
+    get_token_ledger().record(model, usage, labels, cached)
+    return usage
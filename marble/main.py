@@ -9,6 +9,7 @@ import os
 import sys
 
 from marble.configs.config import Config
+from marble.engine.batch_runner import run_batch
 from marble.engine.engine import Engine
 
 
@@ -20,26 +21,123 @@ def parse_args() -> argparse.Namespace:
         argparse.Namespace: Parsed arguments.
     """
     parser = argparse.ArgumentParser(description="Run the Marble simulation engine.")
-    parser.add_argument(
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
         "--config_path",
         type=str,
-        required=True,
         help="Path to the configuration YAML file.",
     )
+    source.add_argument(
+        "--tasks",
+        type=str,
+        help="Batch mode: a directory of configuration YAML files, a glob pattern or a JSONL file of tasks.",
+    )
     parser.add_argument(
         "--feedback_mode",
         action='store_true',
         help="whether to open the feedback_mode",
         default=False,
     )
+    parser.add_argument(
+        "--llm_cache_mode",
+        type=str,
+        choices=["off", "read_through", "record", "replay"],
+        default=None,
+        help="Response cache mode for LLM calls (overrides the config file).",
+    )
+    parser.add_argument(
+        "--llm_cache_dir",
+        type=str,
+        default=None,
+        help="Directory of the on-disk LLM response cache (overrides the config file).",
+    )
+    parser.add_argument(
+        "--checkpoint_path",
+        type=str,
+        default=None,
+        help="File the engine checkpoints to after every iteration (overrides the config file).",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        default=False,
+        help="Continue from the last completed iteration stored in the checkpoint.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Batch mode: number of tasks run concurrently.",
+    )
+    parser.add_argument(
+        "--executor",
+        type=str,
+        choices=["thread", "process"],
+        default="thread",
+        help="Batch mode: run tasks on threads of one process or on a process pool. Thread "
+        "tasks must agree on process-wide settings such as llm_cache, llm_stub and paper_store.",
+    )
+    parser.add_argument(
+        "--log_dir",
+        type=str,
+        default="logs/batch",
+        help="Batch mode: directory of the per-task log files.",
+    )
+    parser.add_argument(
+        "--progress_file",
+        type=str,
+        default=None,
+        help="Batch mode: progress file used to resume a sweep (default: <log_dir>/progress.jsonl).",
+    )
+    parser.add_argument(
+        "--max_concurrent_llm_calls",
+        type=int,
+        default=None,
+        help="Batch mode: cap on LLM calls in flight across all tasks.",
+    )
+    parser.add_argument(
+        "--no_resume",
+        action="store_true",
+        default=False,
+        help="Batch mode: rerun tasks that the progress file records as done and ignore task checkpoints.",
+    )
     return parser.parse_args()
 
 
+def main_batch(args: argparse.Namespace) -> None:
+    """
+    Run a batch of tasks with the specified task source.
+
+    Args:
+        args (argparse.Namespace): Parsed arguments.
+    """
+    # Tasks read the response cache settings from the environment unless their config sets them
+    if args.llm_cache_mode is not None:
+        os.environ["MARBLE_LLM_CACHE_MODE"] = args.llm_cache_mode
+    if args.llm_cache_dir is not None:
+        os.environ["MARBLE_LLM_CACHE_DIR"] = args.llm_cache_dir
+    records = run_batch(
+        args.tasks,
+        workers=args.workers,
+        executor=args.executor,
+        log_dir=args.log_dir,
+        progress_file=args.progress_file,
+        max_concurrent_llm_calls=args.max_concurrent_llm_calls,
+        feedback_mode=args.feedback_mode,
+        resume=not args.no_resume,
+    )
+    if any(record["status"] != "done" for record in records):
+        sys.exit(1)
+
+
 def main() -> None:
     """
     Main function to run the simulation with the specified config file.
     """
     args = parse_args()
+    if args.tasks is not None:
+        main_batch(args)
+        return
 
     # Check if the config file exists
     if not os.path.isfile(args.config_path):
@@ -52,12 +150,21 @@ def main() -> None:
     except Exception as e:
         logging.error(f"Error loading configuration from {args.config_path}: {e}")
         sys.exit(1)
+    if args.llm_cache_mode is not None:
+        config.llm_cache = {**config.llm_cache, "mode": args.llm_cache_mode}
+    if args.llm_cache_dir is not None:
+        config.llm_cache = {**config.llm_cache, "cache_dir": args.llm_cache_dir}
+    if args.checkpoint_path is not None:
+        config.output = {**config.output, "checkpoint_path": args.checkpoint_path}
+    if args.resume and not config.output.get("checkpoint_path"):
+        logging.error("--resume requires a checkpoint path (--checkpoint_path or output.checkpoint_path).")
+        sys.exit(1)
 
     # Initialize and start the engine
     try:
         logging.info(f"Starting engine with configuration: {args.config_path}")
         logging.info(f"feedback_mode started: {args.feedback_mode}")
-        engine = Engine(config, args.feedback_mode)
+        engine = Engine(config, args.feedback_mode, resume=args.resume)
         engine.start()
     except Exception:
         logging.exception(
@@ -3,7 +3,7 @@ Base memory module for agents.
 """
 
 import json
-from typing import Any, List
+from typing import Any, Dict, List, Optional
 
 
 class BaseMemory:
@@ -12,6 +12,15 @@ class BaseMemory:
     def __init__(self) -> None:
         """Initialize the memory module."""
         self.storage: List[Any] = []
+        # Bumped on every change of storage; _rewritten_version is the version of the
+        # last change that was not an append
+        self.version = 0
+        self._rewritten_version = 0
+        # Serialized form of storage, kept in step with it entry by entry
+        self._serialized_storage: Optional[List[Any]] = None
+        self._serialized_version = 0
+        self._serialized_entries: List[Any] = []
+        self._serialized: List[str] = []
 
     def update(self, key: str, information: Any) -> None:
         """
@@ -22,6 +31,7 @@ class BaseMemory:
             information (Any): Information to store.
         """
         self.storage.append(information)
+        self._mark_changed()
 
     def retrieve_latest(self) -> Any:
         """
@@ -63,6 +73,62 @@ class BaseMemory:
         """
         return f"BaseMemory(storage={self.storage})"
 
+    def _mark_changed(self, rewritten: bool = False) -> None:
+        """
+        Record a change of storage.
+
+        Args:
+            rewritten (bool): Whether stored entries were removed or replaced rather
+                than entries appended.
+        """
+        self.version += 1
+        if rewritten:
+            self._rewritten_version = self.version
+
+    def _serialize_entry(self, information: Any) -> str:
+        return json.dumps(information)
+
+    def _sync_serialized(self) -> List[str]:
+        """
+        Serialize the entries added since the last call.
+
+        Entries are treated as immutable once stored. Appends only serialize the new
+        tail; if entries were removed or replaced (see _mark_changed), or storage was
+        assigned a new list, the strings of the entries that are still stored are
+        reused.
+
+        Returns:
+            List[str]: The serialized entries, in storage order.
+        """
+        version = self.version
+        storage = list(self.storage)
+        cached = self._serialized_entries
+        if version == self._serialized_version and self.storage is self._serialized_storage and len(
+            cached
+        ) == len(storage):
+            return self._serialized
+        if (
+            self._rewritten_version > self._serialized_version
+            or self.storage is not self._serialized_storage
+            or len(cached) > len(storage)
+        ):
+            previous: Dict[int, str] = {
+                id(entry): text for entry, text in zip(cached, self._serialized)
+            }
+            self._serialized_entries = []
+            self._serialized = []
+            for entry in storage:
+                self._serialized_entries.append(entry)
+                text = previous.get(id(entry))
+                self._serialized.append(text if text is not None else self._serialize_entry(entry))
+        else:
+            for entry in storage[len(cached) :]:
+                self._serialized_entries.append(entry)
+                self._serialized.append(self._serialize_entry(entry))
+        self._serialized_storage = self.storage
+        self._serialized_version = version
+        return self._serialized
+
     def get_memory_str(self) -> str:
         """
         Get a string representation of the memory.
@@ -70,5 +136,44 @@ class BaseMemory:
         Returns:
             str: String representation of the memory.
         """
-        memory_str = " ".join([json.dumps(info) for info in self.storage])
+        memory_str = " ".join(self._sync_serialized())
         return memory_str
+
+    def render(self, token_budget: Optional[int] = None) -> str:
+        """
+        Render the memory for a prompt within a token budget.
+
+        The most recent entries are kept first; older entries that do not fit are
+        dropped and replaced by a note saying how many were omitted. The newest
+        entry is always kept, cut to the budget if it alone exceeds it.
+
+        Args:
+            token_budget (Optional[int]): Approximate number of tokens (about four characters
+                each) the rendered memory may take; unlimited if None.
+
+        Returns:
+            str: The kept entries in chronological order, like get_memory_str.
+        """
+        serialized = self._sync_serialized()
+        if token_budget is None:
+            return " ".join(serialized)
+        budget = token_budget * 4
+        kept = 0
+        used = 0
+        for text in reversed(serialized):
+            used += len(text) + 1
+            if used > budget:
+                break
+            kept += 1
+        if kept == len(serialized):
+            return " ".join(serialized)
+        if kept == 0:
+            # The newest entry alone is over budget; keep its start rather than nothing
+            kept_texts = [serialized[-1][:budget]]
+            kept = 1
+        else:
+            kept_texts = serialized[len(serialized) - kept :]
+        if kept == len(serialized):
+            return " ".join(kept_texts)
+        omitted = f"[{len(serialized) - kept} older memory entries omitted]"
+        return " ".join([omitted] + kept_texts)
@@ -1,14 +1,14 @@
 import warnings
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Union
 
 import numpy as np
 from litellm.types.utils import Message
 from numpy.typing import NDArray
-from sklearn.metrics.pairwise import cosine_similarity
 
 from marble.llms.model_prompting import model_prompting
-from marble.llms.text_embedding import text_embedding
+from marble.llms.text_embedding import text_embedding, text_embeddings
 from marble.memory.base_memory import BaseMemory
+from marble.memory.vector_index import VectorIndex
 
 
 class LongTermMemory(BaseMemory):
@@ -16,12 +16,43 @@ class LongTermMemory(BaseMemory):
     Long term momery class that implements memory retrieval.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, approximate_threshold: Optional[int] = None) -> None:
         """
         Initialize the memory module.
+
+        Args:
+            approximate_threshold (Optional[int]): Number of memories from which retrieval
+                uses an approximate index; always exact if None.
         """
         super().__init__()
         self.storage: List[tuple[Any, Any]] = []
+        self.index = VectorIndex(approximate_threshold=approximate_threshold)
+        self._indexed_storage: List[tuple[Any, Any]] = self.storage
+        self._indexed_version = self.version
+
+    def _sync_index(self) -> None:
+        """
+        Bring the vector index up to date with storage.
+
+        storage stays the source of truth, so callers that append to it or replace
+        it (e.g. when restoring a checkpoint) keep working. Appends only index the new
+        tail; the index is rebuilt if entries were removed or replaced (see
+        _mark_changed) or storage was assigned a new list.
+        """
+        if (
+            self._rewritten_version > self._indexed_version
+            or self._indexed_storage is not self.storage
+            or len(self.index) > len(self.storage)
+        ):
+            self.index.clear()
+            self._indexed_storage = self.storage
+        if len(self.index) < len(self.storage):
+            self.index.add(
+                np.stack(
+                    [embedding for _, embedding in self.storage[len(self.index) :]]
+                )
+            )
+        self._indexed_version = self.version
 
     def update(self, key: str, information: Dict[str, Any]) -> None:
         """
@@ -37,6 +68,23 @@ class LongTermMemory(BaseMemory):
         )
         embedding_array: NDArray[Any] = np.array(embedding)
         self.storage.append((information, embedding_array))
+        self._mark_changed()
+
+    def update_many(self, key: str, informations: List[Dict[str, Any]]) -> None:
+        """
+        Update memory with several pieces of information using one embedding request.
+
+        Args:
+            key (str): Only here to keep the signature consistent with SharedMemory.
+            informations (List[Dict[str, Any]]): Information to store, in order.
+        """
+        embeddings = text_embeddings(
+            model="text-embedding-3-small",
+            inputs=[str(information) for information in informations],
+        )
+        for information, embedding in zip(informations, embeddings):
+            self.storage.append((information, np.array(embedding)))
+        self._mark_changed()
 
     def retrieve_latest(self) -> Any:
         """
@@ -71,15 +119,11 @@ class LongTermMemory(BaseMemory):
             input=str(information),
         )
         embedding_array: NDArray[Any] = np.array(embedding)
-        retrieval_scores = []
-        for stored_information in self.storage:
-            similarity = cosine_similarity(
-                stored_information[1].reshape((1, -1)), embedding_array.reshape((1, -1))
-            )[0][0]
-            retrieval_scores.append((stored_information[0], similarity))
-        retrieval_scores = sorted(
-            retrieval_scores, key=lambda score: score[1], reverse=True
-        )[:n]
+        self._sync_index()
+        retrieval_scores = [
+            (self.storage[row][0], similarity)
+            for row, similarity in self.index.search(embedding_array, k=n)
+        ]
         if summarize:
             summary = self.summarize(
                 [scored_information[0] for scored_information in retrieval_scores]
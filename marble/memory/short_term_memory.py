@@ -1,26 +1,66 @@
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any, Dict, List, Optional, Union
 
 from litellm.types.utils import Message
 
 from marble.llms.model_prompting import model_prompting
 from marble.memory.base_memory import BaseMemory
+from marble.utils.logger import get_logger
+
+logger = get_logger("ShortTermMemory")
+
+# Shared by all short-term memories; each memory has at most one job in flight
+_summarizer_pool: Optional[ThreadPoolExecutor] = None
+_summarizer_pool_lock = threading.Lock()
+
+
+def _get_summarizer_pool() -> ThreadPoolExecutor:
+    global _summarizer_pool
+    with _summarizer_pool_lock:
+        if _summarizer_pool is None:
+            _summarizer_pool = ThreadPoolExecutor(
+                max_workers=4, thread_name_prefix="memory-summarizer"
+            )
+        return _summarizer_pool
 
 
 class ShortTermMemory(BaseMemory):
     """
     Short term memory class that automatically summarizes old information.
+
+    Once the memory grows past its limit, the oldest entries are replaced by a
+    summary. With background summarization the summary is computed on a worker
+    thread and swapped in atomically, so readers see either the raw entries or
+    the finished summary, never a partial state.
     """
 
-    def __init__(self, memory_limit: int = 10) -> None:
+    def __init__(
+        self,
+        memory_limit: int = 10,
+        summarizer_model: str = "gpt-3.5-turbo",
+        summarize_batch_size: int = 2,
+        background: bool = True,
+    ) -> None:
         """
         Initialize the memory module.
 
         Args:
             memory_limit (int): Maximum length of the memory.
+            summarizer_model (str): Model used to summarize old entries.
+            summarize_batch_size (int): Number of oldest entries folded into one summary
+                (at least 2).
+            background (bool): Summarize on a worker thread instead of inside update.
         """
         super().__init__()
         self.memory_limit: int = memory_limit
+        self.summarizer_model = summarizer_model
+        self.summarize_batch_size = max(2, summarize_batch_size)
+        self.background = background
         self.storage: List[Dict[str, Union[str, Message]]] = []
+        self._lock = threading.RLock()
+        self._summarizing: Optional[Future] = None
 
     def update(self, key: str, information: Dict[str, Any]) -> None:
         """
@@ -30,21 +70,75 @@ class ShortTermMemory(BaseMemory):
             key (str): Only here to keep the signature consistent with SharedMemory.
             information (Dict[str, Union[str, Message]]): Information to store.
         """
-        if len(self.storage) >= self.memory_limit:
-            if len(self.storage) >= 2:
-                oldest_event = self.storage.pop(0)
-                sec_oldest_event = self.storage.pop(0)
-                summary = self.summarize([oldest_event, sec_oldest_event])
-                self.storage.insert(
-                    0, {"type": "old_memory_summary", "result": summary}
-                )
-            elif len(self.storage) == 1:
-                oldest_event = self.storage.pop(0)
-                summary = self.summarize([oldest_event])
-                self.storage.insert(
-                    0, {"type": "old_memory_summary", "result": summary}
-                )
-        self.storage.append(information)
+        with self._lock:
+            self.storage.append(information)
+            self._mark_changed()
+            if self.background:
+                self._schedule_compaction()
+                return
+        while self._compact_once():
+            pass
+
+    def _next_batch(self) -> Optional[List[Dict[str, Union[str, Message]]]]:
+        """Oldest entries to summarize, or None if the memory is within its limit."""
+        with self._lock:
+            if len(self.storage) <= self.memory_limit:
+                return None
+            return self.storage[: self.summarize_batch_size]
+
+    def _compact_once(self) -> bool:
+        """
+        Replace the oldest entries by their summary.
+
+        Returns:
+            bool: Whether entries were compacted.
+        """
+        batch = self._next_batch()
+        if batch is None:
+            return False
+        summary = self.summarize(batch)
+        with self._lock:
+            # Only swap if the summarized entries are still the oldest ones
+            if len(self.storage) < len(batch) or not all(
+                stored is entry for stored, entry in zip(self.storage, batch)
+            ):
+                return False
+            self.storage[: len(batch)] = [{"type": "old_memory_summary", "result": summary}]
+            self._mark_changed(rewritten=True)
+        return True
+
+    def _schedule_compaction(self) -> None:
+        """Start a background compaction unless one is running. Called with the lock held."""
+        if self._summarizing is not None or len(self.storage) <= self.memory_limit:
+            return
+        context = contextvars.copy_context()
+        self._summarizing = _get_summarizer_pool().submit(context.run, self._compact_in_background)
+
+    def _compact_in_background(self) -> None:
+        try:
+            compacted = self._compact_once()
+        except Exception:
+            compacted = False
+            logger.exception("Background memory summarization failed; keeping the raw entries.")
+        with self._lock:
+            self._summarizing = None
+            if compacted:
+                # Entries may have arrived while the summary was computed
+                self._schedule_compaction()
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait until no background summarization is in flight.
+
+        Args:
+            timeout (Optional[float]): Maximum seconds to wait for each summarization job.
+        """
+        while True:
+            with self._lock:
+                job = self._summarizing
+            if job is None:
+                return
+            job.result(timeout=timeout)
 
     def summarize(self, memory: List[Dict[str, Union[str, Message]]]) -> Message:
         """
@@ -57,14 +151,14 @@ class ShortTermMemory(BaseMemory):
             Message: Summary of the input memory.
         """
         if not memory:
-            memory = self.storage
+            memory = self.retrieve_all()
 
         prompt = "You are a helpful assistant that can concisely summarize the following json format content which is listed in temporally sequential order:\n"
         for idx, information in enumerate(memory):
             prompt += f"{idx}. {str(information)}\n"
 
         summary = model_prompting(
-            llm_model="gpt-3.5-turbo",
+            llm_model=self.summarizer_model,
             messages=[{"role": "system", "content": prompt}],
             return_num=1,
             max_token_num=512,
@@ -81,7 +175,8 @@ class ShortTermMemory(BaseMemory):
         Returns:
             Dict[str, Union[str, Message]]: The most recently stored information, or None if empty.
         """
-        return self.storage[-1] if self.storage else None
+        with self._lock:
+            return self.storage[-1] if self.storage else None
 
     def retrieve_all(self) -> List[Dict[str, Union[str, Message]]]:
         """
@@ -90,4 +185,5 @@ class ShortTermMemory(BaseMemory):
         Returns:
             List[Dict[str, Union[str, Message]]]: All stored information.
         """
-        return self.storage.copy()
+        with self._lock:
+            return self.storage.copy()
@@ -0,0 +1,159 @@
+"""
+In-memory cosine-similarity index over embedding vectors.
+"""
+
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+
+class VectorIndex:
+    """
+    Exact cosine-similarity index backed by one contiguous float32 matrix.
+
+    Rows are normalized on insertion, so a query costs one matrix-vector product
+    plus an argpartition. Above approximate_threshold rows the index also
+    maintains an inverted-file (IVF) partition of the rows around k-means
+    centroids and only scores the rows of the nprobe closest partitions.
+    """
+
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        initial_capacity: int = 64,
+        approximate_threshold: Optional[int] = None,
+        nprobe: int = 8,
+    ):
+        """
+        Initialize the index.
+
+        Args:
+            dim (Optional[int]): Dimension of the vectors; taken from the first vector if None.
+            initial_capacity (int): Number of rows allocated up front.
+            approximate_threshold (Optional[int]): Size from which queries use the IVF
+                partition; always exact if None.
+            nprobe (int): Number of partitions scored per approximate query.
+        """
+        self.dim = dim
+        self.initial_capacity = max(1, initial_capacity)
+        self.approximate_threshold = approximate_threshold
+        self.nprobe = max(1, nprobe)
+        self._matrix: Optional[NDArray[np.float32]] = None
+        self._size = 0
+        self._centroids: Optional[NDArray[np.float32]] = None
+        self._assignments: Optional[NDArray[np.int64]] = None
+        self._trained_size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def vectors(self) -> NDArray[np.float32]:
+        """Normalized vectors of the index, one row per added vector."""
+        if self._matrix is None:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return self._matrix[: self._size]
+
+    @staticmethod
+    def _normalize(vectors: NDArray[Any]) -> NDArray[np.float32]:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        normalized: NDArray[np.float32] = vectors / norms
+        return normalized
+
+    def add(self, vectors: NDArray[Any]) -> None:
+        """
+        Append vectors to the index.
+
+        Args:
+            vectors (NDArray[Any]): One vector, or a matrix with one vector per row.
+
+        Raises:
+            ValueError: If the dimension does not match the index.
+        """
+        rows = self._normalize(np.atleast_2d(vectors))
+        if self.dim is None:
+            self.dim = rows.shape[1]
+        if rows.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of dimension {self.dim}, got {rows.shape[1]}.")
+        needed = self._size + len(rows)
+        if self._matrix is None or needed > len(self._matrix):
+            # Grow geometrically so appends are amortized O(1)
+            capacity = self.initial_capacity if self._matrix is None else len(self._matrix)
+            while capacity < needed:
+                capacity *= 2
+            matrix = np.empty((capacity, self.dim), dtype=np.float32)
+            if self._matrix is not None:
+                matrix[: self._size] = self._matrix[: self._size]
+            self._matrix = matrix
+        self._matrix[self._size : needed] = rows
+        if self._centroids is not None and self._assignments is not None:
+            self._assignments = np.concatenate(
+                [self._assignments, np.argmax(rows @ self._centroids.T, axis=1)]
+            )
+        self._size = needed
+
+    def clear(self) -> None:
+        """
+        Remove every vector from the index.
+        """
+        self._size = 0
+        self._centroids = None
+        self._assignments = None
+        self._trained_size = 0
+
+    def _use_approximate(self) -> bool:
+        return self.approximate_threshold is not None and self._size >= self.approximate_threshold
+
+    def _train(self, iterations: int = 10, seed: int = 0) -> None:
+        """Partition the rows with spherical k-means into about sqrt(size) lists."""
+        vectors = self.vectors
+        num_lists = max(1, int(np.sqrt(self._size)))
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(self._size, size=num_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = np.argmax(vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, vectors)
+            nonempty = np.bincount(assignments, minlength=num_lists) > 0
+            centroids[nonempty] = self._normalize(sums[nonempty])
+        self._centroids = centroids
+        self._assignments = np.argmax(vectors @ centroids.T, axis=1)
+        self._trained_size = self._size
+
+    def search(self, query: NDArray[Any], k: int = 1) -> List[Tuple[int, float]]:
+        """
+        Find the vectors most similar to a query.
+
+        Args:
+            query (NDArray[Any]): Query vector.
+            k (int): Number of results.
+
+        Returns:
+            List[Tuple[int, float]]: (row, cosine similarity) pairs, most similar first.
+        """
+        if self._size == 0 or k <= 0:
+            return []
+        query_row = self._normalize(np.asarray(query).reshape(-1))
+        candidates: Optional[NDArray[np.int64]] = None
+        if self._use_approximate():
+            # Retrain once the partition covers less than half of the rows
+            if self._centroids is None or self._size > 2 * self._trained_size:
+                self._train()
+            assert self._centroids is not None and self._assignments is not None
+            centroid_scores = self._centroids @ query_row
+            nprobe = min(self.nprobe, len(centroid_scores))
+            probed = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+            candidates = np.flatnonzero(np.isin(self._assignments, probed))
+        if candidates is None or len(candidates) < k:
+            candidates = None
+            scores = self.vectors @ query_row
+        else:
+            scores = self.vectors[candidates] @ query_row
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        rows = top if candidates is None else candidates[top]
+        return [(int(row), float(scores[index])) for row, index in zip(rows, top)]
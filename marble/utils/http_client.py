@@ -0,0 +1,274 @@
+"""
+Shared HTTP client for environments that fetch web pages.
+
+One pooled requests.Session serves every environment in the process. Page
+bodies are kept in a bounded in-memory LRU tier with a TTL and, optionally, in
+an on-disk tier shared across processes; stale on-disk entries are revalidated
+with their ETag/Last-Modified validators instead of being fetched again.
+Requests to the same host are spaced by a minimum interval, and concurrent
+fetches of one URL wait for a single request.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from marble.utils.logger import get_logger
+
+logger = get_logger("HTTP_CLIENT")
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/114.0.0.0 Safari/537.36 Edg/114.0.0.0"
+)
+
+
+class HttpClient:
+    """
+    Pooled, rate-limited HTTP client with a two-tier response cache.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: Optional[float] = 3600.0,
+        cache_dir: Optional[str] = None,
+        min_interval: float = 1.0,
+        timeout: float = 5.0,
+        pool_size: int = 16,
+        user_agent: str = DEFAULT_USER_AGENT,
+    ) -> None:
+        """
+        Initialize the client.
+
+        Args:
+            max_entries (int): Maximum number of pages kept in memory.
+            ttl (Optional[float]): Seconds a cached page is served without revalidation;
+                None keeps pages fresh forever.
+            cache_dir (Optional[str]): Directory of the on-disk tier; None disables it.
+            min_interval (float): Minimum seconds between requests to the same host.
+            timeout (float): Request timeout in seconds.
+            pool_size (int): Connections kept open per host.
+            user_agent (str): User-Agent header sent with every request.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self.hits = 0
+        self.disk_hits = 0
+        self.revalidations = 0
+        self.fetches = 0
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, threading.Event] = {}
+        self._next_slot: Dict[str, float] = {}
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._session.headers["User-Agent"] = user_agent
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def get_text(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> str:
+        """
+        Get the body of a page, from the cache if it is fresh there.
+
+        Args:
+            url (str): The URL to fetch.
+            headers (Optional[Dict[str, str]]): Extra request headers.
+            timeout (Optional[float]): Request timeout in seconds; the client's if None.
+
+        Returns:
+            str: The body of the page.
+
+        Raises:
+            requests.RequestException: If the request fails or returns an error status.
+        """
+        while True:
+            with self._lock:
+                entry = self._memory.get(url)
+                if entry is not None and self._is_fresh(entry):
+                    self._memory.move_to_end(url)
+                    self.hits += 1
+                    return str(entry["text"])
+                waiting = self._in_flight.get(url)
+                if waiting is None:
+                    self._in_flight[url] = threading.Event()
+                    break
+            # Another thread is fetching the same URL; use its result
+            waiting.wait()
+        try:
+            return self._fetch(url, entry, headers, timeout or self.timeout)
+        finally:
+            with self._lock:
+                self._in_flight.pop(url).set()
+
+    def _fetch(
+        self,
+        url: str,
+        stale: Optional[Dict[str, Any]],
+        headers: Optional[Dict[str, str]],
+        timeout: float,
+    ) -> str:
+        disk_entry = self._read_disk(url)
+        if disk_entry is not None:
+            if self._is_fresh(disk_entry):
+                with self._lock:
+                    self.disk_hits += 1
+                self._remember(url, disk_entry)
+                return str(disk_entry["text"])
+            stale = disk_entry
+        request_headers = dict(headers or {})
+        if stale is not None:
+            if stale.get("etag"):
+                request_headers["If-None-Match"] = stale["etag"]
+            if stale.get("last_modified"):
+                request_headers["If-Modified-Since"] = stale["last_modified"]
+
+        self._wait_for_host(url)
+        response = self._session.get(url, headers=request_headers, timeout=timeout)
+        if response.status_code == 304 and stale is not None:
+            entry = dict(stale, stored_at=time.time())
+            with self._lock:
+                self.revalidations += 1
+        else:
+            response.raise_for_status()
+            entry = {
+                "url": url,
+                "text": response.text,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "stored_at": time.time(),
+            }
+            with self._lock:
+                self.fetches += 1
+        self._remember(url, entry)
+        self._write_disk(url, entry)
+        return str(entry["text"])
+
+    def _is_fresh(self, entry: Dict[str, Any]) -> bool:
+        return self.ttl is None or time.time() - entry["stored_at"] < self.ttl
+
+    def _remember(self, url: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._memory[url] = entry
+            self._memory.move_to_end(url)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _wait_for_host(self, url: str) -> None:
+        """
+        Reserve the next request slot of the URL's host and wait for it.
+        """
+        if self.min_interval <= 0:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.time()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def _disk_path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(str(self.cache_dir), f"{key}.json")
+
+    def _read_disk(self, url: str) -> Optional[Dict[str, Any]]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._disk_path(url), "r", encoding="utf-8") as f:
+                entry: Dict[str, Any] = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("url") == url else None
+
+    def _write_disk(self, url: str, entry: Dict[str, Any]) -> None:
+        if not self.cache_dir:
+            return
+        path = self._disk_path(url)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write the HTTP cache entry of {url}: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the cache statistics.
+
+        Returns:
+            Dict[str, int]: Memory and disk hits, revalidations, fetches and cached pages.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "revalidations": self.revalidations,
+                "fetches": self.fetches,
+                "entries": len(self._memory),
+            }
+
+    def close(self) -> None:
+        """
+        Close the pooled connections.
+        """
+        self._session.close()
+
+
+_http_client: Optional[HttpClient] = None
+_config_lock = threading.Lock()
+
+
+def configure_http_client(**kwargs: Any) -> HttpClient:
+    """
+    Install the process-wide HTTP client.
+
+    Args:
+        **kwargs (Any): Arguments of HttpClient.
+
+    Returns:
+        HttpClient: The installed client.
+    """
+    global _http_client
+    with _config_lock:
+        if _http_client is not None:
+            _http_client.close()
+        _http_client = HttpClient(**kwargs)
+        return _http_client
+
+
+def get_http_client() -> HttpClient:
+    """
+    Get the process-wide HTTP client.
+
+    Unless configure_http_client was called, the client uses the defaults, with
+    the on-disk tier at the MARBLE_HTTP_CACHE_DIR environment variable if set.
+
+    Returns:
+        HttpClient: The shared client.
+    """
+    global _http_client
+    with _config_lock:
+        if _http_client is None:
+            _http_client = HttpClient(cache_dir=os.environ.get("MARBLE_HTTP_CACHE_DIR") or None)
+        return _http_client
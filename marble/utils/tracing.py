@@ -0,0 +1,420 @@
+"""
+Lightweight span tracing for runs.
+
+Spans nest through a context variable, so work submitted to thread pools that
+copy the context (parallel agents, tool calls, evaluations) is attributed to the
+span that submitted it. Finished spans are appended to a local JSONL file as they
+end, and flush appends the spans finished since the last flush to a Chrome trace
+(chrome://tracing, ui.perfetto.dev). No collector is needed.
+
+Tracing is off unless configure_tracing was called or MARBLE_TRACE_DIR is set;
+span and traced then cost a context-variable lookup.
+"""
+
+import asyncio
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, TypeVar, cast
+
+from marble.utils.logger import get_logger
+
+logger = get_logger("TRACING")
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_span_ids = itertools.count(1)
+
+# How the Chrome trace file ends, so flush can append events before it
+_CHROME_TRACE_END = "]}"
+
+
+class Span:
+    """
+    A timed operation with attributes, events and an error status.
+    """
+
+    def __init__(
+        self, name: str, category: str, parent: Optional["Span"], attributes: Dict[str, Any]
+    ) -> None:
+        """
+        Start the span.
+
+        Args:
+            name (str): Name of the operation.
+            category (str): Category, e.g. "engine", "agent", "environment", "llm".
+            parent (Optional[Span]): The enclosing span.
+            attributes (Dict[str, Any]): Initial attributes.
+        """
+        self.name = name
+        self.category = category
+        self.span_id = next(_span_ids)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.thread_id = threading.get_ident()
+        self.thread_name = threading.current_thread().name
+        self.attributes = attributes
+        self.events: List[Dict[str, Any]] = []
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self.start = time.time()
+        self._start_perf = time.perf_counter()
+        self.duration: Optional[float] = None
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, **attributes: Any) -> None:
+        """
+        Record a point-in-time event, such as a retry, on the span.
+
+        Args:
+            name (str): Name of the event.
+            **attributes (Any): Attributes of the event.
+        """
+        self.events.append({"name": name, "time": time.time(), **attributes})
+
+    def set_error(self, error: str) -> None:
+        self.status = "error"
+        self.error = error
+
+    def end(self) -> None:
+        self.duration = time.perf_counter() - self._start_perf
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "category": self.category,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "thread": self.thread_name,
+            "start": self.start,
+            "duration": self.duration,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+            "events": self.events,
+        }
+
+
+class _NoopSpan:
+    """
+    Stands in for a span while tracing is off.
+    """
+
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+
+    def add_event(self, name: str, **attributes: Any) -> None:
+        pass
+
+    def set_error(self, error: str) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """
+    Collects finished spans and exports them to JSONL and Chrome trace files.
+
+    Spans are held in memory only for the Chrome trace, and only until the next flush.
+    """
+
+    def __init__(
+        self, jsonl_path: Optional[str] = None, chrome_trace_path: Optional[str] = None
+    ) -> None:
+        """
+        Initialize the tracer.
+
+        Args:
+            jsonl_path (Optional[str]): File each finished span is appended to as a JSON line.
+            chrome_trace_path (Optional[str]): File flush writes the Chrome trace to.
+        """
+        self.jsonl_path = jsonl_path
+        self.chrome_trace_path = chrome_trace_path
+        self._lock = threading.Lock()
+        self._spans: List[Span] = []
+        self._jsonl_file: Optional[Any] = None
+        # Serializes the Chrome trace writes of concurrent flushes
+        self._flush_lock = threading.Lock()
+        self._chrome_events_written: Optional[int] = None
+        self._named_threads: Set[int] = set()
+        for path in (jsonl_path, chrome_trace_path):
+            if path and os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def finish(self, span: Span) -> None:
+        """
+        Record a finished span.
+
+        Args:
+            span (Span): The span.
+        """
+        line = json.dumps(span.to_dict(), default=str) if self.jsonl_path else None
+        with self._lock:
+            if self.chrome_trace_path:
+                self._spans.append(span)
+            if line is not None:
+                if self._jsonl_file is None:
+                    self._jsonl_file = open(self.jsonl_path, "a", encoding="utf-8")
+                self._jsonl_file.write(line + "\n")
+
+    def spans(self) -> List[Span]:
+        """
+        Get the finished spans not yet flushed to the Chrome trace.
+
+        Returns:
+            List[Span]: The spans in the order they ended; empty without a Chrome trace path.
+        """
+        with self._lock:
+            return list(self._spans)
+
+    def chrome_trace(self, spans: Optional[List[Span]] = None) -> Dict[str, Any]:
+        """
+        Render spans in the Chrome trace event format.
+
+        Args:
+            spans (Optional[List[Span]]): Spans to render; the ones not yet flushed if None.
+
+        Returns:
+            Dict[str, Any]: Complete events per span, instant events per span event and
+            the names of the threads.
+        """
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = []
+        threads: Dict[int, str] = {}
+        for span in self.spans() if spans is None else spans:
+            threads[span.thread_id] = span.thread_name
+            args = dict(span.attributes, status=span.status)
+            if span.error:
+                args["error"] = span.error
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": span.start * 1e6,
+                    "dur": (span.duration or 0) * 1e6,
+                    "pid": pid,
+                    "tid": span.thread_id,
+                    "args": args,
+                }
+            )
+            for event in span.events:
+                events.append(
+                    {
+                        "name": event["name"],
+                        "cat": span.category,
+                        "ph": "i",
+                        "s": "t",
+                        "ts": event["time"] * 1e6,
+                        "pid": pid,
+                        "tid": span.thread_id,
+                        "args": {k: v for k, v in event.items() if k not in ("name", "time")},
+                    }
+                )
+        for tid, name in threads.items():
+            events.append(
+                {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def flush(self) -> None:
+        """
+        Flush the JSONL file and append the spans finished since the last flush to the
+        Chrome trace, which stays a complete JSON document after every flush.
+        """
+        with self._lock:
+            if self._jsonl_file is not None:
+                self._jsonl_file.flush()
+            spans, self._spans = self._spans, []
+        if not self.chrome_trace_path:
+            return
+        with self._flush_lock:
+            trace = self.chrome_trace(spans)
+            events = [
+                event
+                for event in trace["traceEvents"]
+                if event["ph"] != "M" or event["tid"] not in self._named_threads
+            ]
+            self._named_threads.update(event["tid"] for event in events if event["ph"] == "M")
+            if self._chrome_events_written is None:
+                # The first flush replaces a trace left by an earlier run
+                with open(self.chrome_trace_path, "w", encoding="utf-8") as f:
+                    json.dump({"displayTimeUnit": "ms", "traceEvents": events}, f, default=str)
+                self._chrome_events_written = len(events)
+            elif events:
+                separator = ", " if self._chrome_events_written else ""
+                body = ", ".join(json.dumps(event, default=str) for event in events)
+                with open(self.chrome_trace_path, "rb+") as f:
+                    f.seek(-len(_CHROME_TRACE_END), os.SEEK_END)
+                    f.write((separator + body + _CHROME_TRACE_END).encode("utf-8"))
+                self._chrome_events_written += len(events)
+        logger.info(f"Trace written to {self.chrome_trace_path}")
+
+    def close(self) -> None:
+        """
+        Flush the tracer and close its JSONL file.
+        """
+        self.flush()
+        with self._lock:
+            if self._jsonl_file is not None:
+                self._jsonl_file.close()
+                self._jsonl_file = None
+
+
+_tracer: Optional[Tracer] = None
+_configured = False
+_config_lock = threading.Lock()
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+def configure_tracing(
+    jsonl_path: Optional[str] = None,
+    chrome_trace_path: Optional[str] = None,
+    enabled: bool = True,
+) -> Optional[Tracer]:
+    """
+    Install the process-wide tracer.
+
+    Args:
+        jsonl_path (Optional[str]): File finished spans are appended to as JSON lines.
+        chrome_trace_path (Optional[str]): File flush writes the Chrome trace to.
+        enabled (bool): False turns tracing off.
+
+    Returns:
+        Optional[Tracer]: The installed tracer, or None if tracing is off.
+    """
+    global _tracer, _configured
+    with _config_lock:
+        if _tracer is not None:
+            _tracer.close()
+        _tracer = Tracer(jsonl_path, chrome_trace_path) if enabled else None
+        _configured = True
+        if enabled:
+            logger.info(f"Tracing to {jsonl_path} and {chrome_trace_path}")
+        return _tracer
+
+
+def get_tracer() -> Optional[Tracer]:
+    """
+    Get the process-wide tracer.
+
+    Unless configure_tracing was called, tracing is enabled when the
+    MARBLE_TRACE_DIR environment variable names a directory for trace.jsonl and
+    trace.json, and off otherwise.
+
+    Returns:
+        Optional[Tracer]: The active tracer, or None if tracing is off.
+    """
+    if not _configured:
+        trace_dir = os.environ.get("MARBLE_TRACE_DIR")
+        configure_tracing(
+            jsonl_path=os.path.join(trace_dir, "trace.jsonl") if trace_dir else None,
+            chrome_trace_path=os.path.join(trace_dir, "trace.json") if trace_dir else None,
+            enabled=bool(trace_dir),
+        )
+    return _tracer
+
+
+@contextmanager
+def span(name: str, category: str = "default", **attributes: Any) -> Iterator[Any]:
+    """
+    Trace the block as a span nested in the current one.
+
+    The span also carries the token-ledger labels (agent, component, iteration) of
+    the context it starts in. An exception leaving the block marks the span as failed.
+
+    Args:
+        name (str): Name of the operation.
+        category (str): Category of the operation.
+        **attributes (Any): Attributes of the span.
+
+    Yields:
+        Span: The span, or a no-op stand-in while tracing is off.
+    """
+    tracer = get_tracer()
+    if tracer is None:
+        yield _NOOP_SPAN
+        return
+    # Imported here: marble.llms imports this module
+    from marble.llms.token_ledger import get_token_labels
+
+    current = Span(name, category, _current_span.get(), {**get_token_labels(), **attributes})
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.set_error(f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+        tracer.finish(current)
+
+
+def add_span_event(name: str, **attributes: Any) -> None:
+    """
+    Record an event, such as a retry, on the current span.
+
+    Args:
+        name (str): Name of the event.
+        **attributes (Any): Attributes of the event.
+    """
+    current = _current_span.get()
+    if current is not None:
+        current.add_event(name, **attributes)
+
+
+def traced(
+    name: Optional[str] = None,
+    category: str = "default",
+    attributes: Optional[Callable[..., Dict[str, Any]]] = None,
+) -> Callable[[F], F]:
+    """
+    Decorator tracing each call of a function or coroutine function as a span.
+
+    Args:
+        name (Optional[str]): Span name; the function's qualified name if None.
+        category (str): Span category.
+        attributes (Optional[Callable[..., Dict[str, Any]]]): Builds span attributes from
+            the call's arguments.
+
+    Returns:
+        Callable[[F], F]: The decorator.
+    """
+
+    def decorator(func: F) -> F:
+        span_name = name or func.__qualname__
+
+        if asyncio.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if get_tracer() is None:
+                    return await func(*args, **kwargs)
+                extra = attributes(*args, **kwargs) if attributes else {}
+                with span(span_name, category, **extra):
+                    return await func(*args, **kwargs)
+
+            return cast(F, async_wrapper)
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if get_tracer() is None:
+                return func(*args, **kwargs)
+            extra = attributes(*args, **kwargs) if attributes else {}
+            with span(span_name, category, **extra):
+                return func(*args, **kwargs)
+
+        return cast(F, wrapper)
+
+    return decorator
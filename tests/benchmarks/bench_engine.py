@@ -0,0 +1,398 @@
+"""
+Framework benchmark for the coordination modes of Engine.
+
+Runs Engine offline in graph, star, chain and tree mode against synthetic configs.
+The stub LLM backend (see marble.llms.stub_backend) answers every call after a
+scripted latency, and network-bound actions of the Research environment are
+answered with synthetic payloads. For each case it reports:
+
+- wall time and CPU time, in total and per iteration
+- framework CPU time. This is the process CPU time; simulated LLM latency is spent
+  sleeping, so it is not included.
+- peak RSS, and the peak RSS after imports for reference
+- prompt bytes sent per agent
+
+Every case runs in a fresh interpreter, so peak RSS and process-wide state belong to
+that case alone. Results are stored as JSON together with the commit they were
+measured on. --compare reports the change between two result files and exits with
+status 1 if a metric regressed beyond the threshold.
+
+Usage (from the repository root):
+    python tests/benchmarks/bench_engine.py --agents 2,10,50,200 --output bench.json
+    python tests/benchmarks/bench_engine.py --modes graph --envs Base --agents 10 --latency 0
+    python tests/benchmarks/bench_engine.py --compare before.json after.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MODES = ("graph", "star", "chain", "tree")
+ENVS = ("Base", "Research", "Coding")
+# Metrics compared by --compare; larger is worse for all of them
+COMPARED_METRICS = ("wall_time", "cpu_time", "peak_rss_mb", "prompt_bytes_per_agent")
+
+
+def build_config(case: Dict[str, Any], workdir: str) -> Dict[str, Any]:
+    """
+    Build a synthetic engine config for a benchmark case.
+
+    Agents are linked in a path for the graph, star and chain modes and in a
+    binary tree for the tree mode.
+
+    Args:
+        case (Dict[str, Any]): The case ("mode", "agents", "env", "iterations").
+        workdir (str): Directory for the case's output files.
+
+    Returns:
+        Dict[str, Any]: The config data.
+    """
+    agent_ids = [f"agent{i}" for i in range(1, case["agents"] + 1)]
+    if case["mode"] == "tree":
+        relationships = [
+            [agent_ids[(i - 1) // 2], agent_ids[i], "parent"] for i in range(1, len(agent_ids))
+        ]
+    else:
+        relationships = [
+            [agent_ids[i], agent_ids[i + 1], "collaborates_with"]
+            for i in range(len(agent_ids) - 1)
+        ]
+    environment: Dict[str, Any] = {"type": case["env"], "max_iterations": case["iterations"]}
+    if case["env"] == "Coding":
+        environment["workspace_dir"] = os.path.join(workdir, "workspace")
+    return {
+        "coordinate_mode": case["mode"],
+        "llm": "stub/bench",
+        "environment": environment,
+        "task": {"content": "Produce a short report on the benchmark topic."},
+        "agents": [
+            {
+                "type": "BaseAgent",
+                "agent_id": agent_id,
+                "profile": f"{agent_id} is a diligent analyst who shares findings with peers.",
+            }
+            for agent_id in agent_ids
+        ],
+        "relationships": relationships,
+        "memory": {"type": "SharedMemory"},
+        "metrics": {"evaluate_llm": "stub/judge"},
+        "engine_planner": {"initial_progress": "Starting the benchmark."},
+        "output": {"file_path": os.path.join(workdir, "output.jsonl")},
+    }
+
+
+def _offline_research_handlers(environment: Any, payload_bytes: int) -> None:
+    """
+    Answer the network-bound actions of a research environment with synthetic papers.
+    """
+    abstract = ("lorem ipsum " * (payload_bytes // 12 + 1))[:payload_bytes]
+
+    def papers(**kwargs: Any) -> Dict[str, Any]:
+        return {"success": True, "papers": [{"title": "Synthetic paper", "abstract": abstract}]}
+
+    def webpage(**kwargs: Any) -> Dict[str, Any]:
+        return {"success": True, "content": abstract}
+
+    for name in list(environment.action_handler_descriptions):
+        environment._action_handlers[name] = webpage if name == "fetch_webpage" else papers
+
+
+class _IterationClock:
+    """
+    Records wall and CPU time at the start of every engine iteration.
+    """
+
+    def __init__(self) -> None:
+        self.marks: List[Dict[str, Any]] = []
+
+    def wrap(self, set_token_labels: Callable[..., None]) -> Callable[..., None]:
+        # The engine labels LLM calls with the iteration as each iteration starts
+        def wrapped(**labels: Any) -> None:
+            if "iteration" in labels:
+                self.marks.append(
+                    {
+                        "iteration": labels["iteration"],
+                        "wall": time.perf_counter(),
+                        "cpu": time.process_time(),
+                    }
+                )
+            set_token_labels(**labels)
+
+        return wrapped
+
+    def iterations(self, end_wall: float, end_cpu: float) -> List[Dict[str, Any]]:
+        """
+        Get the duration of each iteration; the last one runs until the engine returns.
+        """
+        ends = self.marks[1:] + [{"wall": end_wall, "cpu": end_cpu}]
+        return [
+            {
+                "iteration": mark["iteration"],
+                "wall_time": round(end["wall"] - mark["wall"], 4),
+                "cpu_time": round(end["cpu"] - mark["cpu"], 4),
+            }
+            for mark, end in zip(self.marks, ends)
+        ]
+
+
+def run_case(case: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one benchmark case in this process.
+
+    Args:
+        case (Dict[str, Any]): The case, see main for its keys.
+
+    Returns:
+        Dict[str, Any]: The measurements of the case.
+    """
+    sys.path.insert(0, REPO_ROOT)
+    from marble.configs.config import Config
+    from marble.engine import engine as engine_module
+    from marble.engine.engine import Engine
+    from marble.llms.stub_backend import StubBackend, configure_stub_backend
+    from marble.llms.token_ledger import get_token_labels
+
+    # Peak RSS once the framework and its dependencies are imported
+    import_rss_mb = _peak_rss_mb()
+
+    class MeteredBackend(StubBackend):
+        """
+        Stub backend that meters prompt bytes per agent and simulated latency.
+        """
+
+        def __init__(self, **kwargs: Any) -> None:
+            super().__init__(**kwargs)
+            self._lock = threading.Lock()
+            self.calls = 0
+            self.latency_total = 0.0
+            self.prompt_bytes: Dict[str, int] = defaultdict(int)
+
+        def respond(self, llm_model, messages, tools=None, tool_choice=None):  # type: ignore[no-untyped-def]
+            response, latency = super().respond(llm_model, messages, tools, tool_choice)
+            labels = get_token_labels()
+            owner = labels.get("agent") or f"component:{labels.get('component', 'other')}"
+            size = sum(len(str(message.get("content") or "").encode("utf-8")) for message in messages)
+            with self._lock:
+                self.calls += 1
+                self.latency_total += latency
+                self.prompt_bytes[owner] += size
+            return response, latency
+
+    backend = MeteredBackend(
+        seed=case["seed"],
+        latency=case["latency"],
+        latency_jitter=case["latency_jitter"],
+        max_tool_calls=case["max_tool_calls"],
+    )
+    configure_stub_backend(backend)
+    workdir = tempfile.mkdtemp(prefix="marble-bench-")
+    config = Config(build_config(case, workdir))
+    if case["env"] == "Coding":
+        # Coding actions read the model and task from the module-level coding config
+        from marble.environments.coding_utils import coder, reviewer
+
+        for module in (coder, reviewer):
+            module.CONFIG = {"llm": config.llm, "task": config.task}
+
+    clock = _IterationClock()
+    engine_module.set_token_labels = clock.wrap(engine_module.set_token_labels)
+    status, error = "ok", None
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        engine = Engine(config)
+        if case["env"] == "Research":
+            _offline_research_handlers(engine.environment, case["payload_bytes"])
+        engine.start()
+    except Exception as e:
+        status, error = "error", f"{type(e).__name__}: {e}"
+    wall_end, cpu_end = time.perf_counter(), time.process_time()
+
+    agent_bytes = {
+        owner: size for owner, size in backend.prompt_bytes.items() if not owner.startswith("component:")
+    }
+    return {
+        "case": case,
+        "status": status,
+        "error": error,
+        "wall_time": round(wall_end - wall_start, 4),
+        "cpu_time": round(cpu_end - cpu_start, 4),
+        "llm_calls": backend.calls,
+        "llm_latency": round(backend.latency_total, 4),
+        "iterations": clock.iterations(wall_end, cpu_end),
+        "peak_rss_mb": _peak_rss_mb(),
+        "import_rss_mb": import_rss_mb,
+        "prompt_bytes_per_agent": (
+            round(sum(agent_bytes.values()) / case["agents"], 1) if agent_bytes else 0
+        ),
+        "prompt_bytes_max_agent": max(agent_bytes.values(), default=0),
+        "prompt_bytes": dict(backend.prompt_bytes),
+    }
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Run every case of the matrix, each in a fresh interpreter.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments.
+
+    Returns:
+        Dict[str, Any]: The results with the commit and settings they were measured with.
+    """
+    results = []
+    for env in args.envs.split(","):
+        for mode in args.modes.split(","):
+            for agents in [int(n) for n in args.agents.split(",")]:
+                case = {
+                    "mode": mode,
+                    "env": env,
+                    "agents": agents,
+                    "iterations": args.iterations,
+                    "latency": args.latency,
+                    "latency_jitter": args.latency_jitter,
+                    "max_tool_calls": args.max_tool_calls,
+                    "payload_bytes": args.payload_bytes,
+                    "seed": args.seed,
+                }
+                with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as handle:
+                    case_output = handle.name
+                try:
+                    process = subprocess.run(
+                        [sys.executable, os.path.abspath(__file__), "--case", json.dumps(case), "--case-output", case_output],
+                        cwd=REPO_ROOT,
+                        capture_output=True,
+                        text=True,
+                        timeout=args.timeout,
+                    )
+                    with open(case_output, "r", encoding="utf-8") as f:
+                        content = f.read()
+                    result = json.loads(content) if content else {
+                        "case": case,
+                        "status": "error",
+                        "error": process.stderr[-2000:],
+                    }
+                except subprocess.TimeoutExpired:
+                    result = {"case": case, "status": "timeout", "error": f"exceeded {args.timeout}s"}
+                finally:
+                    os.remove(case_output)
+                results.append(result)
+                print(_format_result(result), flush=True)
+    return {
+        "commit": _git_commit(),
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def _case_key(case: Dict[str, Any]) -> str:
+    return f"{case['env']}/{case['mode']}/{case['agents']}"
+
+
+def _format_result(result: Dict[str, Any]) -> str:
+    key = _case_key(result["case"])
+    if result["status"] != "ok":
+        return f"{key:<24} {result['status']}: {str(result.get('error'))[:200]}"
+    return (
+        f"{key:<24} wall {result['wall_time']:>8.2f}s  cpu {result['cpu_time']:>8.2f}s  "
+        f"llm wait {result['llm_latency']:>8.2f}s  calls {result['llm_calls']:>5}  "
+        f"iterations {len(result['iterations']):>3}  rss {result['peak_rss_mb']} MB  "
+        f"prompt/agent {result['prompt_bytes_per_agent']:>10.0f} B"
+    )
+
+
+def compare(before_path: str, after_path: str, threshold: float) -> bool:
+    """
+    Print the change of each metric between two result files.
+
+    Args:
+        before_path (str): Baseline results.
+        after_path (str): New results.
+        threshold (float): Ratio above which a metric counts as regressed.
+
+    Returns:
+        bool: True if any metric of a case present in both files regressed.
+    """
+    with open(before_path, "r", encoding="utf-8") as f:
+        before = {_case_key(r["case"]): r for r in json.load(f)["results"] if r["status"] == "ok"}
+    with open(after_path, "r", encoding="utf-8") as f:
+        after = {_case_key(r["case"]): r for r in json.load(f)["results"] if r["status"] == "ok"}
+    regressed = False
+    for key in sorted(set(before) & set(after)):
+        changes = []
+        for metric in COMPARED_METRICS:
+            old, new = before[key].get(metric), after[key].get(metric)
+            if not old or new is None:
+                continue
+            ratio = new / old
+            flag = " REGRESSION" if ratio > threshold else ""
+            regressed = regressed or bool(flag)
+            changes.append(f"{metric} {old} -> {new} (x{ratio:.2f}){flag}")
+        print(f"{key:<24} " + "; ".join(changes))
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--envs", default=",".join(ENVS))
+    parser.add_argument("--agents", default="2,10,50,200", help="Comma-separated agent counts")
+    parser.add_argument("--iterations", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.01, help="Seconds per LLM call")
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--max-tool-calls", type=int, default=2)
+    parser.add_argument("--payload-bytes", type=int, default=2000, help="Size of synthetic research results")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=1800, help="Seconds allowed per case")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    parser.add_argument("--threshold", type=float, default=1.2)
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    parser.add_argument("--case-output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        result = run_case(json.loads(args.case))
+        with open(args.case_output, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        return
+    if args.compare:
+        sys.exit(1 if compare(args.compare[0], args.compare[1], args.threshold) else 0)
+    suite = run_suite(args)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(suite, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
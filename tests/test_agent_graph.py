@@ -0,0 +1,76 @@
+import unittest
+
+from marble.agent.base_agent import BaseAgent
+from marble.configs.config import Config
+from marble.environments import BaseEnvironment
+from marble.graph.agent_graph import AgentGraph
+
+
+class TestAgentGraphIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        env = BaseEnvironment(name="test", config={})
+        self.agents = [
+            BaseAgent(config={"agent_id": f"agent{i}", "profile": f"profile {i}"}, env=env)
+            for i in range(1, 5)
+        ]
+        config = Config(
+            {
+                "coordination_mode": "graph",
+                "relationships": [
+                    ["agent1", "agent2", "collaborates_with"],
+                    ["agent3", "agent1", "reports_to"],
+                    ["agent2", "agent4", "collaborates_with"],
+                ],
+            }
+        )
+        self.graph = AgentGraph(self.agents, config)
+
+    def test_neighbors(self) -> None:
+        neighbors = self.graph.get_neighbors("agent1")
+        self.assertEqual(list(neighbors), ["agent2", "agent3"])
+        self.assertEqual(neighbors["agent3"]["role"], "agent3 reports_to agent1")
+        self.assertEqual(neighbors["agent2"]["profile"], "profile 2")
+        self.assertEqual(self.graph.get_neighbors("agent4")["agent2"]["role"], "agent2 collaborates_with agent4")
+        linked = self.graph.get_agent_profiles_linked("agent1")
+        self.assertEqual(list(linked), ["agent2", "agent3"])
+        self.assertEqual(linked["agent3"]["profile"], "profile 3")
+
+    def test_incremental_updates(self) -> None:
+        version = self.graph.version
+        self.graph.update_relationship("agent1", "agent2", "supervises")
+        self.assertGreater(self.graph.version, version)
+        self.assertEqual(self.graph.get_relationship("agent1", "agent2"), "supervises")
+        self.assertEqual(self.graph.get_neighbors("agent2")["agent1"]["role"], "agent1 supervises agent2")
+        self.graph.remove_relationship("agent3", "agent1")
+        self.assertNotIn("agent3", self.graph.get_neighbors("agent1"))
+        self.graph.remove_agent("agent2")
+        self.assertEqual(self.graph.get_neighbors("agent1"), {})
+        self.assertEqual(self.graph.get_neighbors("agent4"), {})
+        self.assertEqual(self.graph.relationships, [])
+        self.assertNotIn("agent2", self.agents[0].relationships)
+        with self.assertRaises(ValueError):
+            self.graph.remove_relationship("agent1", "agent2")
+
+    def test_prompt_scaffolding_cache(self) -> None:
+        agent = self.agents[0]
+        agent.set_agent_graph(self.graph)
+        first = agent._get_prompt_scaffolding()
+        self.assertIs(agent._get_prompt_scaffolding(), first)
+        self.assertEqual(first["tools"][-1]["function"]["name"], "new_communication_session")
+        # Registering an action invalidates the cache
+        agent.env.register_action("noop", lambda: {}, {"type": "function", "function": {"name": "noop"}})
+        second = agent._get_prompt_scaffolding()
+        self.assertIsNot(second, first)
+        self.assertEqual(second["tools"][0]["function"]["name"], "noop")
+        # So does a graph change
+        self.graph.add_relationship("agent1", "agent4", "collaborates_with")
+        third = agent._get_prompt_scaffolding()
+        self.assertIn("agent4", third["available_agents"])
+        self.assertIn(
+            "agent4",
+            third["tools"][-1]["function"]["parameters"]["properties"]["target_agent_id"]["enum"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from typing import Any, Dict
+from unittest import mock
+
+from marble.engine.batch_runner import load_progress, load_tasks, run_batch
+from marble.llms.stub_backend import configure_stub_backend
+
+engine_module = sys.modules["marble.engine.engine"]
+
+
+def _stub_task(task_id: str, output_dir: str, seed: int = 7) -> Dict[str, Any]:
+    return {
+        "task_id": task_id,
+        "coordinate_mode": "graph",
+        "llm": "stub/agent",
+        "llm_cache": {"mode": "off"},
+        "llm_stub": {"seed": seed, "max_tool_calls": 1},
+        "environment": {"type": "Base", "max_iterations": 1},
+        "task": {"content": f"Write {task_id}."},
+        "agents": [{"type": "BaseAgent", "agent_id": "agent1", "profile": "agent1"}],
+        "memory": {"type": "SharedMemory"},
+        "metrics": {"evaluate_llm": "stub/judge", "evaluation_workers": 0},
+        "engine_planner": {"initial_progress": "Start"},
+        "output": {"file_path": os.path.join(output_dir, f"{task_id}.jsonl")},
+    }
+
+
+class TestBatchRunner(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        for i in (2, 1):
+            with open(os.path.join(self.tmp_dir.name, f"task_{i}.yaml"), "w") as f:
+                f.write(f"task:\n  content: task {i}\n")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_load_tasks_from_directory_and_glob(self) -> None:
+        tasks = load_tasks(self.tmp_dir.name)
+        self.assertEqual(
+            [os.path.basename(task["config_path"]) for task in tasks],
+            ["task_1.yaml", "task_2.yaml"],
+        )
+        self.assertEqual(
+            tasks, load_tasks(os.path.join(self.tmp_dir.name, "task_*.yaml"))
+        )
+
+    def test_load_tasks_from_jsonl(self) -> None:
+        path = os.path.join(self.tmp_dir.name, "tasks.jsonl")
+        with open(path, "w") as f:
+            f.write(json.dumps({"config_path": "a.yaml"}) + "\n")
+            f.write(json.dumps({"task_id": "b", "task": {"content": "b"}}) + "\n")
+        tasks = load_tasks(path)
+        self.assertEqual(tasks[0], {"task_id": "a.yaml", "config_path": "a.yaml"})
+        self.assertEqual(tasks[1], {"task_id": "b", "config": {"task": {"content": "b"}}})
+
+    def test_load_progress(self) -> None:
+        path = os.path.join(self.tmp_dir.name, "progress.jsonl")
+        with open(path, "w") as f:
+            f.write(json.dumps({"task_id": "a", "status": "done"}) + "\n")
+            f.write(json.dumps({"task_id": "b", "status": "failed"}) + "\n")
+            f.write('{"task_id": "c", "sta')
+        self.assertEqual(load_progress(path), {"a"})
+
+    def _write_tasks(self, *tasks: Dict[str, Any]) -> str:
+        path = os.path.join(self.tmp_dir.name, "tasks.jsonl")
+        with open(path, "w") as f:
+            f.writelines(json.dumps(task) + "\n" for task in tasks)
+        return path
+
+    def test_thread_tasks_share_process_services(self) -> None:
+        source = self._write_tasks(
+            _stub_task("a", self.tmp_dir.name), _stub_task("b", self.tmp_dir.name)
+        )
+        log_dir = os.path.join(self.tmp_dir.name, "logs")
+        with mock.patch.object(
+            engine_module, "configure_stub_backend", wraps=configure_stub_backend
+        ) as configure:
+            records = run_batch(source, workers=2, log_dir=log_dir)
+        self.assertEqual(sorted(record["status"] for record in records), ["done", "done"])
+        configure.assert_called_once_with(seed=7, max_tool_calls=1)
+
+    def test_thread_tasks_must_agree_on_process_services(self) -> None:
+        source = self._write_tasks(
+            _stub_task("a", self.tmp_dir.name), _stub_task("b", self.tmp_dir.name, seed=8)
+        )
+        log_dir = os.path.join(self.tmp_dir.name, "logs")
+        with self.assertRaisesRegex(ValueError, "llm_stub"):
+            run_batch(source, workers=2, log_dir=log_dir)
+        self.assertEqual(load_progress(os.path.join(log_dir, "progress.jsonl")), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+import os
+import tempfile
+import unittest
+from collections import defaultdict
+from types import SimpleNamespace
+from typing import Any
+from unittest import mock
+
+from marble.configs.config import Config
+from marble.engine import engine as engine_module
+from marble.engine.checkpoint import load_checkpoint, save_checkpoint
+from marble.engine.engine import Engine
+from marble.llms.response_cache import configure_response_cache
+from marble.llms.token_ledger import TokenLedger, TokenUsage
+from marble.memory.base_memory import BaseMemory
+from marble.memory.shared_memory import SharedMemory
+from marble.utils.logger import get_logger
+
+
+def make_engine(checkpoint_path: str, resume: bool) -> Any:
+    engine = Engine.__new__(Engine)
+    engine.logger = get_logger("Engine")
+    engine.coordinate_mode = "graph"
+    engine.current_iteration = 0
+    engine.checkpoint_path = checkpoint_path
+    engine.resume = resume
+    engine.planner = SimpleNamespace(current_progress="", token_usage=0)
+    engine.evaluator = SimpleNamespace(metrics={"planning_score": []})
+    engine.memory = SharedMemory()
+    engine.token_ledger = TokenLedger()
+    agent = SimpleNamespace(
+        agent_id="agent1",
+        memory=BaseMemory(),
+        shared_memory=SharedMemory(),
+        msg_box=defaultdict(lambda: defaultdict(list)),
+        task_history=[],
+        token_usage=0,
+        session_id="",
+    )
+    engine.agents = [agent]
+    return engine
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "run.ckpt")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_save_and_load(self) -> None:
+        self.assertIsNone(load_checkpoint(self.path))
+        save_checkpoint(self.path, {"current_iteration": 3})
+        state = load_checkpoint(self.path)
+        assert state is not None
+        self.assertEqual(state["current_iteration"], 3)
+        self.assertEqual(os.listdir(self.tmp_dir.name), ["run.ckpt"])
+
+    def test_engine_round_trip(self) -> None:
+        engine = make_engine(self.path, resume=False)
+        engine.current_iteration = 2
+        engine.planner.current_progress = "halfway"
+        engine.evaluator.metrics["planning_score"].append(4)
+        agent = engine.agents[0]
+        agent.memory.update("agent1", {"type": "action"})
+        agent.msg_box["session"]["agent2"].append((0, "hello"))
+        agent.token_usage = 42
+        engine.token_ledger.record("gpt-3.5-turbo", TokenUsage(30, 12), {"agent": "agent1"})
+        summary_data = {"iterations": [{"iteration": 2, "summary": "done"}]}
+        engine._save_checkpoint(summary_data, continue_simulation=True, feedback_package=None)
+
+        self.assertIsNone(make_engine(self.path, resume=False)._load_checkpoint())
+        resumed = make_engine(self.path, resume=True)
+        state = resumed._load_checkpoint()
+        assert state is not None
+        self.assertEqual(state["summary_data"], summary_data)
+        self.assertTrue(state["continue_simulation"])
+        self.assertEqual(resumed.current_iteration, 2)
+        self.assertEqual(resumed.planner.current_progress, "halfway")
+        self.assertEqual(resumed.evaluator.metrics["planning_score"], [4])
+        resumed_agent = resumed.agents[0]
+        self.assertEqual(resumed_agent.memory.retrieve_all(), [{"type": "action"}])
+        self.assertEqual(resumed_agent.msg_box["session"]["agent2"], [(0, "hello")])
+        self.assertEqual(resumed_agent.msg_box["other"]["agent3"], [])
+        self.assertEqual(resumed_agent.token_usage, 42)
+        self.assertEqual(resumed.token_ledger.summary(), engine.token_ledger.summary())
+
+        resumed._clear_checkpoint()
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_resumed_run_keeps_recording_tokens(self) -> None:
+        configure_response_cache(mode="off")
+        config = Config(
+            {
+                "coordinate_mode": "graph",
+                "llm": "stub/agent",
+                "llm_stub": {"seed": 5},
+                "environment": {"type": "Base", "max_iterations": 3},
+                "task": {"content": "Write a short report."},
+                "agents": [
+                    {"type": "BaseAgent", "agent_id": agent_id, "profile": agent_id}
+                    for agent_id in ("agent1", "agent2")
+                ],
+                "relationships": [["agent1", "agent2", "collaborates_with"]],
+                "memory": {"type": "SharedMemory"},
+                "metrics": {"evaluate_llm": "stub/judge", "evaluation_workers": 0},
+                "engine_planner": {"initial_progress": "Start"},
+                "output": {
+                    "file_path": os.path.join(self.tmp_dir.name, "out.jsonl"),
+                    "checkpoint_path": self.path,
+                },
+            }
+        )
+        full = Engine(config)
+        full.start()
+        full_summary = full.token_ledger.summary()
+
+        set_token_labels = engine_module.set_token_labels
+
+        def crash_at_second_iteration(**labels: Any) -> None:
+            if labels.get("iteration") == 2:
+                raise KeyboardInterrupt
+            set_token_labels(**labels)
+
+        with mock.patch.object(engine_module, "set_token_labels", crash_at_second_iteration):
+            with self.assertRaises(KeyboardInterrupt):
+                Engine(config).start()
+        resumed = Engine(config, resume=True)
+        resumed.start()
+        summary = resumed.token_ledger.summary()
+        self.assertEqual(set(summary["by_iteration"]), {1, 2, 3})
+        self.assertEqual(
+            summary["total"]["calls"],
+            sum(usage["calls"] for usage in summary["by_component"].values()),
+        )
+        self.assertEqual(summary["total"]["calls"], full_summary["total"]["calls"])
+
+    def test_star_resume_after_last_iteration_evaluates_the_task(self) -> None:
+        configure_response_cache(mode="off")
+        config = Config(
+            {
+                "coordinate_mode": "star",
+                "llm": "stub/agent",
+                "llm_stub": {"seed": 5},
+                "environment": {"type": "Base", "max_iterations": 1},
+                "task": {"content": "Write a short report."},
+                "agents": [{"type": "BaseAgent", "agent_id": "agent1", "profile": "agent1"}],
+                "memory": {"type": "SharedMemory"},
+                "metrics": {"evaluate_llm": "stub/judge", "evaluation_workers": 0},
+                "engine_planner": {"initial_progress": "Start"},
+                "output": {
+                    "file_path": os.path.join(self.tmp_dir.name, "out.jsonl"),
+                    "checkpoint_path": self.path,
+                },
+            }
+        )
+        # Stop right after the checkpoint of the last iteration was written
+        with mock.patch.object(Engine, "_clear_checkpoint"):
+            Engine(config).start()
+        state = load_checkpoint(self.path)
+        assert state is not None
+        last_summary = state["summary_data"]["iterations"][-1]["summary"]
+
+        resumed = Engine(config, resume=True)
+        resumed.environment.name = "Research Environment"
+        with mock.patch.object(resumed.evaluator, "evaluate_task_research") as evaluate:
+            resumed.start()
+        evaluate.assert_called_once_with("Write a short report.", last_summary)
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,21 @@
+import sys
+import time
+import unittest
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from unittest import mock
 
 import pytest
 
 from marble.agent import BaseAgent
-from marble.environments import WebEnvironment
+from marble.configs.config import Config
+from marble.environments import BaseEnvironment, WebEnvironment
+from marble.graph.agent_graph import AgentGraph
+from marble.llms.response_cache import configure_response_cache
+from marble.llms.stub_backend import configure_stub_backend
+
+base_agent_module = sys.modules["marble.agent.base_agent"]
 
 
 @pytest.fixture
@@ -43,3 +55,63 @@ def test_agent_communication() -> None:
         f"{agent2_msg_box}"
         == "{'session': {'Agent 1': [(1, 'Hi, how are you?'), (0, 'Not bad.')]}}"
     )
+
+
+class TestConcurrentSessions(unittest.TestCase):
+    def setUp(self) -> None:
+        configure_response_cache(mode="off")
+        configure_stub_backend(seed=5)
+
+    def test_sessions_with_a_shared_peer_stay_apart(self) -> None:
+        env = BaseEnvironment(name="test", config={})
+        agents = [
+            BaseAgent(config={"agent_id": agent_id, "profile": agent_id}, env=env, model="stub/agent")
+            for agent_id in ("agent1", "agent2", "agent3")
+        ]
+        graph = AgentGraph(
+            agents,
+            Config(
+                {
+                    "coordination_mode": "graph",
+                    "relationships": [
+                        ["agent1", "agent2", "collaborates_with"],
+                        ["agent3", "agent2", "collaborates_with"],
+                    ],
+                }
+            ),
+        )
+        for agent in agents:
+            agent.set_agent_graph(graph)
+        shared = agents[1]
+        real_prompting = base_agent_module.model_prompting
+
+        def slow_prompting(*args: Any, **kwargs: Any) -> Any:
+            # Give the other session a chance to run between turns
+            time.sleep(0.005)
+            return real_prompting(*args, **kwargs)
+
+        def talk(agent: BaseAgent) -> None:
+            agent._handle_new_communication_session(
+                target_agent_id="agent2",
+                message=f"Hello from {agent.agent_id}",
+                session_id=f"session-{agent.agent_id}",
+                task="Share notes.",
+                turns=4,
+            )
+
+        with mock.patch.object(base_agent_module, "model_prompting", slow_prompting):
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                list(pool.map(talk, [agents[0], agents[2]]))
+
+        self.assertEqual(shared.session_id, "")
+        self.assertEqual(set(shared.msg_box), {"session-agent1", "session-agent3"})
+        for initiator in (agents[0], agents[2]):
+            session_id = f"session-{initiator.agent_id}"
+            self.assertEqual(list(shared.msg_box[session_id]), [initiator.agent_id])
+            self.assertEqual(list(initiator.msg_box), [session_id])
+            # Both sides saw the same exchange
+            self.assertEqual(
+                [message for _, message in initiator.msg_box[session_id]["agent2"]],
+                [message for _, message in shared.msg_box[session_id][initiator.agent_id]],
+            )
+            self.assertGreater(len(shared.msg_box[session_id][initiator.agent_id]), 1)
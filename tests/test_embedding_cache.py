@@ -0,0 +1,120 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+from typing import Any, List
+from unittest import mock
+
+from marble.llms import text_embedding as text_embedding_module
+from marble.llms.text_embedding import (
+    EmbeddingBatcher,
+    EmbeddingCache,
+    configure_embedding_cache,
+    get_embedding_cache,
+    text_embeddings,
+)
+
+
+def _fake_embedding(calls: List[List[str]]) -> Any:
+    def embedding(model: str, input: List[str]) -> Any:
+        calls.append(list(input))
+        # Returned out of order on purpose
+        data = [
+            {"index": index, "embedding": [float(len(text)), float(index)]}
+            for index, text in enumerate(input)
+        ]
+        return SimpleNamespace(data=list(reversed(data)))
+
+    return embedding
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def tearDown(self) -> None:
+        configure_embedding_cache(None)
+
+    def test_batch_and_cache(self) -> None:
+        calls: List[List[str]] = []
+        with tempfile.TemporaryDirectory() as cache_dir:
+            configure_embedding_cache(cache_dir)
+            with mock.patch("litellm.embedding", _fake_embedding(calls)):
+                first = text_embeddings("text-embedding-3-small", ["a", "bb", "a"])
+                self.assertEqual(first, [[1.0, 0.0], [2.0, 1.0], [1.0, 0.0]])
+                self.assertEqual(calls, [["a", "bb"]])
+                second = text_embeddings("text-embedding-3-small", ["bb", "ccc"])
+                self.assertEqual(second[0], [2.0, 1.0])
+                self.assertEqual(calls[-1], ["ccc"])
+                # A fresh cache on the same directory reads the persisted entries
+                configure_embedding_cache(cache_dir)
+                third = text_embeddings("text-embedding-3-small", ["a", "bb", "ccc"])
+                self.assertEqual(third, [[1.0, 0.0], [2.0, 1.0], [3.0, 0.0]])
+                self.assertEqual(len(calls), 2)
+
+    def test_memory_tier_is_bounded(self) -> None:
+        cache = EmbeddingCache(max_entries=2)
+        cache.put_many("m", ["a", "b"], [[1.0], [2.0]])
+        self.assertEqual(cache.get_many("m", ["a"]), [[1.0]])
+        cache.put_many("m", ["c"], [[3.0]])
+        # "b" was the least recently used entry
+        self.assertEqual(cache.get_many("m", ["a", "b", "c"]), [[1.0], None, [3.0]])
+        self.assertEqual(len(cache), 2)
+
+    def test_evicted_entries_are_read_from_disk(self) -> None:
+        calls: List[List[str]] = []
+        with tempfile.TemporaryDirectory() as cache_dir:
+            configure_embedding_cache(cache_dir, max_entries=1)
+            path = get_embedding_cache()._path("text-embedding-3-small")
+            with mock.patch("litellm.embedding", _fake_embedding(calls)):
+                text_embeddings("text-embedding-3-small", ["a", "bb"])
+                self.assertEqual(len(get_embedding_cache()), 1)
+                # "a" was evicted from memory but is still on disk
+                self.assertEqual(text_embeddings("text-embedding-3-small", ["a", "bb"]), [[1.0, 0.0], [2.0, 1.0]])
+                self.assertEqual(len(calls), 1)
+            with open(path, "r", encoding="utf-8") as f:
+                self.assertEqual(len(f.readlines()), 2)
+
+    def test_duplicates_and_partial_lines_are_compacted(self) -> None:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = EmbeddingCache(cache_dir)
+            path = cache._path("m")
+            key = EmbeddingCache.make_key("a")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "embedding": [1.0]}) + "\n")
+                f.write(json.dumps({"key": key, "embedding": [2.0]}) + "\n")
+                f.write('{"key": "interrupt')
+            self.assertEqual(cache.get_many("m", ["a"]), [[2.0]])
+            cache.put_many("m", ["b"], [[3.0]])
+            with open(path, "r", encoding="utf-8") as f:
+                records = [json.loads(line) for line in f]
+            self.assertEqual([record["embedding"] for record in records], [[2.0], [3.0]])
+
+    def test_memory_only_by_default(self) -> None:
+        with mock.patch.object(text_embedding_module, "_embedding_cache", None), mock.patch.dict(
+            os.environ, {"MARBLE_EMBEDDING_CACHE_DIR": ""}
+        ):
+            self.assertIsNone(get_embedding_cache().cache_dir)
+
+    def test_micro_batching(self) -> None:
+        calls: List[List[str]] = []
+        configure_embedding_cache(None)
+        batcher = EmbeddingBatcher(max_wait=0.2)
+        results = {}
+
+        def embed(text: str) -> None:
+            results[text] = batcher.embed("text-embedding-3-small", text)
+
+        with mock.patch("litellm.embedding", _fake_embedding(calls)):
+            threads = [threading.Thread(target=embed, args=(str(i) * i,)) for i in range(1, 6)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(results), sorted(str(i) * i for i in range(1, 6)))
+        for text, embedding in results.items():
+            self.assertEqual(embedding[0], float(len(text)))
+
+
+if __name__ == "__main__":
+    unittest.main()
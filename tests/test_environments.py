@@ -0,0 +1,37 @@
+import subprocess
+import sys
+import unittest
+
+from marble.environments import (
+    ENVIRONMENT_TYPES,
+    BaseEnvironment,
+    get_environment_class,
+    is_environment,
+)
+
+
+class TestEnvironmentRegistry(unittest.TestCase):
+    def test_engine_import_skips_unused_environments(self) -> None:
+        code = (
+            "import sys, marble.engine.engine; "
+            "print(sorted(m for m in sys.modules if m.startswith('marble.environments.') "
+            "and m.endswith('_env') or m in ('keybert', 'psycopg2', 'javascript')))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout
+        self.assertEqual(output.strip().splitlines()[-1], "['marble.environments.base_env']")
+
+    def test_environment_types(self) -> None:
+        self.assertIs(get_environment_class("Base"), BaseEnvironment)
+        env = get_environment_class("Web")(name="Web Environment", config={})
+        self.assertTrue(is_environment(env, "WebEnvironment"))
+        self.assertTrue(is_environment(env, "BaseEnvironment"))
+        self.assertFalse(is_environment(env, "MinecraftEnvironment"))
+        self.assertIn("Research", ENVIRONMENT_TYPES)
+        with self.assertRaises(ValueError):
+            get_environment_class("Unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import asyncio
+import sys
+import unittest
+from unittest import mock
+
+import litellm
+
+from marble.llms import amodel_prompting
+from marble.llms.error_handler import api_calling_error_exponential_backoff
+from marble.llms.response_cache import configure_response_cache
+
+model_prompting_module = sys.modules["marble.llms.model_prompting"]
+
+
+def _response(content: str) -> litellm.ModelResponse:
+    return litellm.ModelResponse(choices=[{"message": {"role": "assistant", "content": content}}])
+
+
+class TestExponentialBackoff(unittest.TestCase):
+    def setUp(self) -> None:
+        configure_response_cache(mode="off")
+
+    def test_sync_retries_then_gives_up(self) -> None:
+        calls = []
+
+        @api_calling_error_exponential_backoff(retries=3, base_wait_time=1)
+        def flaky() -> str:
+            calls.append(1)
+            raise RuntimeError("down")
+
+        with mock.patch("marble.llms.error_handler.time.sleep") as sleep:
+            self.assertIsNone(flaky())
+        self.assertEqual(len(calls), 3)
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [1, 2, 4])
+
+    def test_async_completion_retries_after_failure(self) -> None:
+        acompletion = mock.AsyncMock(side_effect=[RuntimeError("rate limited"), _response("pong")])
+        with mock.patch.object(model_prompting_module.litellm, "acompletion", acompletion), mock.patch(
+            "marble.llms.error_handler.asyncio.sleep", new_callable=mock.AsyncMock
+        ) as sleep:
+            messages = asyncio.run(
+                amodel_prompting(llm_model="gpt-3.5-turbo", messages=[{"role": "user", "content": "ping"}])
+            )
+        self.assertEqual(acompletion.await_count, 2)
+        sleep.assert_awaited_once_with(1)
+        self.assertEqual(messages[0].content, "pong")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import threading
+import time
+import unittest
+from typing import List
+
+from marble.evaluator.evaluation_pipeline import EvaluationPipeline
+
+
+class TestEvaluationPipeline(unittest.TestCase):
+    def test_jobs_run_concurrently(self) -> None:
+        pipeline = EvaluationPipeline(num_workers=3)
+        started = time.perf_counter()
+        futures = [pipeline.submit(time.sleep, 0.2) for _ in range(3)]
+        pipeline.join()
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertTrue(all(future.done() for future in futures))
+        pipeline.shutdown()
+
+    def test_join_raises_first_error(self) -> None:
+        pipeline = EvaluationPipeline(num_workers=2)
+        results: List[int] = []
+        lock = threading.Lock()
+
+        def record(value: int) -> None:
+            with lock:
+                results.append(value)
+
+        def fail() -> None:
+            raise ValueError("evaluation failed")
+
+        pipeline.submit(fail)
+        pipeline.submit(record, 1)
+        with self.assertRaises(ValueError):
+            pipeline.join()
+        self.assertEqual(results, [1])
+        # Errors are reported once
+        pipeline.join()
+        pipeline.shutdown()
+
+    def test_inline_mode(self) -> None:
+        pipeline = EvaluationPipeline(num_workers=0)
+        future = pipeline.submit(sum, [1, 2, 3])
+        self.assertEqual(future.result(), 6)
+        pipeline.join()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, List
+
+import requests
+
+from marble.utils.http_client import HttpClient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    requests: List[str] = []
+
+    def do_GET(self) -> None:
+        _Handler.requests.append(self.path)
+        if self.path == "/missing":
+            self.send_error(404)
+            return
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = f"page {self.path}".encode()
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class TestHttpClient(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        _Handler.requests = []
+
+    def test_memory_tier_is_bounded(self) -> None:
+        client = HttpClient(max_entries=2, min_interval=0)
+        self.assertEqual(client.get_text(f"{self.base}/a"), "page /a")
+        client.get_text(f"{self.base}/a")
+        client.get_text(f"{self.base}/b")
+        client.get_text(f"{self.base}/c")
+        client.get_text(f"{self.base}/a")
+        self.assertEqual(_Handler.requests, ["/a", "/b", "/c", "/a"])
+        self.assertEqual(client.stats()["hits"], 1)
+        self.assertEqual(client.stats()["entries"], 2)
+        with self.assertRaises(requests.HTTPError):
+            client.get_text(f"{self.base}/missing")
+
+    def test_concurrent_fetches_share_one_request(self) -> None:
+        client = HttpClient(min_interval=0)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            pages = list(pool.map(client.get_text, [f"{self.base}/shared"] * 8))
+        self.assertEqual(set(pages), {"page /shared"})
+        self.assertEqual(_Handler.requests, ["/shared"])
+
+    def test_disk_tier_revalidates_stale_pages(self) -> None:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            HttpClient(cache_dir=cache_dir, min_interval=0).get_text(f"{self.base}/d")
+            fresh = HttpClient(cache_dir=cache_dir, min_interval=0)
+            self.assertEqual(fresh.get_text(f"{self.base}/d"), "page /d")
+            self.assertEqual(fresh.stats()["disk_hits"], 1)
+            stale = HttpClient(cache_dir=cache_dir, ttl=0, min_interval=0)
+            self.assertEqual(stale.get_text(f"{self.base}/d"), "page /d")
+            self.assertEqual(stale.stats()["revalidations"], 1)
+        self.assertEqual(_Handler.requests, ["/d", "/d"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from marble.llms.concurrency import (
+    async_llm_call_slot,
+    configure_llm_concurrency,
+    get_max_concurrent_llm_calls,
+    llm_call_slot,
+)
+
+
+class TestLLMConcurrency(unittest.TestCase):
+    def tearDown(self) -> None:
+        configure_llm_concurrency(None)
+
+    def test_cap_in_flight_calls(self) -> None:
+        configure_llm_concurrency(2)
+        self.assertEqual(get_max_concurrent_llm_calls(), 2)
+        lock = threading.Lock()
+        in_flight = [0, 0]
+
+        def call() -> None:
+            with llm_call_slot():
+                with lock:
+                    in_flight[0] += 1
+                    in_flight[1] = max(in_flight[1], in_flight[0])
+                time.sleep(0.05)
+                with lock:
+                    in_flight[0] -= 1
+
+        threads = [threading.Thread(target=call) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(in_flight[1], 2)
+
+    def test_async_waiters_share_the_cap(self) -> None:
+        configure_llm_concurrency(1)
+        order = []
+
+        async def call(name: str) -> None:
+            async with async_llm_call_slot():
+                order.append(f"{name} start")
+                await asyncio.sleep(0.02)
+                order.append(f"{name} end")
+
+        async def main() -> None:
+            await asyncio.gather(call("a"), call("b"))
+            # A cancelled waiter must not keep the slot it was waiting for
+            with llm_call_slot():
+                waiter = asyncio.ensure_future(call("c"))
+                await asyncio.sleep(0.02)
+                waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            await asyncio.wait_for(call("d"), timeout=1)
+
+        asyncio.run(main())
+        self.assertEqual(order, ["a start", "a end", "b start", "b end", "d start", "d end"])
+
+    def test_async_waiters_do_not_occupy_executor_threads(self) -> None:
+        configure_llm_concurrency(1)
+        done = []
+
+        async def call(index: int) -> None:
+            async with async_llm_call_slot():
+                done.append(index)
+
+        async def main() -> None:
+            loop = asyncio.get_running_loop()
+            with llm_call_slot():
+                waiters = [asyncio.ensure_future(call(index)) for index in range(100)]
+                await asyncio.sleep(0.02)
+                # More waiters than default executor workers, which stay free
+                self.assertEqual(await asyncio.wait_for(loop.run_in_executor(None, lambda: 1), timeout=1), 1)
+                self.assertEqual(done, [])
+            await asyncio.wait_for(asyncio.gather(*waiters), timeout=1)
+
+        asyncio.run(main())
+        self.assertEqual(done, list(range(100)))
+
+    def test_no_cap(self) -> None:
+        configure_llm_concurrency(None)
+        self.assertIsNone(get_max_concurrent_llm_calls())
+        with llm_call_slot():
+            pass
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import json
+import unittest
+from unittest import mock
+
+from marble.memory.base_memory import BaseMemory
+
+
+class TestMemoryRender(unittest.TestCase):
+    def test_incremental_serialization(self) -> None:
+        memory = BaseMemory()
+        for index in range(3):
+            memory.update("key", {"index": index})
+        self.assertEqual(
+            memory.get_memory_str(), " ".join(json.dumps({"index": i}) for i in range(3))
+        )
+        with mock.patch.object(BaseMemory, "_serialize_entry", wraps=memory._serialize_entry) as serialize:
+            memory.update("key", {"index": 3})
+            memory.get_memory_str()
+            self.assertEqual(serialize.call_count, 1)
+            # Replacing the oldest entries only serializes the replacement
+            memory.storage[:2] = [{"summary": "0-1"}]
+            self.assertEqual(
+                memory.get_memory_str(),
+                '{"summary": "0-1"} {"index": 2} {"index": 3}',
+            )
+            self.assertEqual(serialize.call_count, 2)
+
+    def test_rewrites_in_the_middle_are_seen(self) -> None:
+        memory = BaseMemory()
+        for index in range(3):
+            memory.update("key", {"index": index})
+        memory.get_memory_str()
+        # Same length, same first and last entries
+        memory.storage[1] = {"summary": "1"}
+        memory._mark_changed(rewritten=True)
+        self.assertEqual(memory.get_memory_str(), '{"index": 0} {"summary": "1"} {"index": 2}')
+        # A restored checkpoint assigns a new list
+        memory.storage = [{"index": 0}, {"restored": True}, {"index": 2}]
+        self.assertEqual(memory.get_memory_str(), '{"index": 0} {"restored": true} {"index": 2}')
+        with mock.patch.object(BaseMemory, "_serialize_entry") as serialize:
+            memory.render()
+            serialize.assert_not_called()
+
+    def test_render_budget(self) -> None:
+        memory = BaseMemory()
+        for index in range(100):
+            memory.update("key", {"index": index})
+        self.assertEqual(memory.render(), memory.get_memory_str())
+        rendered = memory.render(token_budget=10)
+        # 40 characters hold the last two 15-character entries
+        self.assertEqual(
+            rendered, '[98 older memory entries omitted] {"index": 98} {"index": 99}'
+        )
+        self.assertEqual(memory.render(token_budget=10_000), memory.get_memory_str())
+
+    def test_render_keeps_an_oversized_newest_entry(self) -> None:
+        memory = BaseMemory()
+        memory.update("key", {"index": 0})
+        memory.update("key", {"text": "x" * 1000})
+        rendered = memory.render(token_budget=10)
+        self.assertEqual(rendered, '[1 older memory entries omitted] {"text": "' + "x" * 30)
+        memory.storage = [{"text": "x" * 1000}]
+        self.assertEqual(memory.render(token_budget=10), '{"text": "' + "x" * 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import threading
+import unittest
+from typing import Any, Dict, List
+from unittest import mock
+
+from marble.memory.short_term_memory import ShortTermMemory
+
+
+class TestBackgroundSummarization(unittest.TestCase):
+    def test_update_does_not_block(self) -> None:
+        release = threading.Event()
+        calls: List[List[Dict[str, Any]]] = []
+
+        def summarize(memory: ShortTermMemory, batch: List[Dict[str, Any]]) -> str:
+            calls.append(batch)
+            release.wait(5)
+            return "summary"
+
+        memory = ShortTermMemory(memory_limit=2, summarizer_model="stub")
+        with mock.patch.object(ShortTermMemory, "summarize", summarize):
+            for index in range(3):
+                memory.update("key", {"index": index})
+            # update returned while the summary is still being computed
+            self.assertEqual([entry["index"] for entry in memory.retrieve_all()], [0, 1, 2])
+            release.set()
+            memory.flush()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(
+            memory.retrieve_all(),
+            [{"type": "old_memory_summary", "result": "summary"}, {"index": 2}],
+        )
+
+    def test_catches_up_with_batch_size(self) -> None:
+        memory = ShortTermMemory(memory_limit=3, summarize_batch_size=3)
+        with mock.patch.object(ShortTermMemory, "summarize", return_value="summary"):
+            for index in range(10):
+                memory.update("key", {"index": index})
+            memory.flush()
+        self.assertLessEqual(len(memory.storage), 3)
+        self.assertEqual(memory.retrieve_latest(), {"index": 9})
+
+    def test_synchronous_mode(self) -> None:
+        memory = ShortTermMemory(memory_limit=2, background=False)
+        with mock.patch.object(ShortTermMemory, "summarize", return_value="summary"):
+            for index in range(3):
+                memory.update("key", {"index": index})
+        self.assertEqual(len(memory.storage), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
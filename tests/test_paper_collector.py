@@ -0,0 +1,226 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List
+from unittest import mock
+
+import requests
+
+from marble.environments.research_utils import paper_collector
+
+
+def _extract_keywords(docs: Any, **kwargs: Any) -> List[Any]:
+    if isinstance(docs, str):
+        docs = [docs]
+    keywords = [[(doc.split()[0], 0.9), (doc.split()[-1], 0.5)] for doc in docs]
+    # Like KeyBERT, a single document gets a flat list
+    return keywords[0] if len(keywords) == 1 else keywords
+
+
+class TestKeywordExtraction(unittest.TestCase):
+    def setUp(self) -> None:
+        paper_collector._keyword_model = None
+        paper_collector._keyword_cache.clear()
+        patcher = mock.patch("keybert.KeyBERT")
+        self.keybert = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.model = self.keybert.return_value
+        self.model.extract_keywords.side_effect = _extract_keywords
+
+    def tearDown(self) -> None:
+        paper_collector._keyword_model = None
+        paper_collector._keyword_cache.clear()
+
+    def test_model_is_loaded_once(self) -> None:
+        paper_collector.warm_keyword_model().join()
+        self.assertEqual(paper_collector.extract_keywords("graph neural networks"), "graph networks")
+        self.assertEqual(paper_collector.extract_keywords("protein folding"), "protein folding")
+        self.keybert.assert_called_once()
+
+    def test_batch_extracts_uncached_queries_in_one_pass(self) -> None:
+        paper_collector.extract_keywords("protein folding")
+        keywords = paper_collector.extract_keywords_batch(
+            ["graph neural networks", "protein folding", "large language models", "graph neural networks"]
+        )
+        self.assertEqual(
+            keywords, ["graph networks", "protein folding", "large models", "graph networks"]
+        )
+        self.assertEqual(self.model.extract_keywords.call_count, 2)
+        self.assertEqual(
+            self.model.extract_keywords.call_args.args[0],
+            ["graph neural networks", "large language models"],
+        )
+        paper_collector.extract_keywords_batch(["large language models"])
+        self.assertEqual(self.model.extract_keywords.call_count, 2)
+
+
+PAPER_HTML = """
+<html><body><article class="ltx_document">
+<section class="ltx_section"><h2 class="ltx_title ltx_title_section">1 Introduction</h2>
+<p>Agents collaborate.</p>
+<figure class="ltx_figure"><figcaption class="ltx_caption"><span class="ltx_tag">Figure 1</span>
+Overview.</figcaption></figure>
+<figure class="ltx_table"><figcaption class="ltx_caption">Results.</figcaption></figure>
+</section>
+<section class="ltx_appendix"><h2 class="ltx_title ltx_title_appendix">A Proofs</h2></section>
+<section class="ltx_bibliography"><ul><li class="ltx_bibitem"><span class="ltx_tag">[1]</span>
+A reference.</li></ul></section>
+</article></body></html>
+"""
+
+
+class _Client:
+    def __init__(self) -> None:
+        self.urls: List[str] = []
+
+    def get_text(self, url: str, **kwargs: Any) -> str:
+        self.urls.append(url)
+        time.sleep(0.05)
+        return PAPER_HTML
+
+
+class TestPaperContent(unittest.TestCase):
+    def setUp(self) -> None:
+        paper_collector._paper_contents.clear()
+        self.client = _Client()
+        patcher = mock.patch.object(paper_collector, "get_http_client", return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        paper_collector._paper_contents.clear()
+
+    def test_page_is_fetched_and_parsed_once(self) -> None:
+        url = "http://arxiv.org/abs/2401.00001v1"
+        content = paper_collector.get_paper_html_content(url)
+        self.assertEqual(list(content["sections"]), ["1 Introduction", "A Proofs"])
+        self.assertEqual(content["tables"], {"1": "Results."})
+        self.assertEqual(list(content["figures"]), ["Figure 1"])
+        self.assertEqual(list(content["bibliography"]), ["[1]"])
+        self.assertEqual(
+            paper_collector.get_paper_figure_captions_from_html("https://arxiv.org/pdf/2401.00001v1"),
+            content["figures"],
+        )
+        self.assertEqual(paper_collector.get_paper_table_captions_from_html(url), content["tables"])
+        self.assertIn("Agents collaborate.", paper_collector.get_paper_introduction(url))
+        self.assertEqual(self.client.urls, ["https://arxiv.org/html/2401.00001v1"])
+
+    def test_concurrent_fetches_are_bounded_and_shared(self) -> None:
+        urls = [f"https://arxiv.org/abs/2401.0000{i}" for i in range(6)]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(paper_collector.get_paper_html_content, [urls[0]] * 4))
+        self.assertEqual(len(self.client.urls), 1)
+        active = []
+        lock = threading.Lock()
+        get_text = self.client.get_text
+        peak = [0]
+
+        def fetch(url: str, **kwargs: Any) -> str:
+            with lock:
+                active.append(url)
+                peak[0] = max(peak[0], len(active))
+            get_text(url)
+            with lock:
+                active.remove(url)
+            return PAPER_HTML
+
+        self.client.get_text = fetch  # type: ignore[method-assign]
+        contents = paper_collector.fetch_paper_contents(urls)
+        self.assertEqual(len(contents), 6)
+        self.assertTrue(all(c["sections"] for c in contents))
+        self.assertLessEqual(peak[0], paper_collector.PAPER_FETCH_WORKERS)
+        self.assertEqual(len(self.client.urls), 6)
+
+    def test_only_definitive_misses_are_cached(self) -> None:
+        url = "https://arxiv.org/abs/2401.00009"
+        get_text = self.client.get_text
+        failures: List[Exception] = [requests.ConnectionError("reset")]
+
+        def fetch(page_url: str, **kwargs: Any) -> str:
+            if failures:
+                raise failures.pop()
+            return get_text(page_url)
+
+        self.client.get_text = fetch  # type: ignore[method-assign]
+        self.assertIsNone(paper_collector.get_paper_html_content(url))
+        # The transient failure was not remembered
+        self.assertEqual(list(paper_collector.get_paper_html_content(url)["sections"])[0], "1 Introduction")
+
+        missing = "https://arxiv.org/abs/2401.00010"
+        response = requests.Response()
+        response.status_code = 404
+        failures.append(requests.HTTPError("not found", response=response))
+        self.assertIsNone(paper_collector.get_paper_html_content(missing))
+        self.assertIsNone(paper_collector.get_paper_html_content(missing))
+        self.assertEqual(self.client.urls, ["https://arxiv.org/html/2401.00009"])
+
+
+class _Page:
+    extracted: List[str] = []
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    def extract_text(self) -> str:
+        _Page.extracted.append(self.text)
+        return self.text
+
+
+class TestPdfContent(unittest.TestCase):
+    PAGES = [
+        "Abstract We study agents. ",
+        "Introduction Agents plan together. ",
+        "Related Work Prior systems. ",
+    ] + [f"Appendix page {i}. " for i in range(57)]
+
+    def setUp(self) -> None:
+        paper_collector._pdf_pages.clear()
+        _Page.extracted = []
+        response = mock.MagicMock()
+        response.iter_content.return_value = [b"%PDF-"]
+        response.__enter__.return_value = response
+        reader = self.reader = mock.MagicMock()
+        reader.pages = [_Page(text) for text in self.PAGES]
+        get = mock.patch.object(paper_collector.requests, "get", return_value=response)
+        self.get = get.start()
+        self.addCleanup(get.stop)
+        pdf_reader = mock.patch.object(paper_collector, "PdfReader", return_value=reader)
+        pdf_reader.start()
+        self.addCleanup(pdf_reader.stop)
+
+    def tearDown(self) -> None:
+        paper_collector._pdf_pages.clear()
+
+    def test_extraction_stops_after_requested_sections(self) -> None:
+        url = "https://arxiv.org/abs/2401.00001"
+        sections = paper_collector.get_paper_content_from_pdf(url, sections=["Introduction"])
+        self.assertEqual(sections["Introduction"], "Introduction Agents plan together.")
+        self.assertEqual(len(_Page.extracted), 3)
+        self.assertEqual(self.get.call_args.args[0], "https://arxiv.org/pdf/2401.00001")
+
+        everything = paper_collector.get_paper_content_from_pdf(url)
+        self.assertIn("Appendix", everything)
+        self.assertEqual(len(_Page.extracted), len(self.PAGES))
+        self.assertEqual(self.get.call_count, 1)
+
+    def test_section_words_in_running_text_are_not_headings(self) -> None:
+        body = " ".join(["Our results and methods need background and discussion."] * 40)
+        pages = (
+            ["Abstract\nWe study agents.", f"1 Introduction\n{body}", body, body]
+            + ["2 Related Work\nPrior systems.", "3 Methods\nWe plan."]
+            + [f"Appendix page {i}." for i in range(20)]
+        )
+        self.reader.pages = [_Page(text) for text in pages]
+        with mock.patch.object(paper_collector, "get_paper_html_content", return_value=None):
+            introduction = paper_collector.get_paper_introduction("https://arxiv.org/abs/2401.00002")
+        assert introduction is not None
+        self.assertEqual(len(introduction.split(" ")), 512)
+        self.assertTrue(introduction.lstrip().startswith("Introduction\nOur results and methods"))
+        self.assertNotIn("Related", introduction)
+        # Read up to the heading after the introduction's first 512 words, no further
+        self.assertEqual(len(_Page.extracted), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, List
+from unittest import mock
+
+from marble.environments.research_env import ResearchEnvironment
+from marble.environments.research_utils import paper_collector
+from marble.environments.research_utils.paper_store import PaperStore, configure_paper_store
+
+DUMP = [
+    {
+        "id": "2101.00001",
+        "title": "Graph Neural Networks\n  for Molecules",
+        "abstract": "We apply graph neural networks to molecular property prediction.",
+        "authors_parsed": [["Smith", "Jane", ""], ["Doe", "John", ""]],
+        "categories": "cs.LG q-bio.BM",
+        "versions": [{"version": "v1", "created": "Fri, 1 Jan 2021 10:00:00 GMT"}],
+    },
+    {
+        "id": "2203.00002",
+        "title": "Large Language Models as Planners",
+        "abstract": "Language models plan multi-agent tasks.",
+        "authors_parsed": [["Lee", "Ann", ""]],
+        "categories": "cs.AI",
+        "versions": [{"version": "v1", "created": "Tue, 1 Mar 2022 10:00:00 GMT"}],
+    },
+]
+
+
+def _result(arxiv_id: str, title: str) -> Any:
+    return SimpleNamespace(
+        get_short_id=lambda: f"{arxiv_id}v2",
+        title=title,
+        summary="An abstract\nover two lines.",
+        authors=[SimpleNamespace(name="Ann Lee")],
+        primary_category="cs.AI",
+        categories=["cs.AI"],
+        entry_id=f"http://arxiv.org/abs/{arxiv_id}v2",
+        published=datetime(2024, 5, 1, tzinfo=timezone.utc),
+    )
+
+
+class TestPaperStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "papers.sqlite3")
+        dump_path = os.path.join(self.tmp.name, "dump.jsonl")
+        with open(dump_path, "w") as f:
+            f.writelines(json.dumps(entry) + "\n" for entry in DUMP)
+        self.assertEqual(PaperStore(self.db_path).ingest(dump_path), 2)
+
+    def tearDown(self) -> None:
+        configure_paper_store(db_path=None)
+        self.tmp.cleanup()
+
+    def test_lookups(self) -> None:
+        store = PaperStore(self.db_path)
+        paper = store.get("2101.00001v3")
+        self.assertEqual(paper["authors"], ["Jane Smith", "John Doe"])
+        self.assertEqual(paper["domain"], "cs.LG")
+        self.assertEqual(store.get_by_title("graph neural networks for  MOLECULES")["arxiv_id"], "2101.00001")
+        self.assertEqual(
+            [p["arxiv_id"] for p in store.search('"language" OR "molecular"', 5)],
+            ["2203.00002", "2101.00001"],
+        )
+        self.assertEqual(store.search('authors : ("smith")', 5)[0]["arxiv_id"], "2101.00001")
+
+    def test_helpers_answer_offline(self) -> None:
+        configure_paper_store(db_path=self.db_path, offline=True)
+        with mock.patch.object(paper_collector, "perform_arxiv_search") as live, mock.patch.object(
+            paper_collector, "extract_keywords", return_value="graph networks"
+        ):
+            related = paper_collector.get_related_papers(5, query="GNNs for chemistry")
+            recent = paper_collector.get_recent_papers(domain="cs", max_results=5)
+            by_keyword = paper_collector.get_paper_by_keyword("language models", set(), 5)
+            by_id = paper_collector.get_paper_by_arxiv_id("2203.00002")
+            by_title = paper_collector.get_paper_by_title("Large language models as planners")
+            missing = paper_collector.get_paper_by_arxiv_id("1999.99999")
+        live.assert_not_called()
+        self.assertEqual([p.arxiv_id for p in related], ["2101.00001"])
+        self.assertEqual([p.arxiv_id for p in recent], ["2203.00002", "2101.00001"])
+        self.assertEqual([p.arxiv_id for p in by_keyword], ["2203.00002"])
+        self.assertEqual(by_id.title, "Large Language Models as Planners")
+        self.assertEqual(by_title.arxiv_id, "2203.00002")
+        self.assertIsNone(missing)
+
+        env = ResearchEnvironment(config={})
+        result = env._get_paper_by_arxiv_id_handler("2101.00001")
+        self.assertTrue(result["success"])
+        self.assertEqual(result["paper"]["timestamp"], 1609495200)
+
+    def test_live_searches_write_through(self) -> None:
+        configure_paper_store(db_path=self.db_path)
+        results: List[Any] = [_result("2405.00003", "Agents"), _result("2405.00004", "More Agents")]
+        with mock.patch.object(
+            paper_collector, "perform_arxiv_search", return_value=results
+        ) as live, mock.patch.object(
+            paper_collector, "get_paper_content_from_html", return_value={"1": "Intro"}
+        ) as content, mock.patch.object(
+            paper_collector, "get_paper_bibliography_from_html", return_value=None
+        ):
+            first = paper_collector.get_recent_papers(domain="multi agent", max_results=2)
+            second = paper_collector.get_recent_papers(domain="multi agent", max_results=2)
+            by_id = paper_collector.get_paper_by_arxiv_id("2405.00004")
+        self.assertEqual(live.call_count, 1)
+        self.assertEqual(content.call_count, 2)
+        self.assertEqual([p.model_dump(exclude={"pk"}) for p in first], [p.model_dump(exclude={"pk"}) for p in second])
+        self.assertEqual(second[0].sections, {"1": "Intro"})
+        self.assertEqual(by_id.title, "More Agents")
+
+    def test_newest_first_searches_stay_fresh(self) -> None:
+        configure_paper_store(db_path=self.db_path, recent_search_ttl=0)
+        with mock.patch.object(
+            paper_collector, "perform_arxiv_search", return_value=[_result("2405.00005", "Language Agents")]
+        ) as live, mock.patch.object(
+            paper_collector, "get_paper_content_from_html", return_value=None
+        ), mock.patch.object(
+            paper_collector, "get_paper_bibliography_from_html", return_value=None
+        ), mock.patch.object(
+            paper_collector, "extract_keywords", return_value="graph networks"
+        ):
+            # The stored papers match, but only arXiv knows the newest submissions
+            recent = paper_collector.get_recent_papers(domain="language", max_results=1)
+            self.assertEqual([p.arxiv_id for p in recent], ["2405.00005"])
+            # The recording expired at once
+            paper_collector.get_recent_papers(domain="language", max_results=1)
+            self.assertEqual(live.call_count, 2)
+            # Relevance searches are still answered locally
+            related = paper_collector.get_related_papers(1, query="GNNs for chemistry")
+            self.assertEqual([p.arxiv_id for p in related], ["2101.00001"])
+            self.assertEqual(live.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import asyncio
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from marble.llms.rate_limiter import (
+    RateLimiter,
+    TokenBucket,
+    configure_rate_limits,
+    get_rate_limiter,
+    rate_limiter_stats,
+)
+
+
+class TestRateLimiter(unittest.TestCase):
+    def tearDown(self) -> None:
+        configure_rate_limits(None)
+
+    def test_token_bucket(self) -> None:
+        bucket = TokenBucket(per_minute=60)
+        # The full burst capacity is available immediately
+        self.assertEqual(bucket.reserve(60, now=bucket.updated_at), 0.0)
+        # The next unit refills at one per second
+        self.assertAlmostEqual(bucket.reserve(1, now=bucket.updated_at), 1.0)
+        # Time passing pays the debt back
+        self.assertAlmostEqual(bucket.reserve(1, now=bucket.updated_at + 1.0), 1.0)
+
+    def test_rpm_and_tpm(self) -> None:
+        limiter = RateLimiter("gpt-3.5-turbo", rpm=600, tpm=600)
+        self.assertEqual(limiter.reserve(300), 0.0)
+        wait = limiter.reserve(600)
+        # 300 tokens of debt at 10 tokens per second
+        self.assertAlmostEqual(wait, 30.0, delta=0.1)
+        limiter.record_usage(600, 100)
+        self.assertEqual(limiter.reserve(100), 0.0)
+        stats = limiter.stats()
+        self.assertEqual(stats["requests"], 3)
+        self.assertEqual(stats["waits"], 1)
+        self.assertEqual(stats["tokens"], 500)
+
+    def test_shared_state(self) -> None:
+        with tempfile.TemporaryDirectory() as state_dir:
+            first = RateLimiter("default", rpm=60, state_dir=state_dir)
+            second = RateLimiter("default", rpm=60, state_dir=state_dir)
+            self.assertEqual(first.reserve(1), 0.0)
+            for _ in range(59):
+                second.reserve(1)
+            self.assertGreater(first.reserve(1), 0.0)
+
+    def test_async_acquire_with_shared_state_runs_off_the_loop(self) -> None:
+        with tempfile.TemporaryDirectory() as state_dir:
+            limiter = RateLimiter("default", rpm=60, state_dir=state_dir)
+            with mock.patch("asyncio.to_thread", wraps=asyncio.to_thread) as to_thread:
+                self.assertEqual(asyncio.run(limiter.aacquire(1)), 0.0)
+            to_thread.assert_called_once_with(limiter.reserve, 1)
+        self.assertEqual(limiter.stats()["requests"], 1)
+
+    def test_max_concurrent(self) -> None:
+        configure_rate_limits({"gpt-4o": {"max_concurrent": 2}})
+        limiter = get_rate_limiter("gpt-4o")
+        assert limiter is not None
+        lock = threading.Lock()
+        in_flight = [0, 0]
+
+        def call() -> None:
+            with limiter.concurrency_slot():
+                with lock:
+                    in_flight[0] += 1
+                    in_flight[1] = max(in_flight[1], in_flight[0])
+                time.sleep(0.05)
+                with lock:
+                    in_flight[0] -= 1
+
+        threads = [threading.Thread(target=call) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(in_flight[1], 2)
+        self.assertEqual(limiter.stats()["max_concurrent"], 2)
+
+        async def acall() -> None:
+            async with limiter.async_concurrency_slot():
+                with lock:
+                    in_flight[0] += 1
+                    in_flight[1] = max(in_flight[1], in_flight[0])
+                await asyncio.sleep(0.02)
+                with lock:
+                    in_flight[0] -= 1
+
+        async def main() -> None:
+            await asyncio.gather(*(acall() for _ in range(5)))
+
+        in_flight[1] = 0
+        asyncio.run(main())
+        self.assertEqual(in_flight[1], 2)
+
+    def test_lookup(self) -> None:
+        configure_rate_limits(
+            {"gpt-4o": {"rpm": 10}, "https://api.deepseek.com/v1": {"tpm": 1000}}
+        )
+        self.assertIsNone(get_rate_limiter("gpt-3.5-turbo"))
+        model_limiter = get_rate_limiter("gpt-4o", "https://api.deerapi.com/v1")
+        assert model_limiter is not None
+        self.assertEqual(model_limiter.rpm, 10)
+        self.assertIs(get_rate_limiter("gpt-4o"), model_limiter)
+        endpoint_limiter = get_rate_limiter("deepseek-chat", "https://api.deepseek.com/v1")
+        assert endpoint_limiter is not None
+        self.assertEqual(endpoint_limiter.tpm, 1000)
+        self.assertEqual(set(rate_limiter_stats()), {"gpt-4o", "https://api.deepseek.com/v1"})
+        # Unchanged limits keep their limiter and its state
+        configure_rate_limits({"gpt-4o": {"rpm": 10}})
+        self.assertIs(get_rate_limiter("gpt-4o"), model_limiter)
+
+
+if __name__ == "__main__":
+    unittest.main()
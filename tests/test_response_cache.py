@@ -0,0 +1,64 @@
+import tempfile
+import unittest
+
+from marble.llms.response_cache import CacheMissError, ResponseCache
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.messages = [{"role": "user", "content": "This is a test sentence."}]
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_make_key(self) -> None:
+        key_1 = ResponseCache.make_key("gpt-3.5-turbo", self.messages, temperature=0.0)
+        key_2 = ResponseCache.make_key("gpt-3.5-turbo", self.messages, temperature=0.0)
+        key_3 = ResponseCache.make_key("gpt-3.5-turbo", self.messages, temperature=0.7)
+        self.assertEqual(key_1, key_2)
+        self.assertNotEqual(key_1, key_3)
+
+    def test_read_through(self) -> None:
+        cache = ResponseCache(cache_dir=self.tmp_dir.name, mode="read_through")
+        key = cache.make_key("gpt-3.5-turbo", self.messages)
+        self.assertIsNone(cache.lookup(key))
+        cache.put(key, {"message": {"role": "assistant", "content": "hi"}})
+        entry = cache.lookup(key)
+        assert entry is not None
+        self.assertEqual(entry["message"]["content"], "hi")
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["entries"], 1)
+
+    def test_replay_miss(self) -> None:
+        cache = ResponseCache(cache_dir=self.tmp_dir.name, mode="replay")
+        with self.assertRaises(CacheMissError):
+            cache.lookup(cache.make_key("gpt-3.5-turbo", self.messages))
+
+    def test_record_does_not_read(self) -> None:
+        cache = ResponseCache(cache_dir=self.tmp_dir.name, mode="record")
+        key = cache.make_key("gpt-3.5-turbo", self.messages)
+        cache.put(key, {"message": {"role": "assistant", "content": "hi"}})
+        self.assertIsNone(cache.lookup(key))
+        self.assertEqual(cache.stats()["writes"], 1)
+
+    def test_eviction(self) -> None:
+        cache = ResponseCache(
+            cache_dir=self.tmp_dir.name, mode="read_through", max_entries=2
+        )
+        keys = [
+            cache.make_key("gpt-3.5-turbo", [{"role": "user", "content": str(i)}])
+            for i in range(3)
+        ]
+        for key in keys:
+            cache.put(key, {"message": {"role": "assistant", "content": key}})
+        stats = cache.stats()
+        self.assertEqual(stats["entries"], 2)
+        self.assertEqual(stats["evictions"], 1)
+        self.assertIsNotNone(cache.get(keys[-1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
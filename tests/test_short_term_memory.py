@@ -27,6 +27,7 @@ class TestLongTermMemory(unittest.TestCase):
         self.memory.update(
             key="key", information={"type": "action_response", "result": result_3}
         )
+        self.memory.flush()
         self.assertIsInstance(self.memory.storage, deque)
         self.assertIsInstance(self.memory.storage[0], dict)
         self.assertEqual(len(self.memory.storage), 2)
@@ -64,6 +65,7 @@ class TestLongTermMemory(unittest.TestCase):
         result_3 = Message(content="I am so hungry.", role="assistant")
         information_3 = {"type": "action_response", "result": result_3}
         self.memory.update(key="key", information=information_3)
+        self.memory.flush()
         all_information = self.memory.retrieve_all()
         self.assertNotIn(information_1, all_information)
         self.assertNotIn(information_2, all_information)
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from marble.configs.config import Config
+from marble.engine.engine import Engine
+from marble.engine.engine_planner import json_parse
+from marble.evaluator.evaluator import Evaluator
+from marble.llms import amodel_prompting, model_prompting
+from marble.llms.response_cache import configure_response_cache
+from marble.llms.stub_backend import StubBackend, configure_stub_backend
+
+SEARCH_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "search",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string"},
+                "limit": {"type": "integer"},
+                "target": {"type": "string", "enum": ["agent2", "agent3"]},
+            },
+        },
+    },
+}
+NO_TARGET_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "talk",
+        "parameters": {
+            "type": "object",
+            "properties": {"target": {"type": "string", "enum": []}},
+        },
+    },
+}
+
+
+class TestStubBackend(unittest.TestCase):
+    def setUp(self) -> None:
+        configure_response_cache(mode="off")
+        configure_stub_backend(seed=3)
+
+    def test_tool_calls_follow_schemas(self) -> None:
+        backend = StubBackend(seed=1, max_tool_calls=3)
+        messages = [{"role": "user", "content": "Find papers."}]
+        response, _ = backend.respond(
+            "stub/a", messages, tools=[SEARCH_TOOL, NO_TARGET_TOOL], tool_choice="auto"
+        )
+        tool_calls = response.choices[0].message.tool_calls
+        self.assertTrue(1 <= len(tool_calls) <= 3)
+        for call in tool_calls:
+            self.assertEqual(call.function.name, "search")
+            arguments = json.loads(call.function.arguments)
+            self.assertIsInstance(arguments["query"], str)
+            self.assertIsInstance(arguments["limit"], int)
+            self.assertIn(arguments["target"], ["agent2", "agent3"])
+        again, _ = backend.respond(
+            "stub/a", messages, tools=[SEARCH_TOOL, NO_TARGET_TOOL], tool_choice="auto"
+        )
+        self.assertEqual(
+            again.choices[0].message.model_dump(), response.choices[0].message.model_dump()
+        )
+
+    def test_structured_responses_parse(self) -> None:
+        backend = StubBackend(seed=2, continue_probability=0.0)
+        plan, _ = backend.respond(
+            "stub/a",
+            [{"role": "user", "content": '- Agent ID: agent1\n- Agent ID: agent2\n{"tasks": {}}'}],
+        )
+        self.assertEqual(
+            set(json_parse(plan.choices[0].message.content)["tasks"]), {"agent1", "agent2"}
+        )
+        decision, _ = backend.respond(
+            "stub/a", [{"role": "system", "content": "a single key 'continue'"}]
+        )
+        self.assertEqual(json.loads(decision.choices[0].message.content), {"continue": False})
+
+        hand_off, _ = backend.respond(
+            "stub/a",
+            [{"role": "system", "content": '- Agent ID: agent2\n{"agent_id": "<next_agent_id>"}'}],
+        )
+        self.assertEqual(json.loads(hand_off.choices[0].message.content)["agent_id"], "agent2")
+
+        evaluator = Evaluator(metrics_config={})
+        prompt = evaluator.evaluation_prompts["research"]["task_evaluation"]["prompt"]
+        ratings, _ = backend.respond(
+            "stub/a", [{"role": "user", "content": prompt.format(task="t", result="r")}]
+        )
+        parsed = evaluator.parse_research_ratings(ratings.choices[0].message.content)
+        self.assertEqual(set(parsed), {"innovation", "safety", "feasibility"})
+        prompt = evaluator.evaluation_prompts["world"]["task_evaluation"]["buyer_prompt"]
+        ratings, _ = backend.respond(
+            "stub/a", [{"role": "user", "content": prompt.format(task="t", result="r")}]
+        )
+        self.assertIn("buyer", json.loads(ratings.choices[0].message.content))
+
+    def test_model_prompting_routes_stub_models(self) -> None:
+        configure_stub_backend(seed=3, responses=[(r"\bping\b", "pong")])
+        messages = [{"role": "user", "content": "ping"}]
+        with mock.patch("litellm.completion") as completion:
+            self.assertEqual(model_prompting("stub/a", messages)[0].content, "pong")
+        completion.assert_not_called()
+        result = asyncio.run(amodel_prompting("stub/a", [{"role": "user", "content": "hi"}]))
+        self.assertTrue(result[0].content)
+
+    def test_engine_runs_offline(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            config = Config(
+                {
+                    "coordinate_mode": "graph",
+                    "llm": "stub/agent",
+                    "llm_stub": {"seed": 7, "max_tool_calls": 2},
+                    "environment": {"type": "Base", "max_iterations": 2},
+                    "task": {"content": "Write a short report."},
+                    "agents": [
+                        {"type": "BaseAgent", "agent_id": agent_id, "profile": agent_id}
+                        for agent_id in ("agent1", "agent2")
+                    ],
+                    "relationships": [["agent1", "agent2", "collaborates_with"]],
+                    "memory": {"type": "SharedMemory"},
+                    "metrics": {"evaluate_llm": "stub/judge", "evaluation_workers": 0},
+                    "engine_planner": {"initial_progress": "Start"},
+                    "output": {"file_path": os.path.join(tmp, "out.jsonl")},
+                }
+            )
+            totals = []
+            for _ in range(2):
+                engine = Engine(config)
+                engine.start()
+                totals.append(engine.token_ledger.summary()["total"])
+            self.assertGreater(totals[0]["calls"], 0)
+            self.assertEqual(totals[0], totals[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import contextvars
+import sys
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Any
+from unittest import mock
+
+import marble.llms.model_prompting  # noqa: F401
+from marble.llms.response_cache import configure_response_cache
+from marble.llms.token_ledger import (
+    TokenLedger,
+    record_usage,
+    set_token_labels,
+    token_scope,
+)
+
+
+def _completion(**kwargs: Any) -> Any:
+    from litellm.types.utils import Message
+
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=Message(content="ok", role="assistant"))],
+        usage=SimpleNamespace(prompt_tokens=100, completion_tokens=7, total_tokens=107),
+    )
+
+
+class TestTokenLedger(unittest.TestCase):
+    def test_scopes_and_labels(self) -> None:
+        ledger = TokenLedger()
+        with token_scope(ledger=ledger, component="engine") as run_usage:
+            set_token_labels(iteration=1)
+            with token_scope(agent="agent1", component="agent") as agent_usage:
+                record_usage("gpt-4o", 10, 5)
+            pool = ThreadPoolExecutor(max_workers=1)
+            with token_scope(component="evaluator"):
+                context = contextvars.copy_context()
+            pool.submit(context.run, record_usage, "gpt-4o", 3, 1).result()
+            pool.shutdown()
+            set_token_labels(iteration=2)
+            record_usage("gpt-4o-mini", 1, 1, cached=True)
+        self.assertEqual(agent_usage.total_tokens, 15)
+        self.assertEqual(run_usage.total_tokens, 21)
+        summary = ledger.summary()
+        self.assertEqual(summary["total"]["total_tokens"], 21)
+        self.assertEqual(summary["total"]["cached_tokens"], 2)
+        self.assertEqual(summary["by_agent"]["agent1"]["prompt_tokens"], 10)
+        self.assertEqual(summary["by_component"]["evaluator"]["total_tokens"], 4)
+        self.assertEqual(summary["by_component"]["engine"]["total_tokens"], 2)
+        self.assertEqual(summary["by_iteration"][1]["calls"], 2)
+        self.assertEqual(summary["by_model"]["gpt-4o-mini"]["cached_calls"], 1)
+        self.assertEqual(TokenLedger.from_summary(summary).summary(), summary)
+
+    def test_model_prompting_records_provider_usage(self) -> None:
+        # The package re-exports the function under the module's name
+        module = sys.modules["marble.llms.model_prompting"]
+        configure_response_cache(mode="off")
+        ledger = TokenLedger()
+        with mock.patch("litellm.completion", side_effect=_completion):
+            with token_scope(ledger=ledger, agent="agent1") as usage:
+                module.model_prompting(
+                    llm_model="gpt-3.5-turbo",
+                    messages=[{"role": "user", "content": "hi"}],
+                )
+        self.assertEqual(usage.prompt_tokens, 100)
+        self.assertEqual(usage.completion_tokens, 7)
+        self.assertEqual(ledger.summary()["by_agent"]["agent1"]["total_tokens"], 107)
+
+
+if __name__ == "__main__":
+    unittest.main()
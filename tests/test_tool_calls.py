@@ -0,0 +1,88 @@
+import json
+import threading
+import time
+import unittest
+from typing import Any, Dict
+from unittest import mock
+
+from litellm.types.utils import ChatCompletionMessageToolCall, Function, Message
+
+from marble.agent.base_agent import BaseAgent
+from marble.configs.config import Config
+from marble.environments import BaseEnvironment
+from marble.graph.agent_graph import AgentGraph
+
+
+class _LookupEnvironment(BaseEnvironment):
+    concurrent_actions = True
+
+    def __init__(self) -> None:
+        super().__init__(name="lookup", config={})
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._counter_lock = threading.Lock()
+        self.register_action(
+            "lookup",
+            handler=self._lookup_handler,
+            description={"type": "function", "function": {"name": "lookup"}},
+        )
+
+    def _lookup_handler(self, query: str) -> Dict[str, Any]:
+        with self._counter_lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.2)
+        with self._counter_lock:
+            self.in_flight -= 1
+        return {"success": True, "query": query}
+
+
+def _tool_call(index: int, query: str) -> ChatCompletionMessageToolCall:
+    return ChatCompletionMessageToolCall(
+        id=f"call_{index}",
+        type="function",
+        function=Function(name="lookup", arguments=json.dumps({"query": query})),
+    )
+
+
+class TestToolCalls(unittest.TestCase):
+    def test_all_tool_calls_run_concurrently_in_order(self) -> None:
+        env = _LookupEnvironment()
+        agent = BaseAgent(config={"agent_id": "agent1"}, env=env, is_feedback=False)
+        agent.set_agent_graph(
+            AgentGraph([agent], Config({"coordination_mode": "graph", "relationships": []}))
+        )
+        response = Message(
+            content="",
+            role="assistant",
+            tool_calls=[_tool_call(index, query) for index, query in enumerate("abc")],
+        )
+        with mock.patch("marble.agent.base_agent.model_prompting", return_value=[response]):
+            output, communication = agent.act("look things up")
+        self.assertGreater(env.max_in_flight, 1)
+        self.assertEqual(env.current_iteration, 3)
+        self.assertIsNone(communication)
+        queries = [entry["args"]["query"] for entry in agent.memory.retrieve_all()]
+        self.assertEqual(queries, ["a", "b", "c"])
+        self.assertLess(output.index('"query": "a"'), output.index('"query": "c"'))
+
+    def test_sequential_environment(self) -> None:
+        env = _LookupEnvironment()
+        env.concurrent_actions = False
+        agent = BaseAgent(config={"agent_id": "agent1"}, env=env, is_feedback=False)
+        agent.set_agent_graph(
+            AgentGraph([agent], Config({"coordination_mode": "graph", "relationships": []}))
+        )
+        response = Message(
+            content="",
+            role="assistant",
+            tool_calls=[_tool_call(index, query) for index, query in enumerate("ab")],
+        )
+        with mock.patch("marble.agent.base_agent.model_prompting", return_value=[response]):
+            agent.act("look things up")
+        self.assertEqual(env.max_in_flight, 1)
+        self.assertEqual(env.current_iteration, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
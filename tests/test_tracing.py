@@ -0,0 +1,113 @@
+import contextvars
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from marble.llms import model_prompting
+from marble.llms.error_handler import api_calling_error_exponential_backoff
+from marble.llms.response_cache import configure_response_cache
+from marble.llms.stub_backend import configure_stub_backend
+from marble.utils.tracing import configure_tracing, span, traced
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.tracer = configure_tracing(
+            jsonl_path=os.path.join(self.tmp.name, "trace.jsonl"),
+            chrome_trace_path=os.path.join(self.tmp.name, "trace.json"),
+        )
+
+    def tearDown(self) -> None:
+        configure_tracing(enabled=False)
+        self.tmp.cleanup()
+
+    def test_spans_nest_across_thread_pools(self) -> None:
+        @traced("work", category="agent", attributes=lambda n: {"n": n})
+        def work(n: int) -> int:
+            return n * 2
+
+        with span("run", category="engine") as run, ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, work, n) for n in range(2)]
+            self.assertEqual([f.result() for f in futures], [0, 2])
+        with self.assertRaises(ValueError), span("failing"):
+            raise ValueError("boom")
+
+        spans = {(s.name, s.attributes.get("n")): s for s in self.tracer.spans()}
+        self.assertEqual(spans[("work", 0)].parent_id, run.span_id)
+        self.assertEqual(spans[("work", 1)].parent_id, run.span_id)
+        self.assertIsNone(spans[("run", None)].parent_id)
+        self.assertEqual(spans[("failing", None)].status, "error")
+
+        self.tracer.flush()
+        with open(self.tracer.jsonl_path) as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(len(lines), 4)
+        with open(self.tracer.chrome_trace_path) as f:
+            events = json.load(f)["traceEvents"]
+        self.assertEqual(sum(e["ph"] == "X" for e in events), 4)
+        self.assertTrue(any(e["ph"] == "M" for e in events))
+
+    def test_flush_appends_to_the_chrome_trace(self) -> None:
+        with span("first"):
+            pass
+        self.tracer.flush()
+        self.assertEqual(self.tracer.spans(), [])
+        with span("second"):
+            pass
+        self.tracer.flush()
+        self.tracer.flush()
+        with open(self.tracer.chrome_trace_path) as f:
+            events = json.load(f)["traceEvents"]
+        self.assertEqual([e["name"] for e in events if e["ph"] == "X"], ["first", "second"])
+        self.assertEqual(sum(e["ph"] == "M" for e in events), 1)
+
+    def test_jsonl_only_keeps_no_spans(self) -> None:
+        with span("before"):
+            pass
+        self.assertIsNotNone(self.tracer._jsonl_file)
+        jsonl_path = os.path.join(self.tmp.name, "only.jsonl")
+        tracer = configure_tracing(jsonl_path=jsonl_path)
+        # Reconfiguring closed the previous tracer's file
+        self.assertIsNone(self.tracer._jsonl_file)
+        with span("work"):
+            pass
+        self.assertEqual(tracer.spans(), [])
+        configure_tracing(enabled=False)
+        self.assertIsNone(tracer._jsonl_file)
+        with open(jsonl_path) as f:
+            self.assertEqual([json.loads(line)["name"] for line in f], ["work"])
+
+    def test_retries_are_span_events(self) -> None:
+        calls = []
+
+        @api_calling_error_exponential_backoff(retries=3, base_wait_time=0)
+        def flaky() -> str:
+            calls.append(1)
+            if len(calls) < 2:
+                raise RuntimeError("rate limited")
+            return "ok"
+
+        with span("llm") as current:
+            self.assertEqual(flaky(), "ok")
+        self.assertEqual([e["name"] for e in current.events], ["retry"])
+        self.assertEqual(current.events[0]["error"], "rate limited")
+
+    def test_model_prompting_span(self) -> None:
+        configure_response_cache(mode="off")
+        configure_stub_backend(seed=1, responses=[(r"\bping\b", "pong")])
+        with mock.patch("litellm.completion") as completion:
+            model_prompting("stub/a", [{"role": "user", "content": "ping"}])
+        completion.assert_not_called()
+        (llm_span,) = [s for s in self.tracer.spans() if s.name == "llm.completion"]
+        self.assertEqual(llm_span.category, "llm")
+        self.assertEqual(llm_span.attributes["model"], "stub/a")
+        self.assertFalse(llm_span.attributes["cached"])
+        self.assertGreater(llm_span.attributes["prompt_tokens"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
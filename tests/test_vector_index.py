@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+
+from marble.memory.long_term_memory import LongTermMemory
+from marble.memory.vector_index import VectorIndex
+
+
+class TestVectorIndex(unittest.TestCase):
+    def test_exact_search(self) -> None:
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(300, 16))
+        index = VectorIndex(initial_capacity=4)
+        index.add(vectors[:1])
+        index.add(vectors[1:])
+        self.assertEqual(len(index), 300)
+        query = rng.normal(size=16)
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        expected = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:5]
+        results = index.search(query, k=5)
+        self.assertEqual([row for row, _ in results], list(expected))
+        self.assertEqual(len(index.search(query, k=1000)), 300)
+
+    def test_approximate_search(self) -> None:
+        rng = np.random.default_rng(1)
+        vectors = rng.normal(size=(2000, 32)).astype(np.float32)
+        index = VectorIndex(approximate_threshold=1000, nprobe=8)
+        index.add(vectors)
+        # A stored vector is its own nearest neighbour
+        for row in (0, 999, 1999):
+            self.assertEqual(index.search(vectors[row], k=1)[0][0], row)
+
+    def test_long_term_memory_sync(self) -> None:
+        memory = LongTermMemory()
+        memory.storage.append(({"content": "a"}, np.array([1.0, 0.0])))
+        memory.storage.append(({"content": "b"}, np.array([0.0, 1.0])))
+        memory._sync_index()
+        self.assertEqual(memory.index.search(np.array([0.1, 1.0]), k=1)[0][0], 1)
+        # Replacing storage, as a checkpoint restore does, rebuilds the index
+        memory.storage = [({"content": "c"}, np.array([1.0, 1.0]))]
+        memory._sync_index()
+        self.assertEqual(len(memory.index), 1)
+
+    def test_long_term_memory_sync_after_rewrite(self) -> None:
+        memory = LongTermMemory()
+        memory.storage.append(({"content": "a"}, np.array([1.0, 0.0])))
+        memory.storage.append(({"content": "b"}, np.array([0.0, 1.0])))
+        memory._sync_index()
+        # Same list, same length, different embedding
+        memory.storage[1] = ({"content": "c"}, np.array([-1.0, 0.0]))
+        memory._mark_changed(rewritten=True)
+        memory._sync_index()
+        self.assertEqual(memory.index.search(np.array([-1.0, 0.1]), k=1)[0][0], 1)
+        self.assertEqual(len(memory.index), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()